@@ -1,25 +1,165 @@
 """
 Agent基类
 """
-from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from types import MappingProxyType
+from typing import Any, Callable, List, Mapping, Optional, Protocol
+import asyncio
+import functools
 import logging
 
-logging.basicConfig(level=logging.INFO)
+_LOGGING_CONFIGURED = False
 
 
-class BaseAgent(ABC):
-    """Agent基类"""
+def _ensure_logging():
+    """首次创建Agent时按需配置日志；宿主程序已配置root handler时不覆盖"""
+    global _LOGGING_CONFIGURED
+    if _LOGGING_CONFIGURED:
+        return
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO)
+    _LOGGING_CONFIGURED = True
+
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+
+def jit_kernel(signature=None, fastmath=False):
+    """
+    数值计算kernel的JIT装饰器
+
+    安装了numba时使用 numba.njit(cache=True) 编译（编译结果缓存到磁盘，
+    避免每次启动重新编译）；未安装时原样返回函数，保持纯Python行为。
+    fastmath=True 允许重排浮点运算、假定无NaN/Inf，结果可能与纯Python不一致，需按kernel显式开启。
+
+    用法:
+        @BaseAgent.jit_kernel()
+        def _inner(arr): ...
+    """
+    def decorator(fn):
+        if not NUMBA_AVAILABLE:
+            return fn
+        if signature is None:
+            return numba.njit(cache=True, fastmath=fastmath)(fn)
+        return numba.njit(signature, cache=True, fastmath=fastmath)(fn)
+    return decorator
+
+
+# 通过 BaseAgent.register_warmup 注册的预热函数（需为可pickle的模块级函数）
+_WARMUP_CALLABLES: List[Callable[[], Any]] = []
+
+
+def _invoke(fn: Callable[[], Any]) -> Any:
+    return fn()
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_logger(name: str) -> logging.Logger:
+    """缓存logger查找，避免每次构造Agent都进入logging Manager的加锁字典"""
+    return logging.getLogger(name)
+
+
+# 未传config时所有Agent共享的只读空配置
+_EMPTY_CONFIG = MappingProxyType({})
+
+
+# 日志级别字符串 -> logging常量（模块加载时解析一次）
+_LEVEL_MAP = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+
+class AgentProto(Protocol):
+    """Agent静态类型协议（仅用于类型标注）"""
+    
+    name: str
+    
+    def process(self, input_data: Any) -> Any: ...
+
+
+class BaseAgent:
+    """
+    Agent基类
+
+    基类声明了 __slots__；子类如需同样省去实例 __dict__，应声明自己的 __slots__，
+    否则会照常带有 __dict__（行为不变）。
+    """
     
-    def __init__(self, name: str, config: Dict[str, Any] = None):
+    __slots__ = ("name", "config", "logger", "_log_prefix", "_log_methods", "_info", "_repr")
+    
+    # 全局/按子类关闭Agent日志：BaseAgent.LOG_ENABLED = False
+    LOG_ENABLED: bool = True
+    
+    jit_kernel = staticmethod(jit_kernel)
+    
+    def __init_subclass__(cls, **kwargs):
+        # 代替ABC/abstractmethod：子类定义时即检查是否实现了process()
+        super().__init_subclass__(**kwargs)
+        if cls.process is BaseAgent.process:
+            raise TypeError(f"{cls.__name__} must override process()")
+    
+    @classmethod
+    def register_warmup(cls, fn: Callable[[], Any]) -> Callable[[], Any]:
+        """
+        注册JIT kernel预热函数（可作装饰器使用）
+        
+        子类在模块导入时注册，例如 BaseAgent.register_warmup(_warmup_inner)，
+        其中 _warmup_inner 用小规模输入调用一次 @jit_kernel 函数。
+        （目前尚无Agent注册，warmup_all() 返回0）
+        """
+        _WARMUP_CALLABLES.append(fn)
+        return fn
+    
+    @classmethod
+    def warmup_all(cls, parallel: bool = True) -> int:
+        """
+        在进程启动时预编译所有已注册的JIT kernel，避免首个请求承担编译耗时
+        
+        parallel=True 时用进程池并行编译；配合 cache=True，编译结果写入磁盘缓存，
+        主进程随后加载缓存即可。
+        
+        Returns:
+            执行的预热函数数量
+        """
+        if not _WARMUP_CALLABLES:
+            return 0
+        if parallel and len(_WARMUP_CALLABLES) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor() as executor:
+                list(executor.map(_invoke, _WARMUP_CALLABLES))
+        else:
+            for fn in _WARMUP_CALLABLES:
+                fn()
+        return len(_WARMUP_CALLABLES)
+    
+    def __init__(self, name: str, config: Optional[Mapping[str, Any]] = None):
+        _ensure_logging()
         self.name = name
-        self.config = config or {}
-        self.logger = logging.getLogger(name)
+        self._log_prefix = "[" + name + "] "
+        self._repr = f"<{type(self).__name__}(name={name})>"
+        # config对外只读：快照后包装为MappingProxyType，可在线程/Agent间安全共享
+        if config is None:
+            self.config = _EMPTY_CONFIG
+        elif isinstance(config, MappingProxyType):
+            self.config = config
+        else:
+            self.config = MappingProxyType(dict(config)) if config else _EMPTY_CONFIG
+        self.logger = _get_logger(name)
+        # level字符串 -> (级别常量, 绑定方法) 的缓存；info走单独的快路径
+        self._log_methods = {}
+        self._info = self.logger.info
     
-    @abstractmethod
     def process(self, input_data: Any) -> Any:
         """
-        处理数据的主方法
+        处理数据的主方法（子类必须覆盖）
         
         Args:
             input_data: 输入数据
@@ -27,17 +167,61 @@ class BaseAgent(ABC):
         Returns:
             处理后的数据
         """
-        pass
+        raise NotImplementedError
+    
+    def process_batch(self, inputs: List[Any]) -> List[Any]:
+        """
+        批量处理：默认逐个调用process()
+        
+        支持批量后端的子类（一次请求多条prompt的LLM、向量化数值计算）应覆盖此方法，
+        调用方统一使用该接口即可获得批处理收益。
+        """
+        return [self.process(x) for x in inputs]
+    
+    async def process_async(self, input_data: Any) -> Any:
+        """
+        process()的异步版本：默认放到线程池执行，便于调用方用 asyncio.gather
+        并发多个阻塞型（LLM/数据库）调用。子类可覆盖为原生异步实现。
+        """
+        return await asyncio.to_thread(self.process, input_data)
     
     def log(self, message: str, level: str = "info"):
-        """记录日志"""
-        log_func = getattr(self.logger, level.lower())
-        log_func(f"[{self.name}] {message}")
+        """记录日志（级别未启用时直接返回，不做格式化）"""
+        if not self.LOG_ENABLED:
+            return
+        if level == "info":
+            lvl, log_func = logging.INFO, self._info
+        else:
+            lvl, log_func = self._resolve_level(level)
+        if not self.logger.isEnabledFor(lvl):
+            return
+        log_func("%s%s", self._log_prefix, message)
+    
+    def log_batch(self, messages: List[str], level: str = "info"):
+        """批量记录日志：级别检查与方法解析只做一次"""
+        if not self.LOG_ENABLED:
+            return
+        lvl, log_func = self._resolve_level(level)
+        if not self.logger.isEnabledFor(lvl):
+            return
+        prefix = self._log_prefix
+        for message in messages:
+            log_func("%s%s", prefix, message)
+    
+    def _resolve_level(self, level: str):
+        """level字符串 -> (级别常量, 绑定方法)，按实例缓存"""
+        cached = self._log_methods.get(level)
+        if cached is None:
+            level_name = level.lower()
+            cached = (_LEVEL_MAP[level_name], getattr(self.logger, level_name))
+            self._log_methods[level] = cached
+        return cached
     
-    def validate_input(self, input_data: Any) -> bool:
-        """验证输入数据"""
+    @staticmethod
+    def validate_input(input_data: Any) -> bool:
+        """验证输入数据（静态方法，子类可覆盖为更复杂的校验）"""
         return input_data is not None
     
     def __repr__(self):
-        return f"<{self.__class__.__name__}(name={self.name})>"
+        return self._repr
 
@@ -24,7 +24,7 @@ else:
     from .base import BaseAgent
 
 from models import PolicySegment
-from utils.investment_relevance import judge_investment_and_industries
+from utils.investment_relevance import judge_investment_and_industries, judge_investment_and_industries_batch
 
 
 class IndustryAgent(BaseAgent):
@@ -208,13 +208,15 @@ class IndustryAgent(BaseAgent):
         逻辑：
         1. 检查缓存，如果存在则直接使用
         2. 关键词匹配所有行业名称与原文，得到候选行业和匹配片段
-        3. 使用合并的DS32B判断（投资相关性 + 行业过滤），一次调用完成
+        3. 使用合并的DS32B判断（投资相关性 + 行业过滤），一次调用完成；
+           未命中缓存的文档先全部完成关键词匹配，再并发调用DS32B
         4. 保存结果到缓存和文档metadata
         """
         self.log(f"开始为 {len(documents)} 个政策文档进行行业分类（关键词匹配 + 合并DS32B判断）")
         
         cached_count = 0
         new_count = 0
+        pending = []  # 未命中缓存的文档：(序号, 文档, 候选行业, 匹配片段)
         
         for i, doc in enumerate(documents, 1):
             # ⭐ 步骤1：检查缓存
@@ -244,12 +246,17 @@ class IndustryAgent(BaseAgent):
             for industry, segments_list in matched_segments.items():
                 self.log(f"  [关键词匹配] 行业 {industry}: 匹配到 {len(segments_list)} 个片段")
             
-            # 步骤3：合并判断（投资相关性 + 行业过滤）- 调用DS32B
-            self.log(f"  [{i}/{len(documents)}] 文档 {doc.doc_id}: 调用DS32B进行判断...")
-            combined_result = judge_investment_and_industries(
-                doc, candidate_industries, matched_segments
-            )
-            
+            pending.append((i, doc, candidate_industries, matched_segments))
+        
+        # 步骤3：合并判断（投资相关性 + 行业过滤）- 未命中缓存的文档并发调用DS32B
+        if pending:
+            self.log(f"  并发调用DS32B判断 {len(pending)} 个文档...")
+        combined_results = judge_investment_and_industries_batch(
+            [(doc, candidate_industries, matched_segments)
+             for _, doc, candidate_industries, matched_segments in pending]
+        )
+        
+        for (i, doc, _, _), combined_result in zip(pending, combined_results):
             # 步骤4：保存结果到缓存
             self._save_result_to_cache(doc, combined_result)
             
@@ -1,7 +1,9 @@
 """
 Investment Agent - 投资分析生成（集中所有prompt调用）
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
+import json
+import re
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -39,8 +41,6 @@ class InvestmentAgent(BaseAgent):
     
     def generate_industry_section(self, segment: PolicySegment) -> str:
         """生成行业分析部分"""
-        import json
-        
         industries = segment.industries if segment.industries else []
         
         if not industries:
@@ -56,8 +56,6 @@ class InvestmentAgent(BaseAgent):
                                          industries: List[str], 
                                          industry_segments: Dict[str, List[str]]):
         """将行业标签及对应政策片段保存到JSON文件"""
-        import json
-        
         industry_dir = Path("industry")
         industry_dir.mkdir(exist_ok=True)
         
@@ -206,8 +204,6 @@ class InvestmentAgent(BaseAgent):
                 temperature=0.3
             )
             
-            import json
-            import re
             response = response.strip()
             
             self.log(f"  LLM响应长度: {len(response)} 字符")
@@ -472,7 +468,6 @@ TOPICS_JSON:{{"topics":["板块1","板块2","板块3"]}}
         ]
         
         # 按段落分割（按换行或句号分割）
-        import re
         paragraphs = re.split(r'\n+|。', content)
         
         # 筛选包含关键词的段落
@@ -757,7 +752,7 @@ TOPICS_JSON:{{"topics":["板块1","板块2","板块3"]}}
                 return ""
             
             results.sort(key=lambda x: x.get('chunk_index', 0))
-            full_text = "\n\n".join([chunk.get('content', '') for chunk in results if chunk.get('content')])
+            full_text = "\n\n".join([self.vector_db.decode_content(chunk.get('content')) for chunk in results if chunk.get('content')])
             
             self.log(f"✅ 找到标题为'{title}'的文档，共{len(results)}个chunks")
             return full_text
@@ -766,13 +761,15 @@ TOPICS_JSON:{{"topics":["板块1","板块2","板块3"]}}
             self.log(f"查询全文失败: {e}", level="error")
             return ""
 
-    def generate_final_investment_summary(self, report_content: str, policy_title: str) -> str:
+    def generate_final_investment_summary(self, report_content: str, policy_title: str,
+                                          on_delta: Optional[Callable[[str], None]] = None) -> str:
         """
         基于完整报告内容生成总的投资建议
         
         Args:
             report_content: 完整的Markdown报告内容
             policy_title: 政策标题
+            on_delta: 流式回调，每收到一段生成文本调用一次（如边生成边写入报告文件）
             
         Returns:
             投资建议的Markdown文本
@@ -855,7 +852,9 @@ TOPICS_JSON:{{"topics":["板块1","板块2","板块3"]}}
             messages = [{"role": "user", "content": prompt}]
             response = self.llm_client.chat_completion(
                 messages=messages,
-                temperature=0.3
+                temperature=0.3,
+                stream=True,
+                on_delta=on_delta
             )
             
             self.log(f"✅ 投资建议总结生成完成")
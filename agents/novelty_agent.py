@@ -2,28 +2,510 @@
 Novelty Agent - 增量分析（政策新旧对比）
 分主题RAG检索 + LLM对比分析
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
+import io
+import json
+import re
+import string
 import sys
+import threading
 from pathlib import Path
 
+import numpy as np
+
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from .base import BaseAgent
 from models import PolicySegment
 from core.clients.volcengine_client import get_volcengine_client
+from utils.llm_cache import get_llm_cache
+
+# prompt版本号：修改主题提取/维度拆分等被缓存的prompt时需要+1，使旧缓存失效
+PROMPT_VERSION = 1
+
+# 各LLM调用的max_tokens上限（按实际输出规模设置，避免统一申请32768）
+_TOKEN_BUDGET = {
+    'investment_content': 8192,       # 投资相关内容提炼
+    'investment_topics': 200,         # 逗号分隔的行业列表
+    'topic_content': 8192,            # 主题相关原文摘录
+    'split_dimensions': 4096,         # 3个维度的JSON（含原文摘录）
+    'dimension_comparison': 4096,     # 单维度对比表格+总结
+    'relevance_per_chunk': 60,        # 相关性评分JSON，每个chunk约一行
+    'relevance_max': 4096,
+    'topic_summary': 1024,            # 核心观点（100-200字）
+    'topic_comparison_legacy': 8192,  # 旧流程主题深度点评（1500-2500字）
+}
+
+# 上下文预算（旧流程把全部历史政策原文拼进一个prompt，发送前按token预算裁剪，避免超长被服务端静默截断）
+_CONTEXT_TOKEN_LIMIT = 128_000   # 模型上下文窗口
+_PROMPT_OVERHEAD_TOKENS = 2_000  # prompt模板固定文字
+_HISTORY_BUDGET_RATIO = 0.5      # 历史政策最多占剩余预算的比例
+_MIN_DOC_TOKENS = 200            # 截断后不足该长度的历史政策直接丢弃
+
+try:
+    import tiktoken  # 可选：精确计数；未安装时按字符数估算（中文约1字≈1token，偏保守）
+    _TOKEN_ENCODER = tiktoken.get_encoding('cl100k_base')
+except Exception:
+    _TOKEN_ENCODER = None
+
+
+def _count_tokens(text: str) -> int:
+    """估算文本token数"""
+    if _TOKEN_ENCODER is not None:
+        return len(_TOKEN_ENCODER.encode(text, disallowed_special=()))
+    return len(text)
+
+try:
+    import json5  # 可选：容错解析（尾逗号、单引号、注释等）
+except ImportError:
+    json5 = None
+
+
+# 句子切分（保留句末标点），用于相关性评分前的chunk摘要
+_SENTENCE_SPLIT = re.compile(r'(?<=[。！？；!?;\n])')
+
+
+def _extract_json_block(text: str) -> str:
+    """
+    从LLM输出中截取最外层的 {...}
+    
+    单遍扫描：从第一个 '{' 开始计数括号深度，字符串内（含转义）的括号不计入；
+    markdown代码块围栏、前后的说明文字都会被丢弃。没有闭合时返回从 '{' 起的剩余部分。
+    """
+    start = text.find('{')
+    if start < 0:
+        return text.strip()
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _loads_llm_json(text: str) -> Any:
+    """解析LLM返回的JSON：先截取最外层对象，json.loads失败时（若已安装）再用json5容错解析"""
+    block = _extract_json_block(text)
+    try:
+        return json.loads(block)
+    except ValueError:
+        if json5 is None:
+            raise
+        return json5.loads(block)
+
+
+@functools.lru_cache(maxsize=100_000)
+def _parse_timestamp(timestamp) -> Optional[datetime]:
+    """解析chunk的timestamp（ISO字符串或datetime），无法解析时返回None；按原始值缓存"""
+    if isinstance(timestamp, datetime):
+        return timestamp
+    if not timestamp or not isinstance(timestamp, str):
+        return None
+    try:
+        if 'T' in timestamp:
+            return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        return datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_policy_date(timestamp: Optional[datetime]) -> str:
+    """政策发布时间的中文日期（同一政策的各主题共用，按时间戳缓存）"""
+    return timestamp.strftime('%Y年%m月%d日') if timestamp else 'N/A'
+
+
+@dataclass(slots=True)
+class Chunk:
+    """
+    检索结果chunk（替代search_chunks返回的dict，__slots__省去每个chunk的实例字典）
+    
+    内部代码用属性访问；同时提供 get / [] / in 等dict兼容接口，reranker等按dict读写的代码无需修改。
+    search_chunks返回的其他字段放在extra中，to_dict()在结果返回给调用方时还原为dict。
+    """
+    chunk_id: Optional[str] = None
+    doc_id: Optional[str] = None
+    title: str = ""
+    timestamp: Any = ""
+    content: str = ""
+    similarity: float = 0.0
+    chunk_index: Optional[int] = None
+    chunk_type: Optional[str] = None
+    industries: Any = None
+    rerank_score: float = 0.0
+    original_rank: int = 0
+    time_bonus: float = 0.0
+    final_score: float = 0.0
+    llm_scores: Optional[Dict[str, int]] = None
+    llm_total_score: int = 0
+    parsed_ts: Optional[datetime] = None  # 解析后的timestamp（只解析一次）
+    dedup_key: str = ""  # title + '\x1f' + timestamp，去重时直接作为dict key
+    extra: Optional[Dict[str, Any]] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Chunk":
+        """
+        由search_chunks的结果dict构建，同时完成预处理：
+        解析timestamp、title做sys.intern（同一文档的多个chunk共享同一个字符串对象）、生成去重key
+        """
+        chunk = cls()
+        for key, value in data.items():
+            chunk[key] = value
+        if isinstance(chunk.title, str):
+            chunk.title = sys.intern(chunk.title)
+        chunk.parsed_ts = _parse_timestamp(chunk.timestamp)
+        chunk.dedup_key = str(chunk.title) + '\x1f' + str(chunk.timestamp)
+        return chunk
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """还原为dict（不含parsed_ts、dedup_key等内部字段）"""
+        data = {name: getattr(self, name) for name in _CHUNK_PUBLIC_FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    def copy(self) -> "Chunk":
+        """浅拷贝（与dict.copy语义一致）"""
+        return replace(self, extra=dict(self.extra) if self.extra else None)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _CHUNK_FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in _CHUNK_FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value: Any):
+        if key in _CHUNK_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+    
+    def __contains__(self, key: str) -> bool:
+        if key in _CHUNK_FIELDS:
+            return True
+        return bool(self.extra) and key in self.extra
+
+
+_CHUNK_FIELDS = frozenset(f.name for f in fields(Chunk)) - {"extra"}
+_CHUNK_PUBLIC_FIELDS = tuple(
+    f.name for f in fields(Chunk) if f.name not in ("parsed_ts", "dedup_key", "extra")
+)
+
+
+def _prepare_chunks(chunks: List[Any]) -> List[Chunk]:
+    """检索结果预处理：dict转换为Chunk（timestamp解析、去重key只计算一次），已是Chunk的原样保留"""
+    return [c if isinstance(c, Chunk) else Chunk.from_dict(c) for c in chunks]
+
+
+@dataclass
+class AnalysisContext:
+    """单次增量分析的共享上下文（在analyze_with_topics中构建一次，向下传递）"""
+    segment: PolicySegment
+    after_timestamp: Optional[datetime]  # 2年时间窗口下限
+    topics: List[str] = field(default_factory=list)
+    # 主题级ANN候选池 {topic: [chunk, ...]}，同一主题的各维度共享
+    candidate_pools: Dict[str, List[Chunk]] = field(default_factory=dict)
+
+
+# ===== prompt模板（模块加载时构建一次；string.Template避免JSON示例中的花括号转义） =====
+
+# 投资相关内容提炼（无变量，直接使用）
+_PROMPT_INVESTMENT_CONTENT = """请从上述新政策文档中提取**具有投资相关性**的核心内容。
+
+---
+
+## 任务说明
+
+你需要提取对**投资分析**有价值的内容，包括：
+
+### 必须保留的内容：
+1. **产业政策**：支持/限制哪些行业、产业升级方向
+2. **量化目标**：具体数字、百分比、金额、产能目标
+3. **时间节点**：2025年、2030年等关键时间点的目标
+4. **财政/金融支持**：补贴、税收优惠、专项资金、信贷支持
+5. **重点项目**：基础设施、重大工程、试点示范
+6. **技术方向**：新能源、人工智能、半导体等具体技术
+7. **区域布局**：哪些地区重点发展什么产业
+
+### 必须过滤掉的内容：
+1. 政治宣示语、原则性表述
+2. 空洞表态、重复内容
+3. 与投资无关的行政管理内容
+
+### 输出要求：
+- 直接输出提炼后的核心内容
+- 保留原文的关键数据和措施
+- 可以整理语句，但不改变原意
+- 不要加标题或格式"""
+
+# 主题拆分细分维度
+_PROMPT_SPLIT_DIMENSIONS = string.Template("""你是一名资深的${topic}行业分析师。请基于上述新政策内容，将"${topic}"主题拆分为3个最具投资价值的细分板块/子领域。
+
+=== 任务 ===
+
+请将"${topic}"主题拆分为3个最重要且具有投资价值的细分板块，每个板块需要：
+1. 板块名称：具体的子行业或细分领域（如"新能源汽车"→"整车制造"、"动力电池"、"充电基础设施"）
+2. 板块描述：说明这个细分板块包含什么
+3. 新政策内容：直接摘录新政策中与该板块相关的原文
+
+=== 输出格式（JSON） ===
+
+```json
+{
+  "dimensions": [
+    {
+      "dimension": "细分板块1名称",
+      "description": "这个板块包含什么",
+      "content": "新政策中与该板块相关的原文摘录"
+    },
+    {
+      "dimension": "细分板块2名称", 
+      "description": "这个板块包含什么",
+      "content": "新政策中与该板块相关的原文摘录"
+    },
+    {
+      "dimension": "细分板块3名称",
+      "description": "这个板块包含什么", 
+      "content": "新政策中与该板块相关的原文摘录"
+    }
+  ]
+}
+```
+
+=== 要求 ===
+1. 拆分为具体的子行业/细分板块，不要拆分为分析角度（如"政策力度"、"技术路线"）
+2. 优先选择政策着墨较多、投资价值较高的细分方向
+3. 板块要有区分度，不要重叠
+4. content必须是新政策原文摘录，不要改写
+5. 只输出JSON""")
+
+# 单维度新旧政策对比
+_PROMPT_DIMENSION_COMPARISON = string.Template("""请针对"${dim_name}"这个维度，对比新政策与历史政策的边际变化。
+
+=== 维度说明 ===
+维度名称：${dim_name}
+维度描述：${dim_desc}
+
+=== 新政策该维度内容 ===
+《${policy_title}》
+
+${dim_content}
+
+=== 历史政策（${num_history}篇） ===
+${history_for_llm}
+
+=== 输出要求 ===
+
+请用表格对比新政策与历史政策在"${dim_name}"维度的边际变化：
+
+**新政策表述**：
+完整引用新政策原文
+
+**与历史政策对比**：
+
+| 历史政策表述 | 边际变化 |
+|-------------|---------|
+| 《政策名》（YYYY年MM月）完整引用历史政策原文 | 具体说明变化内容（如：新增XX表述/从XX升级为XX/删除XX要求） |
+
+要求：
+- 只选取与该维度高度相关的历史政策进行对比，相关性弱的不要放入表格
+- 每行对比一个不同的历史政策要点，不要重复
+- 历史政策表述要带上政策名称和时间，格式：《政策名》（YYYY年MM月）原文内容
+- 边际变化要具体说明与新政策相比的变化内容，不要只写"强化"、"延续"等笼统词汇
+- 列出3-5个不同的对比要点
+
+然后用1-2句话总结该维度的核心变化。
+
+=== 要求 ===
+1. 新政策表述单独列在表格前面，不要放在表格里
+2. 表格只有两列：历史政策表述、边际变化
+3. 只展示与该维度高度相关的对比，相关性弱的历史政策不要放入表格
+4. 历史政策表述必须带上《政策名》（YYYY年MM月），完整引用原文
+5. 边际变化要具体描述变化内容，不要只写"强化/延续"
+6. 不要用省略号(...)省略内容，完整输出所有分析
+7. 只输出新政策表述、表格和总结，不要其他内容""")
+
+# LLM相关性多维度评分
+_PROMPT_RELEVANCE_SCORING = string.Template("""对以下历史政策片段与新政策的相关性进行**多维度评分**。
+
+【新政策】${new_policy_title}
+
+【新政策该主题的具体内容】
+${new_policy_content}
+
+【历史政策片段列表】
+${chunk_list_text}
+
+---
+
+## 评分维度（每项1-5分）
+
+1. **主题相关度**：历史政策是否讨论与新政策相同的细分领域？
+   - 1分：完全无关（如新政策讲国防军工，历史政策讲土地管理）
+   - 3分：大方向相关但细分领域不同
+   - 5分：高度相关，讨论同一细分领域的同类内容
+
+2. **政策延续性**：是否是同一政策链条上的文件？
+   - 1分：无关联（如立法计划、茶话会讲话等）
+   - 3分：相关但非直接延续
+   - 5分：明确的修订/实施细则/配套政策
+
+3. **对比价值**：对比能否得出有意义的增量分析？
+   - 1分：无对比价值（内容太泛或不相关）
+   - 3分：有一定参考价值
+   - 5分：高对比价值，能看出明确的政策变化
+
+## 输出要求
+
+只输出JSON，格式如下：
+{
+  "scores": [
+    {"id": 1, "topic": 4, "continuity": 3, "value": 5, "total": 12},
+    {"id": 2, "topic": 2, "continuity": 1, "value": 2, "total": 5},
+    ...
+  ]
+}
+
+注意：
+- 评分所有片段，total >= 9分的都值得对比
+- 明显无关的（如立法计划、土地管理条例、茶话会讲话等）给低分
+- id对应片段编号
+- 尽量多保留相关政策用于一对多对比""")
+
+# 旧流程：主题一对多深度对比
+_PROMPT_TOPIC_COMPARISON_LEGACY = string.Template("""你是一名顶级券商的${topic}行业首席分析师，请基于新政策和${num_history}篇历史政策，撰写一份深度政策点评。
+
+=== 新政策 ===
+《${policy_title}》（${policy_date}）
+
+${policy_content}
+
+=== 历史政策（${num_history}篇） ===
+${history_for_llm}
+
+=== 分析任务 ===
+
+请对比新政策与上述${num_history}篇历史政策，撰写"${topic}"主题的深度分析。
+
+重点回答：
+1. 新政策释放了什么信号？政策方向是加码还是收缩？
+2. 相比历史政策，有哪些边际变化（新增/强化/弱化）？
+
+=== 输出格式 ===
+
+#### 核心观点
+
+**投资评级**：看多/看平/看空
+**核心逻辑**：说清楚政策信号和最大边际变化
+
+#### 政策对比与边际变化
+
+**新政策核心表述**：
+直接引用新政策中关于${topic}的重要表述
+
+**与历史政策对比**：
+
+| 历史政策表述 | 边际变化 |
+|-------------|---------|
+| 《政策名》（YYYY年MM月）完整引用历史政策原文 | 具体说明变化内容 |
+
+要求：
+- 新政策表述单独列在表格前面，不要放在表格里
+- 表格只有两列：历史政策表述、边际变化
+- 只选取与该主题高度相关的历史政策进行对比，相关性弱的不要放入表格
+- 历史政策表述要带上政策名称和时间，格式：《政策名》（YYYY年MM月）原文内容
+- 边际变化要具体说明与新政策相比的变化内容，不要只写"强化"、"延续"
+- 列出3-5个不同的对比要点，不要重复
+
+
+=== 要求 ===
+
+1. 新政策表述单独列在表格前面，表格只有两列（历史政策表述、边际变化）
+2. 只展示与该主题高度相关的对比，相关性弱的历史政策不要放入表格
+3. 历史政策表述必须带上《政策名》（YYYY年MM月），完整引用原文
+4. 引用原文时直接写出来，不要用特殊引号格式
+5. 边际变化要具体描述变化内容，不要只写"强化/延续"等笼统词汇
+6. 不要用省略号(...)省略内容，完整输出所有分析
+7. 总字数1500-2500字""")
+
+# 旧流程：主题深度分析输出外壳
+_TOPIC_COMPARISON_LEGACY_OUTPUT = string.Template("""### 3.${topic_idx} ${topic}
+
+本主题共检索到 **${num_docs}** 篇相关历史政策。
+
+---
+
+${analysis}
+
+""")
 
 
 class NoveltyAgent(BaseAgent):
     """增量分析Agent - 分主题RAG + LLM相关性评分 + Reranker精排"""
     
     MAX_DOCS = 50  # 最大返回文档数
+    MAX_TOPIC_WORKERS = 5  # 主题级并发数（LLM调用并发；embedding/reranker在模型内部持锁串行）
+    MAX_DIMENSION_WORKERS = 3  # 每个主题内维度级并发数
+    
+    # 相关性精排后端："local" 本地cross-encoder批量打分（默认）；"llm" LLM多维度评分
+    RELEVANCE_RERANK_BACKEND = "local"
+    LOCAL_RERANK_MIN_SCORE = 0.5  # 本地reranker分数阈值（sigmoid后的相关概率，取值[0,1]）
+    
+    TOPIC_POOL_TOP_K = 600  # 主题级共享候选池的ANN召回数量
+    ANN_CACHE_SIZE = 32  # search_chunks结果的LRU缓存条数（同参数重复检索直接复用）
+    LLM_RERANK_WINDOW = 20  # LLM相关性评分每次调用的chunk数
+    LLM_RERANK_MAX_CANDIDATES = 100  # LLM相关性评分最多评分的chunk数
+    LLM_RERANK_EARLY_EXIT_SCORE = 10  # 窗口内保留的最低总分超过该值且已保留2*top_k个时提前结束
+    SCORING_TOP_SENTENCES = 3  # LLM相关性评分时每个chunk只保留与query最相近的句子数
+    SENTENCE_EMB_CACHE_SIZE = 4096  # 按chunk_id缓存的句子向量条数
+    TOPIC_QUERY_DEDUP_SIM = 0.95  # 主题query余弦相似度超过该值时合并为一次ANN检索
     
     def __init__(self, vector_db=None):
         super().__init__("NoveltyAgent")
         self.vector_db = vector_db
         self.llm_client = get_volcengine_client()
+        self.llm_cache = get_llm_cache("novelty")
+        self._local_reranker = None
+        self._local_reranker_loaded = False
+        self._local_reranker_lock = threading.Lock()
+        self._ann_cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._ann_cache_lock = threading.Lock()
+        # chunk_id -> (句子列表, 句子向量矩阵)
+        self._sentence_emb_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._sentence_emb_lock = threading.Lock()
         self.log("✅ NoveltyAgent初始化完成")
     
     def process(self, input_data: Any) -> Dict[str, Any]:
@@ -71,7 +553,7 @@ class NoveltyAgent(BaseAgent):
                 'topics': 使用的主题词列表
             }
         """
-        # 计算2年时间窗口
+        # 计算2年时间窗口（只计算一次，通过ctx向下传递）
         if segment.timestamp:
             after_timestamp = segment.timestamp - timedelta(days=730)
             self.log(f"⏰ 时间窗口: {after_timestamp.strftime('%Y-%m-%d')} ~ {segment.timestamp.strftime('%Y-%m-%d')} (2年内)")
@@ -86,14 +568,15 @@ class NoveltyAgent(BaseAgent):
         
         self.log(f"使用 {len(topics)} 个主题词进行分主题分析: {topics}")
         
+        ctx = AnalysisContext(segment=segment, after_timestamp=after_timestamp, topics=topics)
+        
         if use_dimension_analysis:
             # 新流程：分维度精细化RAG
             self.log("🚀 使用分维度精细化RAG流程...")
             
             # 直接在_generate_topic_analysis_report中处理分维度逻辑
             analysis = self._generate_topic_analysis_report(
-                segment=segment,
-                topics=topics,
+                ctx=ctx,
                 topic_rag_results={},  # 新流程不需要预先RAG
                 use_dimension_analysis=True
             )
@@ -109,14 +592,18 @@ class NoveltyAgent(BaseAgent):
             topic_rag_results = {}
             
             if self.vector_db and topics:
+                # 先规划各主题的检索query，近似重复的query合并为同一次ANN检索
+                topic_queries = self._plan_topic_queries(ctx)
                 for topic in topics:
                     self.log(f"  检索主题: {topic}")
+                    query_text, search_query = topic_queries[topic]
                     results, query_text = self._search_by_topic_with_time(
-                        segment, topic, top_k=50, after_timestamp=after_timestamp
+                        ctx, topic, top_k=50,
+                        query_text=query_text, search_query=search_query
                     )
                     if results:
                         # LLM相关性过滤
-                        results = self._llm_relevance_rerank(
+                        results = self._relevance_rerank(
                             new_policy_title=f"{segment.title} - {topic}主题",
                             new_policy_content=query_text,
                             candidates=results,
@@ -129,31 +616,34 @@ class NoveltyAgent(BaseAgent):
             # 生成分主题增量分析报告
             self.log("生成分主题增量分析报告...")
             analysis = self._generate_topic_analysis_report(
-                segment=segment,
-                topics=topics,
+                ctx=ctx,
                 topic_rag_results=topic_rag_results,
                 use_dimension_analysis=False
             )
             
             return {
                 'analysis': analysis,
-                'topic_rag_results': topic_rag_results,
+                # 对外返回普通dict，调用方无需感知Chunk
+                'topic_rag_results': {
+                    topic: [chunk.to_dict() for chunk in chunks]
+                    for topic, chunks in topic_rag_results.items()
+                },
                 'topics': topics
             }
     
-    def _generate_topic_analysis_report(self, segment: PolicySegment, 
-                                         topics: List[str],
+    def _generate_topic_analysis_report(self, ctx: AnalysisContext,
                                          topic_rag_results: Dict[str, List[Dict]],
                                          use_dimension_analysis: bool = True) -> str:
         """
         生成分主题增量分析报告
         
         Args:
-            segment: 当前政策
-            topics: 主题词列表
+            ctx: 分析上下文（当前政策、时间窗口、主题词列表）
             topic_rag_results: 主题RAG结果（旧流程用）
             use_dimension_analysis: 是否使用分维度精细化分析（新流程）
         """
+        segment = ctx.segment
+        topics = ctx.topics
         all_parts = []
         
         # 标题
@@ -167,43 +657,40 @@ class NoveltyAgent(BaseAgent):
         all_parts.append(f"本次分析聚焦以下 **{len(topics)}** 个核心投资主题：{', '.join(topics)}\n\n")
         all_parts.append("---\n\n")
         
-        # 计算2年时间窗口
-        if segment.timestamp:
-            after_timestamp = segment.timestamp - timedelta(days=730)
-        else:
-            after_timestamp = None
-        
-        # 每个主题的对比分析
-        topic_idx = 1
+        # 每个主题的对比分析（各主题互不依赖，线程池并发执行，按原顺序汇总）
         total_docs = 0
         
-        for topic in topics:
-            self.log(f"📊 处理主题 '{topic}'...")
-            
-            if use_dimension_analysis and self.vector_db:
-                # 新流程：分维度精细化RAG
-                topic_analysis, doc_count = self._analyze_topic_by_dimensions(
-                    segment=segment,
+        if use_dimension_analysis and self.vector_db:
+            # 新流程：分维度精细化RAG
+            def run_topic(args):
+                topic_idx, topic = args
+                self.log(f"📊 处理主题 '{topic}'...")
+                return self._analyze_topic_by_dimensions(
+                    ctx=ctx,
                     topic=topic,
-                    topic_idx=topic_idx,
-                    after_timestamp=after_timestamp
+                    topic_idx=topic_idx
                 )
-                total_docs += doc_count
-            else:
-                # 旧流程：直接使用已有的RAG结果
-                topic_docs = topic_rag_results.get(topic, [])
-                if not topic_docs:
-                    continue
+            jobs = list(enumerate(topics, 1))
+        else:
+            # 旧流程：直接使用已有的RAG结果（没有结果的主题跳过，不占序号）
+            def run_topic(args):
+                topic_idx, topic = args
+                self.log(f"📊 处理主题 '{topic}'...")
+                topic_docs = topic_rag_results[topic]
                 topic_analysis = self._generate_topic_comparison(
                     segment=segment,
                     topic=topic,
                     topic_idx=topic_idx,
                     topic_docs=topic_docs
                 )
-                total_docs += len(topic_docs)
-            
-            all_parts.append(topic_analysis)
-            topic_idx += 1
+                return topic_analysis, len(topic_docs)
+            jobs = list(enumerate([t for t in topics if topic_rag_results.get(t)], 1))
+        
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_TOPIC_WORKERS, len(jobs))) as executor:
+                for topic_analysis, doc_count in executor.map(run_topic, jobs):
+                    all_parts.append(topic_analysis)
+                    total_docs += doc_count
         
         # 总结
         topics_str = '、'.join(topics)
@@ -227,8 +714,8 @@ class NoveltyAgent(BaseAgent):
         
         return "".join(all_parts)
 
-    def _analyze_topic_by_dimensions(self, segment: PolicySegment, topic: str,
-                                      topic_idx: int, after_timestamp=None) -> tuple:
+    def _analyze_topic_by_dimensions(self, ctx: AnalysisContext, topic: str,
+                                      topic_idx: int) -> tuple:
         """
         分维度精细化分析单个主题
         
@@ -238,14 +725,14 @@ class NoveltyAgent(BaseAgent):
         3. 汇总3个维度的分析结果
         
         Args:
-            segment: 当前政策
+            ctx: 分析上下文
             topic: 主题词
             topic_idx: 主题序号
-            after_timestamp: 时间窗口下限
             
         Returns:
             (主题分析文本, 检索到的历史政策数量)
         """
+        segment = ctx.segment
         self.log(f"  🔍 拆分主题'{topic}'为细分维度...")
         
         # Step 1: 拆分维度
@@ -255,34 +742,33 @@ class NoveltyAgent(BaseAgent):
             self.log(f"  ⚠️ 主题'{topic}'拆分维度失败，使用旧流程")
             return f"### 3.{topic_idx} {topic}\n\n（维度拆分失败）\n\n", 0
         
-        # Step 2: 每个维度独立RAG + 分析
-        dimension_analyses = []
-        all_history_docs = []
+        # 主题级ANN只检索一次，各维度在共享候选池上分别精排
+        pool = self._topic_candidate_pool(ctx, topic, dimensions)
+        if pool is not None:
+            ctx.candidate_pools[topic] = pool
         
-        for dim in dimensions:
+        # Step 2: 每个维度独立RAG + 分析（维度之间互不依赖，并发执行）
+        def run_dimension(dim):
             dim_name = dim.get('dimension', '')
             self.log(f"  📌 处理维度'{dim_name}'...")
             
             # RAG检索
             history_docs = self._search_by_dimension(
-                segment=segment,
+                ctx=ctx,
                 topic=topic,
                 dimension=dim,
-                top_k=15,
-                after_timestamp=after_timestamp
+                top_k=15
             )
             
             # LLM相关性过滤
             if history_docs:
-                history_docs = self._llm_relevance_rerank(
+                history_docs = self._relevance_rerank(
                     new_policy_title=f"{segment.title} - {topic}/{dim_name}",
                     new_policy_content=dim.get('content', ''),
                     candidates=history_docs,
                     top_k=10
                 )
             
-            all_history_docs.extend(history_docs)
-            
             # 生成该维度的对比分析
             dim_analysis = self._generate_dimension_comparison(
                 segment=segment,
@@ -290,13 +776,21 @@ class NoveltyAgent(BaseAgent):
                 dimension=dim,
                 history_docs=history_docs
             )
-            dimension_analyses.append(dim_analysis)
+            return history_docs, dim_analysis
+        
+        dimension_analyses = []
+        all_history_docs = []
+        
+        with ThreadPoolExecutor(max_workers=min(self.MAX_DIMENSION_WORKERS, len(dimensions))) as executor:
+            for history_docs, dim_analysis in executor.map(run_dimension, dimensions):
+                all_history_docs.extend(history_docs)
+                dimension_analyses.append(dim_analysis)
         
         # Step 3: 汇总各维度分析
         # 去重统计历史政策数量
         unique_docs = {}
         for doc in all_history_docs:
-            key = (doc.get('title', ''), doc.get('timestamp', ''))
+            key = doc.dedup_key
             if key not in unique_docs:
                 unique_docs[key] = doc
         
@@ -310,6 +804,25 @@ class NoveltyAgent(BaseAgent):
         
         return topic_analysis, len(unique_docs)
     
+    def _policy_context_message(self, segment: PolicySegment) -> Dict[str, str]:
+        """
+        新政策全文上下文（system消息）
+        
+        同一政策下的投资内容提取、各主题内容提取、维度拆分都以完全相同的消息开头，
+        服务端可复用前缀缓存，避免每次调用重复处理整篇政策原文。
+        """
+        return {
+            "role": "system",
+            "content": f"=== 新政策 ===\n《{segment.title}》\n\n{segment.content}"
+        }
+    
+    def _topic_context_message(self, segment: PolicySegment, topic: str) -> Dict[str, str]:
+        """主题级共享上下文（system消息），同一主题的各维度对比调用共用"""
+        return {
+            "role": "system",
+            "content": f"你是{topic}行业分析师，负责对比新政策《{segment.title}》与历史政策的边际变化。"
+        }
+    
     def _extract_investment_content(self, segment: PolicySegment) -> str:
         """
         提取政策中具有投资相关性的核心内容
@@ -320,45 +833,14 @@ class NoveltyAgent(BaseAgent):
         Returns:
             投资相关的核心内容
         """
-        prompt = f"""请从以下政策文档中提取**具有投资相关性**的核心内容。
-
-政策标题：{segment.title}
-
-政策原文：
-{segment.content}
-
----
-
-## 任务说明
-
-你需要提取对**投资分析**有价值的内容，包括：
-
-### 必须保留的内容：
-1. **产业政策**：支持/限制哪些行业、产业升级方向
-2. **量化目标**：具体数字、百分比、金额、产能目标
-3. **时间节点**：2025年、2030年等关键时间点的目标
-4. **财政/金融支持**：补贴、税收优惠、专项资金、信贷支持
-5. **重点项目**：基础设施、重大工程、试点示范
-6. **技术方向**：新能源、人工智能、半导体等具体技术
-7. **区域布局**：哪些地区重点发展什么产业
-
-### 必须过滤掉的内容：
-1. 政治宣示语、原则性表述
-2. 空洞表态、重复内容
-3. 与投资无关的行政管理内容
-
-### 输出要求：
-- 直接输出提炼后的核心内容
-- 保留原文的关键数据和措施
-- 可以整理语句，但不改变原意
-- 不要加标题或格式"""
+        prompt = _PROMPT_INVESTMENT_CONTENT
 
         try:
-            messages = [{"role": "user", "content": prompt}]
+            messages = [self._policy_context_message(segment), {"role": "user", "content": prompt}]
             response = self.llm_client.chat_completion(
                 messages=messages,
                 temperature=0.2,
-                max_tokens=32768
+                max_tokens=_TOKEN_BUDGET['investment_content']
             )
             return response.strip()
         except Exception as e:
@@ -375,6 +857,11 @@ class NoveltyAgent(BaseAgent):
         Returns:
             主题词列表（5-10个，按重要性排序）
         """
+        cache_key = self.llm_cache.make_key("investment_topics", PROMPT_VERSION, investment_content)
+        cached = self.llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""请从以下投资相关政策内容中提取**最核心的投资主题**。
 
 政策内容：
@@ -399,24 +886,72 @@ class NoveltyAgent(BaseAgent):
             response = self.llm_client.chat_completion(
                 messages=messages,
                 temperature=0.1,
-                max_tokens=200
+                max_tokens=_TOKEN_BUDGET['investment_topics']
             )
             topics = [t.strip() for t in response.split(',') if t.strip()]
-            return topics[:10]  # 最多返回10个
+            topics = topics[:10]  # 最多返回10个
+            if topics:
+                self.llm_cache.set(cache_key, topics)
+            return topics
         except Exception as e:
             self.log(f"提取投资主题失败: {e}", level="warning")
             return []
 
-    def _search_by_topic_with_time(self, segment: PolicySegment, topic: str, 
-                                    top_k: int = 10, after_timestamp=None) -> tuple:
+    def _plan_topic_queries(self, ctx: AnalysisContext) -> Dict[str, tuple]:
+        """
+        规划各主题的检索query，并把近似重复的query聚到同一个代表query上
+        
+        相关主题（如电子/通信）提取出的主题内容往往高度重合：对所有query做一次批量embedding，
+        余弦相似度超过TOPIC_QUERY_DEDUP_SIM的归入同一簇，簇内统一用代表query检索，
+        相同的检索参数由_search_chunks_cached复用结果，各主题再用自己的query做相关性精排。
+        
+        Returns:
+            {topic: (该主题的query_text, 实际用于ANN检索的代表query)}
+        """
+        topics = ctx.topics
+        workers = min(self.MAX_TOPIC_WORKERS, len(topics)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            query_texts = list(executor.map(
+                lambda t: self._extract_topic_content(ctx.segment, t), topics
+            ))
+        
+        search_queries = list(query_texts)
+        embed_batch = getattr(self.vector_db, "embed_batch", None)
+        if embed_batch is not None and len(query_texts) > 1:
+            try:
+                embeddings = np.asarray(embed_batch(query_texts), dtype=np.float32)
+                rep_indices: List[int] = []
+                for i in range(len(query_texts)):
+                    if rep_indices:
+                        sims = embeddings[rep_indices] @ embeddings[i]
+                        best = int(np.argmax(sims))
+                        if sims[best] > self.TOPIC_QUERY_DEDUP_SIM:
+                            search_queries[i] = query_texts[rep_indices[best]]
+                            self.log(f"  主题 '{topics[i]}' 与 '{topics[rep_indices[best]]}' 检索query近似"
+                                     f"（相似度{sims[best]:.3f}），复用同一次ANN检索")
+                            continue
+                    rep_indices.append(i)
+            except Exception as e:
+                self.log(f"  主题query聚类失败，按主题分别检索: {e}", level="warning")
+                search_queries = list(query_texts)
+        
+        return {
+            topic: (query_text, search_query)
+            for topic, query_text, search_query in zip(topics, query_texts, search_queries)
+        }
+    
+    def _search_by_topic_with_time(self, ctx: AnalysisContext, topic: str,
+                                    top_k: int = 10, query_text: Optional[str] = None,
+                                    search_query: Optional[str] = None) -> tuple:
         """
         按主题检索（带时间约束）
         
         Args:
-            segment: 当前政策
+            ctx: 分析上下文（ctx.after_timestamp为时间窗口下限，只检索此时间之后的政策，用于2年限制）
             topic: 主题词
             top_k: 返回数量
-            after_timestamp: 时间窗口下限（只检索此时间之后的政策，用于2年限制）
+            query_text: 已提取的主题内容（None时用LLM提取）
+            search_query: 实际用于ANN检索的query（None时使用query_text；近似主题共享代表query）
             
         Returns:
             (检索结果列表, 提取的主题内容query_text)
@@ -424,26 +959,30 @@ class NoveltyAgent(BaseAgent):
         if not self.vector_db:
             return [], ""
         
+        segment = ctx.segment
+        
         try:
             # 用LLM生成该主题的检索片段
-            query_text = self._extract_topic_content(segment, topic)
+            if query_text is None:
+                query_text = self._extract_topic_content(segment, topic)
             self.log(f"  主题 '{topic}' 检索片段: {len(query_text)}字")
             
             # 检索（带2年时间窗口）
-            chunk_results = self.vector_db.search_chunks(
-                query_text=query_text,
+            chunk_results = self._search_chunks_cached(
+                query_text=search_query or query_text,
                 top_k=500,  # 粗排500
                 rerank_top_k=100,  # Reranker精排100
                 exclude_doc_id=segment.doc_id,
                 exclude_title=segment.title,
                 exclude_timestamp=segment.timestamp,
                 before_timestamp=segment.timestamp,
-                after_timestamp=after_timestamp,  # 2年时间窗口下限
+                after_timestamp=ctx.after_timestamp,  # 2年时间窗口下限
                 allow_same_day=True,
                 use_reranker=True
             )
             
             self.log(f"  主题 '{topic}' RAG召回: {len(chunk_results)} 个chunks")
+            chunk_results = _prepare_chunks(chunk_results)
             
             # 去重 + 时间加权
             deduplicated = self._deduplicate_chunks(
@@ -462,12 +1001,14 @@ class NoveltyAgent(BaseAgent):
     
     def _extract_topic_content(self, segment: PolicySegment, topic: str) -> str:
         """用LLM提取该主题相关的政策内容"""
-        prompt = f"""请从以下政策中提取与"{topic}"相关的内容。
-
-政策标题：{segment.title}
-
-政策内容：
-{segment.content}
+        cache_key = self.llm_cache.make_key(
+            "topic_content", PROMPT_VERSION, segment.doc_id, segment.content, topic
+        )
+        cached = self.llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = f"""请从上述新政策中提取与"{topic}"相关的内容。
 
 要求：
 1. 直接摘录原文，不要改写
@@ -475,13 +1016,15 @@ class NoveltyAgent(BaseAgent):
 3. 只输出摘录内容"""
 
         try:
-            messages = [{"role": "user", "content": prompt}]
+            messages = [self._policy_context_message(segment), {"role": "user", "content": prompt}]
             response = self.llm_client.chat_completion(
                 messages=messages,
                 temperature=0.2,
-                max_tokens=32768
+                max_tokens=_TOKEN_BUDGET['topic_content']
             )
-            return response.strip()
+            response = response.strip()
+            self.llm_cache.set(cache_key, response)
+            return response
         except Exception as e:
             self.log(f"提取主题内容失败: {e}", level="warning")
             return segment.content
@@ -500,72 +1043,35 @@ class NoveltyAgent(BaseAgent):
                 ...
             ]
         """
-        prompt = f"""你是一名资深的{topic}行业分析师。请基于新政策内容，将"{topic}"主题拆分为3个最具投资价值的细分板块/子领域。
-
-=== 新政策 ===
-《{segment.title}》
-
-{segment.content}
-
-=== 任务 ===
-
-请将"{topic}"主题拆分为3个最重要且具有投资价值的细分板块，每个板块需要：
-1. 板块名称：具体的子行业或细分领域（如"新能源汽车"→"整车制造"、"动力电池"、"充电基础设施"）
-2. 板块描述：说明这个细分板块包含什么
-3. 新政策内容：直接摘录新政策中与该板块相关的原文
-
-=== 输出格式（JSON） ===
-
-```json
-{{
-  "dimensions": [
-    {{
-      "dimension": "细分板块1名称",
-      "description": "这个板块包含什么",
-      "content": "新政策中与该板块相关的原文摘录"
-    }},
-    {{
-      "dimension": "细分板块2名称", 
-      "description": "这个板块包含什么",
-      "content": "新政策中与该板块相关的原文摘录"
-    }},
-    {{
-      "dimension": "细分板块3名称",
-      "description": "这个板块包含什么", 
-      "content": "新政策中与该板块相关的原文摘录"
-    }}
-  ]
-}}
-```
-
-=== 要求 ===
-1. 拆分为具体的子行业/细分板块，不要拆分为分析角度（如"政策力度"、"技术路线"）
-2. 优先选择政策着墨较多、投资价值较高的细分方向
-3. 板块要有区分度，不要重叠
-4. content必须是新政策原文摘录，不要改写
-5. 只输出JSON"""
+        cache_key = self.llm_cache.make_key(
+            "split_dimensions", PROMPT_VERSION, segment.doc_id, segment.content, topic
+        )
+        cached = self.llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = _PROMPT_SPLIT_DIMENSIONS.substitute(topic=topic)
 
         try:
-            messages = [{"role": "user", "content": prompt}]
-            response = self.llm_client.chat_completion(
+            messages = [self._policy_context_message(segment), {"role": "user", "content": prompt}]
+            # 流式接收：边生成边累积，生成结束即可解析
+            buffer = io.StringIO()
+            for piece in self.llm_client.chat_completion_stream(
                 messages=messages,
                 temperature=0.2,
-                max_tokens=32768
-            )
-            
-            # 解析JSON
-            import json
-            import re
-            response = response.strip()
-            if response.startswith('```'):
-                response = re.sub(r'^```\w*\n?', '', response)
-                response = re.sub(r'\n?```$', '', response)
+                max_tokens=_TOKEN_BUDGET['split_dimensions']
+            ):
+                buffer.write(piece)
+            response = buffer.getvalue()
             
-            result = json.loads(response)
+            # 解析JSON（容忍代码块围栏、前后说明文字）
+            result = _loads_llm_json(response)
             dimensions = result.get('dimensions', [])
             
             self.log(f"  主题'{topic}'拆分为{len(dimensions)}个维度: {[d['dimension'] for d in dimensions]}")
             
+            if dimensions:
+                self.llm_cache.set(cache_key, dimensions)
             return dimensions
             
         except Exception as e:
@@ -577,18 +1083,94 @@ class NoveltyAgent(BaseAgent):
                 "content": segment.content
             }]
 
-    def _search_by_dimension(self, segment: PolicySegment, topic: str, 
-                              dimension: Dict[str, str], top_k: int = 20,
-                              after_timestamp=None) -> List[Dict]:
+    def _search_chunks_cached(self, **search_kwargs) -> List[Dict]:
+        """
+        带LRU缓存的vector_db.search_chunks
+        
+        key由全部检索参数（query_text、doc_id、时间窗口、召回/精排数量等）哈希得到；
+        命中时返回浅拷贝，调用方对chunk的修改不会污染缓存。
+        """
+        key = hashlib.sha1(repr(sorted(search_kwargs.items())).encode('utf-8')).hexdigest()
+        
+        with self._ann_cache_lock:
+            cached = self._ann_cache.get(key)
+            if cached is not None:
+                self._ann_cache.move_to_end(key)
+        if cached is not None:
+            self.log(f"    ANN缓存命中: {len(cached)}个chunks")
+            return [dict(c) for c in cached]
+        
+        results = self.vector_db.search_chunks(**search_kwargs)
+        
+        with self._ann_cache_lock:
+            self._ann_cache[key] = [dict(c) for c in results]
+            while len(self._ann_cache) > self.ANN_CACHE_SIZE:
+                self._ann_cache.popitem(last=False)
+        return results
+    
+    def _get_local_reranker(self):
+        """加载本地cross-encoder（只尝试一次，线程安全）；不可用时返回None"""
+        if self._local_reranker_loaded:
+            return self._local_reranker
+        with self._local_reranker_lock:
+            if not self._local_reranker_loaded:
+                try:
+                    from utils.reranker import get_reranker
+                    reranker = get_reranker()
+                    self._local_reranker = reranker if reranker.enabled else None
+                except Exception as e:
+                    self.log(f"  本地Reranker加载失败: {e}", level="warning")
+                    self._local_reranker = None
+                self._local_reranker_loaded = True
+        return self._local_reranker
+    
+    def _topic_candidate_pool(self, ctx: AnalysisContext, topic: str,
+                              dimensions: List[Dict[str, str]]) -> Optional[List[Dict]]:
+        """
+        主题级共享候选池：用覆盖所有维度的query做一次大范围ANN召回（不做精排），
+        各维度随后用本地reranker在池内按自己的query精排，避免每个维度各发一次ANN
+        
+        Returns:
+            候选chunk列表；没有本地reranker（无法在池内按维度精排）或检索失败时返回None
+        """
+        if not self.vector_db or self._get_local_reranker() is None:
+            return None
+        
+        segment = ctx.segment
+        dim_parts = [
+            f"{d.get('dimension', '')}: {d.get('content', '')[:200]}" for d in dimensions
+        ]
+        query_text = f"{topic} " + "；".join(dim_parts)
+        
+        try:
+            pool = self._search_chunks_cached(
+                query_text=query_text,
+                top_k=self.TOPIC_POOL_TOP_K,
+                exclude_doc_id=segment.doc_id,
+                exclude_title=segment.title,
+                exclude_timestamp=segment.timestamp,
+                before_timestamp=segment.timestamp,
+                after_timestamp=ctx.after_timestamp,
+                allow_same_day=True,
+                use_reranker=False
+            )
+        except Exception as e:
+            self.log(f"  主题'{topic}'候选池检索失败: {e}", level="warning")
+            return None
+        
+        self.log(f"  主题'{topic}'共享候选池: {len(pool)}个chunks（{len(dimensions)}个维度共用）")
+        return _prepare_chunks(pool)
+    
+    def _search_by_dimension(self, ctx: AnalysisContext, topic: str,
+                              dimension: Dict[str, str], top_k: int = 20) -> List[Dict]:
         """
         按维度检索历史政策
         
         Args:
-            segment: 当前政策
+            ctx: 分析上下文（当前政策、时间窗口下限）
             topic: 主题词
             dimension: 维度信息 {"dimension": "维度名", "description": "描述", "content": "新政策内容"}
             top_k: 返回数量
-            after_timestamp: 时间窗口下限
             
         Returns:
             检索结果列表
@@ -596,6 +1178,8 @@ class NoveltyAgent(BaseAgent):
         if not self.vector_db:
             return []
         
+        segment = ctx.segment
+        
         try:
             dim_name = dimension.get('dimension', '')
             dim_content = dimension.get('content', '')
@@ -604,21 +1188,29 @@ class NoveltyAgent(BaseAgent):
             query_text = f"{topic} {dim_name}: {dim_content}"
             self.log(f"    维度'{dim_name}'检索: {len(query_text)}字")
             
-            # 检索
-            chunk_results = self.vector_db.search_chunks(
-                query_text=query_text,
-                top_k=300,  # 粗排300
-                rerank_top_k=50,  # Reranker精排50
-                exclude_doc_id=segment.doc_id,
-                exclude_title=segment.title,
-                exclude_timestamp=segment.timestamp,
-                before_timestamp=segment.timestamp,
-                after_timestamp=after_timestamp,
-                allow_same_day=True,
-                use_reranker=True
-            )
+            pool = ctx.candidate_pools.get(topic)
+            if pool is not None:
+                # 在主题共享候选池上按维度query精排50（复制后打分，避免各维度互相覆盖分数）
+                chunk_results = self._get_local_reranker().rerank(
+                    query_text, [c.copy() for c in pool], top_k=50
+                )
+            else:
+                # 检索
+                chunk_results = self._search_chunks_cached(
+                    query_text=query_text,
+                    top_k=300,  # 粗排300
+                    rerank_top_k=50,  # Reranker精排50
+                    exclude_doc_id=segment.doc_id,
+                    exclude_title=segment.title,
+                    exclude_timestamp=segment.timestamp,
+                    before_timestamp=segment.timestamp,
+                    after_timestamp=ctx.after_timestamp,
+                    allow_same_day=True,
+                    use_reranker=True
+                )
             
             self.log(f"    维度'{dim_name}'RAG召回: {len(chunk_results)}个chunks")
+            chunk_results = _prepare_chunks(chunk_results)
             
             # 去重 + 时间加权
             deduplicated = self._deduplicate_chunks(
@@ -664,74 +1256,32 @@ class NoveltyAgent(BaseAgent):
 """
         
         # 构建历史政策列表
-        history_for_llm = ""
+        history_parts = []
         for i, doc in enumerate(history_docs, 1):
             title = doc.get('title', '未知标题')
             timestamp = doc.get('timestamp', 'N/A')
             content = doc.get('content', '')
-            history_for_llm += f"""
-【历史政策{i}】《{title}》（{timestamp}）
-{content}
-"""
+            history_parts.append(f"\n【历史政策{i}】《{title}》（{timestamp}）\n{content}\n")
+        history_for_llm = "".join(history_parts)
         
-        prompt = f"""你是{topic}行业分析师，请针对"{dim_name}"这个维度，对比新政策与历史政策的边际变化。
-
-=== 维度说明 ===
-维度名称：{dim_name}
-维度描述：{dim_desc}
-
-=== 新政策该维度内容 ===
-《{segment.title}》
-
-{dim_content}
-
-=== 历史政策（{len(history_docs)}篇） ===
-{history_for_llm}
-
-=== 输出要求 ===
-
-请用表格对比新政策与历史政策在"{dim_name}"维度的边际变化：
-
-**新政策表述**：
-完整引用新政策原文
-
-**与历史政策对比**：
-
-| 历史政策表述 | 边际变化 |
-|-------------|---------|
-| 《政策名》（YYYY年MM月）完整引用历史政策原文 | 具体说明变化内容（如：新增XX表述/从XX升级为XX/删除XX要求） |
-
-要求：
-- 只选取与该维度高度相关的历史政策进行对比，相关性弱的不要放入表格
-- 每行对比一个不同的历史政策要点，不要重复
-- 历史政策表述要带上政策名称和时间，格式：《政策名》（YYYY年MM月）原文内容
-- 边际变化要具体说明与新政策相比的变化内容，不要只写"强化"、"延续"等笼统词汇
-- 列出3-5个不同的对比要点
-
-然后用1-2句话总结该维度的核心变化。
-
-=== 要求 ===
-1. 新政策表述单独列在表格前面，不要放在表格里
-2. 表格只有两列：历史政策表述、边际变化
-3. 只展示与该维度高度相关的对比，相关性弱的历史政策不要放入表格
-4. 历史政策表述必须带上《政策名》（YYYY年MM月），完整引用原文
-5. 边际变化要具体描述变化内容，不要只写"强化/延续"
-6. 不要用省略号(...)省略内容，完整输出所有分析
-7. 只输出新政策表述、表格和总结，不要其他内容"""
+        prompt = _PROMPT_DIMENSION_COMPARISON.substitute(
+            dim_name=dim_name,
+            dim_desc=dim_desc,
+            policy_title=segment.title,
+            dim_content=dim_content,
+            num_history=len(history_docs),
+            history_for_llm=history_for_llm
+        )
 
         try:
-            messages = [{"role": "user", "content": prompt}]
+            messages = [self._topic_context_message(segment, topic), {"role": "user", "content": prompt}]
             response = self.llm_client.chat_completion(
                 messages=messages,
                 temperature=0.2,
-                max_tokens=32768
+                max_tokens=_TOKEN_BUDGET['dimension_comparison']
             )
             
-            return f"""**{dim_name}**（{dim_desc}）
-
-{response.strip()}
-
-"""
+            return "".join(("**", dim_name, "**（", dim_desc, "）\n\n", response.strip(), "\n\n"))
         except Exception as e:
             self.log(f"    维度'{dim_name}'分析生成失败: {e}", level="warning")
             return f"""**{dim_name}**
@@ -742,64 +1292,118 @@ class NoveltyAgent(BaseAgent):
 
 """
     
-    def _deduplicate_chunks(self, chunk_results: List[Dict], 
+    def _deduplicate_chunks(self, chunk_results: List[Chunk], 
                             policy_timestamp: datetime,
-                            top_k: int) -> List[Dict[str, Any]]:
+                            top_k: int) -> List[Chunk]:
         """
         去重 + 时间加权
         按 (title, timestamp) 去重，保留rerank_score最高的chunk
         """
-        # 按 (title, timestamp) 去重，保留最高分的
+        # 按 (title, timestamp) 去重（使用预计算的dedup_key字符串），保留最高分的
         seen = {}
         for chunk in chunk_results:
-            title = chunk.get('title', '')
-            timestamp = chunk.get('timestamp', '')
-            key = (title, timestamp)
-            
-            rerank_score = chunk.get('rerank_score', 0.0)
-            
-            if key not in seen or rerank_score > seen[key].get('rerank_score', 0):
+            key = chunk.dedup_key
+            if key not in seen or chunk.rerank_score > seen[key].rerank_score:
                 seen[key] = chunk
         
-        # 转为列表，计算时间加权
-        results = []
-        for chunk in seen.values():
-            # 计算时间加权
-            time_bonus = 0.0
-            timestamp = chunk.get('timestamp', '')
-            if timestamp and policy_timestamp:
-                try:
-                    if isinstance(timestamp, str):
-                        if 'T' in timestamp:
-                            doc_dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                        else:
-                            doc_dt = datetime.fromisoformat(timestamp)
-                    elif isinstance(timestamp, datetime):
-                        doc_dt = timestamp
-                    else:
-                        doc_dt = None
-                    
-                    if doc_dt:
-                        days_diff = (policy_timestamp.date() - doc_dt.date()).days
-                        if days_diff <= 365:
-                            time_bonus = 0.1 * (1 - days_diff / 365)
-                        elif days_diff <= 1095:
-                            time_bonus = 0.03 * (1 - (days_diff - 365) / 730)
-                except:
-                    pass
-            
-            chunk['time_bonus'] = time_bonus
-            chunk['final_score'] = chunk.get('rerank_score', 0.0) + time_bonus
-            
-            results.append(chunk)
+        results = list(seen.values())
+        if not results:
+            return []
         
-        # 按final_score排序
-        results.sort(key=lambda x: x.get('final_score', 0.0), reverse=True)
+        # 时间加权（向量化）：1年内最多+0.1，1-3年内最多+0.03，线性衰减
+        rerank_scores = np.fromiter(
+            (chunk.rerank_score for chunk in results),
+            dtype=np.float64, count=len(results)
+        )
+        time_bonus = np.zeros(len(results))
+        if policy_timestamp:
+            doc_ordinals = np.fromiter(
+                (chunk.parsed_ts.date().toordinal() if chunk.parsed_ts else np.nan
+                 for chunk in results),
+                dtype=np.float64, count=len(results)
+            )
+            days_diff = policy_timestamp.date().toordinal() - doc_ordinals
+            valid = ~np.isnan(days_diff)
+            time_bonus = np.where(
+                valid & (days_diff <= 365),
+                0.1 * (1 - days_diff / 365),
+                np.where(valid & (days_diff <= 1095), 0.03 * (1 - (days_diff - 365) / 730), 0.0)
+            )
+        final_scores = rerank_scores + time_bonus
+        
+        for chunk, bonus, final_score in zip(results, time_bonus.tolist(), final_scores.tolist()):
+            chunk.time_bonus = bonus
+            chunk.final_score = final_score
         
-        return results[:top_k]
+        # 按final_score排序（稳定排序，与原先list.sort(reverse=True)的并列顺序一致）
+        order = np.argsort(-final_scores, kind='stable')[:top_k]
+        return [results[i] for i in order]
 
+    def _relevance_rerank(self, new_policy_title: str, new_policy_content: str,
+                          candidates: List[Dict], top_k: int = 10,
+                          coarse_k: int = 20) -> List[Dict]:
+        """
+        相关性精排：默认使用本地cross-encoder一次批量打分，
+        本地reranker不可用或 RELEVANCE_RERANK_BACKEND="llm" 时回退到LLM多维度评分
+        """
+        if not candidates:
+            return []
+        
+        if self.RELEVANCE_RERANK_BACKEND == "local":
+            results = self._local_relevance_rerank(
+                query=new_policy_content or new_policy_title,
+                candidates=candidates,
+                top_k=top_k
+            )
+            if results is not None:
+                return results
+        
+        return self._llm_relevance_rerank(
+            new_policy_title=new_policy_title,
+            new_policy_content=new_policy_content,
+            candidates=candidates,
+            top_k=top_k,
+            coarse_k=coarse_k
+        )
+    
+    def _local_relevance_rerank(self, query: str, candidates: List[Dict],
+                                top_k: int = 10, apply_threshold: bool = True) -> List[Dict]:
+        """
+        使用本地cross-encoder对(query, chunk)批量打分并按阈值过滤
+        
+        Args:
+            query: 新政策该主题/维度的内容
+            candidates: 候选chunk列表
+            top_k: 返回数量
+            apply_threshold: 是否按LOCAL_RERANK_MIN_SCORE过滤（作为LLM粗筛时只取top_k）
+            
+        Returns:
+            过滤排序后的chunk列表；本地reranker不可用或打分失败时返回None（由调用方回退到LLM）
+        """
+        reranker = self._get_local_reranker()
+        if reranker is None:
+            return None
+        
+        # 复制一份再打分：reranker会原地写入rerank_score并排序
+        # 打分失败时reranker默认把所有分数记为0，这里要求抛出异常，避免按无效分数过滤
+        try:
+            scored = reranker.rerank(query, [c.copy() for c in candidates], top_k=len(candidates),
+                                     raise_errors=True)
+        except Exception as e:
+            self.log(f"  本地Reranker打分失败: {e}，回退到LLM评分", level="warning")
+            return None
+        if not apply_threshold:
+            return scored[:top_k]
+        
+        kept = [c for c in scored if c.get('rerank_score', 0.0) >= self.LOCAL_RERANK_MIN_SCORE]
+        
+        self.log(f"  本地Reranker相关性评分: {len(candidates)}个chunk → {len(kept)}个相关(≥{self.LOCAL_RERANK_MIN_SCORE})")
+        
+        return kept[:top_k]
+    
     def _llm_relevance_rerank(self, new_policy_title: str, new_policy_content: str, 
-                               candidates: List[Dict], top_k: int = 10) -> List[Dict]:
+                               candidates: List[Dict], top_k: int = 10,
+                               coarse_k: int = 20) -> List[Dict]:
         """
         使用LLM对RAG检索到的chunk进行多维度相关性评分
         
@@ -813,6 +1417,7 @@ class NoveltyAgent(BaseAgent):
             new_policy_content: 新政策中该主题的具体内容（LLM提取的）
             candidates: RAG检索到的chunk列表
             top_k: 返回数量
+            coarse_k: 先用本地reranker粗筛出的候选数，LLM只对这部分评分（None/0表示不粗筛）
             
         Returns:
             按总分排序后的chunk列表（带评分）
@@ -820,126 +1425,182 @@ class NoveltyAgent(BaseAgent):
         if not candidates:
             return []
         
-        # 构建所有chunk的内容列表
-        chunk_list_text = ""
-        for i, chunk in enumerate(candidates, 1):
-            chunk_title = chunk.get('title', '')
-            chunk_content = chunk.get('content', '')
-            if chunk_content:
-                chunk_list_text += f"""
----
-【{i}】《{chunk_title}》
-{chunk_content}
-"""
-        
-        # 多维度评分prompt
-        prompt = f"""对以下历史政策片段与新政策的相关性进行**多维度评分**。
-
-【新政策】{new_policy_title}
-
-【新政策该主题的具体内容】
-{new_policy_content}
-
-【历史政策片段列表】
-{chunk_list_text}
-
----
-
-## 评分维度（每项1-5分）
-
-1. **主题相关度**：历史政策是否讨论与新政策相同的细分领域？
-   - 1分：完全无关（如新政策讲国防军工，历史政策讲土地管理）
-   - 3分：大方向相关但细分领域不同
-   - 5分：高度相关，讨论同一细分领域的同类内容
-
-2. **政策延续性**：是否是同一政策链条上的文件？
-   - 1分：无关联（如立法计划、茶话会讲话等）
-   - 3分：相关但非直接延续
-   - 5分：明确的修订/实施细则/配套政策
-
-3. **对比价值**：对比能否得出有意义的增量分析？
-   - 1分：无对比价值（内容太泛或不相关）
-   - 3分：有一定参考价值
-   - 5分：高对比价值，能看出明确的政策变化
-
-## 输出要求
-
-只输出JSON，格式如下：
-{{
-  "scores": [
-    {{"id": 1, "topic": 4, "continuity": 3, "value": 5, "total": 12}},
-    {{"id": 2, "topic": 2, "continuity": 1, "value": 2, "total": 5}},
-    ...
-  ]
-}}
-
-注意：
-- 评分所有片段，total >= 9分的都值得对比
-- 明显无关的（如立法计划、土地管理条例、茶话会讲话等）给低分
-- id对应片段编号
-- 尽量多保留相关政策用于一对多对比"""
-
-        try:
-            messages = [{"role": "user", "content": prompt}]
-            response = self.llm_client.chat_completion(
-                messages=messages,
-                temperature=0.1,
-                max_tokens=32768
+        # 两阶段：本地reranker粗筛 → LLM只评分幸存的coarse_k个候选
+        if coarse_k and len(candidates) > coarse_k:
+            shortlist = self._local_relevance_rerank(
+                query=new_policy_content or new_policy_title,
+                candidates=candidates,
+                top_k=coarse_k,
+                apply_threshold=False
             )
-            
-            # 解析JSON
-            import json
-            import re
-            response = response.strip()
-            if response.startswith('```'):
-                response = re.sub(r'^```\w*\n?', '', response)
-                response = re.sub(r'\n?```$', '', response)
-            
-            result = json.loads(response)
-            scores_list = result.get('scores', [])
-            
-            # 构建id -> 评分的映射
-            score_map = {}
-            for score_item in scores_list:
-                idx = score_item.get('id')
-                if idx:
-                    score_map[idx] = {
-                        'topic': score_item.get('topic', 0),
-                        'continuity': score_item.get('continuity', 0),
-                        'value': score_item.get('value', 0),
-                        'total': score_item.get('total', 0)
-                    }
+            if shortlist is not None:
+                self.log(f"  本地Reranker粗筛: {len(candidates)}个chunk → {len(shortlist)}个送LLM评分")
+                candidates = shortlist
+        
+        # 按窗口分批评分：每个窗口一次LLM调用，高分结果已足够时提前停止，不再评分剩余窗口
+        candidates = candidates[:self.LLM_RERANK_MAX_CANDIDATES]
+        window_size = self.LLM_RERANK_WINDOW
+        min_score = 9  # 最低总分阈值（降低到9分，保留更多相关政策用于一对多对比）
+        scored_candidates = []
+        scored_count = 0
+        
+        for start in range(0, len(candidates), window_size):
+            window = candidates[start:start + window_size]
+            try:
+                score_map = self._llm_score_window(new_policy_title, new_policy_content, window)
+            except Exception as e:
+                self.log(f"  LLM多维度评分失败: {e}", level="warning")
+                if not scored_candidates:
+                    # 降级：返回原始candidates的前top_k个
+                    return candidates[:top_k]
+                break
+            scored_count += len(window)
             
             # 给每个candidate添加评分，并过滤低分的
-            scored_candidates = []
-            min_score = 9  # 最低总分阈值（降低到9分，保留更多相关政策用于一对多对比）
-            
-            for i, chunk in enumerate(candidates, 1):
+            window_kept = []
+            for i, chunk in enumerate(window, 1):
                 if i in score_map:
                     scores = score_map[i]
                     if scores['total'] >= min_score:
-                        chunk['llm_scores'] = scores
-                        chunk['llm_total_score'] = scores['total']
-                        scored_candidates.append(chunk)
+                        chunk.llm_scores = scores
+                        chunk.llm_total_score = scores['total']
+                        window_kept.append(chunk)
+            scored_candidates.extend(window_kept)
             
-            # 按总分排序
-            scored_candidates.sort(key=lambda x: x.get('llm_total_score', 0), reverse=True)
-            
-            self.log(f"  LLM多维度评分: {len(candidates)}个chunk → {len(scored_candidates)}个相关(≥{min_score}分)")
+            # 已保留足够多的候选，且本窗口保留的最低分也很高（后续窗口的候选排名更靠后，难以更优）
+            if (len(scored_candidates) >= 2 * top_k and window_kept
+                    and min(c.llm_total_score for c in window_kept) > self.LLM_RERANK_EARLY_EXIT_SCORE):
+                if start + window_size < len(candidates):
+                    self.log(f"  LLM评分提前结束: 已评分{scored_count}/{len(candidates)}个chunk")
+                break
+        
+        # 按总分排序
+        scored_candidates.sort(key=lambda x: x.llm_total_score, reverse=True)
+        
+        self.log(f"  LLM多维度评分: {scored_count}个chunk → {len(scored_candidates)}个相关(≥{min_score}分)")
+        
+        # 打印top3的评分详情
+        for i, chunk in enumerate(scored_candidates[:3]):
+            scores = chunk.get('llm_scores', {})
+            title = chunk.get('title', '')[:30]
+            self.log(f"    [{i+1}] {title}... | 主题:{scores.get('topic',0)} 延续:{scores.get('continuity',0)} 价值:{scores.get('value',0)} 总分:{scores.get('total',0)}")
+        
+        return scored_candidates[:top_k]
+    
+    def _llm_score_window(self, new_policy_title: str, new_policy_content: str,
+                          window: List[Chunk]) -> Dict[int, Dict[str, int]]:
+        """
+        对一个窗口内的chunk做一次LLM多维度评分
+        
+        Returns:
+            {窗口内编号(从1开始): {'topic', 'continuity', 'value', 'total'}}；调用或解析失败时抛出异常
+        """
+        # 评分只需判断相关性：每个chunk压缩为与query最相近的几句（完整content保留给后续对比分析）
+        scoring_texts = self._summarize_chunks_for_scoring(
+            window, new_policy_content or new_policy_title
+        )
+        
+        # 构建所有chunk的内容列表
+        chunk_parts = []
+        for i, (chunk, chunk_content) in enumerate(zip(window, scoring_texts), 1):
+            chunk_title = chunk.get('title', '')
+            if chunk_content:
+                chunk_parts.append(f"\n---\n【{i}】《{chunk_title}》\n{chunk_content}\n")
+        chunk_list_text = "".join(chunk_parts)
+        
+        # 多维度评分prompt
+        prompt = _PROMPT_RELEVANCE_SCORING.substitute(
+            new_policy_title=new_policy_title,
+            new_policy_content=new_policy_content,
+            chunk_list_text=chunk_list_text
+        )
+
+        messages = [{"role": "user", "content": prompt}]
+        response = self.llm_client.chat_completion(
+            messages=messages,
+            temperature=0.1,
+            max_tokens=min(max(len(window) * _TOKEN_BUDGET['relevance_per_chunk'], 512), _TOKEN_BUDGET['relevance_max'])
+        )
+        
+        # 解析JSON（容忍代码块围栏、前后说明文字）
+        result = _loads_llm_json(response)
+        scores_list = result.get('scores', [])
+        
+        # 构建id -> 评分的映射
+        score_map = {}
+        for score_item in scores_list:
+            idx = score_item.get('id')
+            if idx:
+                score_map[idx] = {
+                    'topic': score_item.get('topic', 0),
+                    'continuity': score_item.get('continuity', 0),
+                    'value': score_item.get('value', 0),
+                    'total': score_item.get('total', 0)
+                }
+        return score_map
+
+    def _summarize_chunks_for_scoring(self, candidates: List[Dict], query: str) -> List[str]:
+        """
+        为LLM评分准备各chunk的精简文本
+        
+        未缓存chunk的句子合并为一次embed_batch调用；向量不可用时原样返回完整content。
+        """
+        contents = [chunk.get('content', '') for chunk in candidates]
+        embed_batch = getattr(self.vector_db, "embed_batch", None)
+        if embed_batch is None or not query:
+            return contents
+        
+        try:
+            pending = {}
+            with self._sentence_emb_lock:
+                for chunk in candidates:
+                    chunk_id = self._chunk_cache_id(chunk)
+                    if chunk_id in self._sentence_emb_cache:
+                        self._sentence_emb_cache.move_to_end(chunk_id)
+                    elif chunk_id not in pending:
+                        pending[chunk_id] = [
+                            sent for sent in _SENTENCE_SPLIT.split(chunk.get('content', '')) if sent.strip()
+                        ]
             
-            # 打印top3的评分详情
-            for i, chunk in enumerate(scored_candidates[:3]):
-                scores = chunk.get('llm_scores', {})
-                title = chunk.get('title', '')[:30]
-                self.log(f"    [{i+1}] {title}... | 主题:{scores.get('topic',0)} 延续:{scores.get('continuity',0)} 价值:{scores.get('value',0)} 总分:{scores.get('total',0)}")
+            # 一次批量编码：query + 所有未缓存chunk的句子
+            flat_sentences = [sent for sentences in pending.values() for sent in sentences]
+            embeddings = np.asarray(embed_batch([query] + flat_sentences), dtype=np.float32)
+            query_emb = embeddings[0]
             
-            return scored_candidates[:top_k]
+            offset = 1
+            with self._sentence_emb_lock:
+                for chunk_id, sentences in pending.items():
+                    self._sentence_emb_cache[chunk_id] = (sentences, embeddings[offset:offset + len(sentences)])
+                    offset += len(sentences)
+                cached = [self._sentence_emb_cache.get(self._chunk_cache_id(chunk)) for chunk in candidates]
+                while len(self._sentence_emb_cache) > self.SENTENCE_EMB_CACHE_SIZE:
+                    self._sentence_emb_cache.popitem(last=False)
             
+            return [
+                self._summarize_chunk_for_scoring(entry, query_emb) if entry is not None else content
+                for entry, content in zip(cached, contents)
+            ]
         except Exception as e:
-            self.log(f"  LLM多维度评分失败: {e}", level="warning")
-            # 降级：返回原始candidates的前top_k个
-            return candidates[:top_k]
-
+            self.log(f"  chunk摘要失败，使用完整内容评分: {e}", level="warning")
+            return contents
+    
+    @staticmethod
+    def _chunk_cache_id(chunk: Dict) -> str:
+        """句子向量缓存的key：优先用chunk_id，缺失时退化为内容哈希"""
+        chunk_id = chunk.get('chunk_id')
+        if chunk_id:
+            return str(chunk_id)
+        return hashlib.sha1(chunk.get('content', '').encode('utf-8')).hexdigest()
+    
+    def _summarize_chunk_for_scoring(self, entry: tuple, query_emb: np.ndarray) -> str:
+        """按与query的余弦相似度选出top-N句，按原文顺序拼接"""
+        sentences, sentence_embs = entry
+        if len(sentences) <= self.SCORING_TOP_SENTENCES:
+            return "".join(sentences)
+        sims = sentence_embs @ query_emb
+        top = np.sort(np.argsort(-sims)[:self.SCORING_TOP_SENTENCES])
+        return "".join(sentences[i] for i in top)
+    
     def _generate_topic_comparison(self, segment: PolicySegment, 
                                     topic: str,
                                     topic_idx: int,
@@ -1001,132 +1662,111 @@ class NoveltyAgent(BaseAgent):
             response = self.llm_client.chat_completion(
                 messages=messages,
                 temperature=0.2,
-                max_tokens=32768
+                max_tokens=_TOKEN_BUDGET['topic_summary']
             )
             
-            final_output = f"""### 3.{topic_idx} {topic}
-
-本主题拆分为多个维度进行精细化分析，共检索到 **{len(topic_docs)}** 篇相关历史政策。
-
----
-
-{response.strip()}
-
----
-
-#### 分维度政策对比
-
-{dimensions_content}
-
-"""
-            return final_output
+            # 片段列表一次性join，避免拼接长文本时生成中间字符串
+            return "".join((
+                f"### 3.{topic_idx} {topic}\n\n",
+                f"本主题拆分为多个维度进行精细化分析，共检索到 **{len(topic_docs)}** 篇相关历史政策。\n\n",
+                "---\n\n",
+                response.strip(),
+                "\n\n---\n\n",
+                "#### 分维度政策对比\n\n",
+                dimensions_content,
+                "\n\n",
+            ))
         except Exception as e:
             self.log(f"  主题'{topic}'汇总生成失败: {e}", level="warning")
             # 降级：直接输出各维度分析
-            return f"""### 3.{topic_idx} {topic}
-
-本主题共检索到 **{len(topic_docs)}** 篇相关历史政策。
-
----
-
-#### 分维度政策对比
-
-{dimensions_content}
-
-"""
-
+            return "".join((
+                f"### 3.{topic_idx} {topic}\n\n",
+                f"本主题共检索到 **{len(topic_docs)}** 篇相关历史政策。\n\n",
+                "---\n\n",
+                "#### 分维度政策对比\n\n",
+                dimensions_content,
+                "\n\n",
+            ))
+
+    def _fit_history_to_budget(self, docs: List[Dict], budget_tokens: int) -> List[tuple]:
+        """
+        按相关性顺序把历史政策装入token预算
+        
+        预算内的完整保留；超出后剩余文档平分剩余额度并截断，额度不足_MIN_DOC_TOKENS的丢弃。
+        
+        Returns:
+            [(doc, 送入prompt的content), ...]
+        """
+        fitted = []
+        used = 0
+        truncated = 0
+        for idx, doc in enumerate(docs):
+            content = doc.get('content', '')
+            tokens = _count_tokens(content)
+            share = (budget_tokens - used) // (len(docs) - idx) if used + tokens > budget_tokens else tokens
+            if share >= tokens:
+                fitted.append((doc, content))
+                used += tokens
+            elif share >= _MIN_DOC_TOKENS:
+                fitted.append((doc, content[:int(len(content) * share / tokens)]))
+                used += share
+                truncated += 1
+            else:
+                break
+        
+        dropped = len(docs) - len(fitted)
+        if truncated or dropped:
+            self.log(f"  历史政策超出上下文预算({budget_tokens} tokens): 截断{truncated}篇，丢弃{dropped}篇")
+        return fitted
+    
     def _generate_topic_comparison_legacy(self, segment: PolicySegment, 
                                            topic: str, topic_idx: int,
                                            topic_docs: List[Dict]) -> str:
         """
         旧流程：直接一对多对比（兼容保留）
         """
+        # 按token预算裁剪历史政策：系统/新政策 + 历史 + 任务说明 + 输出预留 不超过上下文窗口
+        history_budget = int((
+            _CONTEXT_TOKEN_LIMIT
+            - _TOKEN_BUDGET['topic_comparison_legacy']
+            - _count_tokens(segment.content)
+            - _PROMPT_OVERHEAD_TOKENS
+        ) * _HISTORY_BUDGET_RATIO)
+        fitted_docs = self._fit_history_to_budget(topic_docs, history_budget)
+        
         # 构建给LLM的历史政策列表
-        history_for_llm = ""
-        for i, doc in enumerate(topic_docs, 1):
+        history_parts = []
+        for i, (doc, content) in enumerate(fitted_docs, 1):
             title = doc.get('title', '未知标题')
             timestamp = doc.get('timestamp', 'N/A')
-            content = doc.get('content', '')
-            history_for_llm += f"""
-【历史政策{i}】《{title}》（{timestamp}）
-{content}
-"""
+            history_parts.append(f"\n【历史政策{i}】《{title}》（{timestamp}）\n{content}\n")
+        history_for_llm = "".join(history_parts)
         
-        num_history = len(topic_docs)
+        num_history = len(fitted_docs)
         
-        prompt = f"""你是一名顶级券商的{topic}行业首席分析师，请基于新政策和{num_history}篇历史政策，撰写一份深度政策点评。
-
-=== 新政策 ===
-《{segment.title}》（{segment.timestamp.strftime('%Y年%m月%d日') if segment.timestamp else 'N/A'}）
-
-{segment.content}
-
-=== 历史政策（{num_history}篇） ===
-{history_for_llm}
-
-=== 分析任务 ===
-
-请对比新政策与上述{num_history}篇历史政策，撰写"{topic}"主题的深度分析。
-
-重点回答：
-1. 新政策释放了什么信号？政策方向是加码还是收缩？
-2. 相比历史政策，有哪些边际变化（新增/强化/弱化）？
-
-=== 输出格式 ===
-
-#### 核心观点
-
-**投资评级**：看多/看平/看空
-**核心逻辑**：说清楚政策信号和最大边际变化
-
-#### 政策对比与边际变化
-
-**新政策核心表述**：
-直接引用新政策中关于{topic}的重要表述
-
-**与历史政策对比**：
-
-| 历史政策表述 | 边际变化 |
-|-------------|---------|
-| 《政策名》（YYYY年MM月）完整引用历史政策原文 | 具体说明变化内容 |
-
-要求：
-- 新政策表述单独列在表格前面，不要放在表格里
-- 表格只有两列：历史政策表述、边际变化
-- 只选取与该主题高度相关的历史政策进行对比，相关性弱的不要放入表格
-- 历史政策表述要带上政策名称和时间，格式：《政策名》（YYYY年MM月）原文内容
-- 边际变化要具体说明与新政策相比的变化内容，不要只写"强化"、"延续"
-- 列出3-5个不同的对比要点，不要重复
-
-
-=== 要求 ===
-
-1. 新政策表述单独列在表格前面，表格只有两列（历史政策表述、边际变化）
-2. 只展示与该主题高度相关的对比，相关性弱的历史政策不要放入表格
-3. 历史政策表述必须带上《政策名》（YYYY年MM月），完整引用原文
-4. 引用原文时直接写出来，不要用特殊引号格式
-5. 边际变化要具体描述变化内容，不要只写"强化/延续"等笼统词汇
-6. 不要用省略号(...)省略内容，完整输出所有分析
-7. 总字数1500-2500字"""
+        prompt = _PROMPT_TOPIC_COMPARISON_LEGACY.substitute(
+            topic=topic,
+            num_history=num_history,
+            policy_title=segment.title,
+            policy_date=_format_policy_date(segment.timestamp),
+            policy_content=segment.content,
+            history_for_llm=history_for_llm,
+        )
 
         try:
             messages = [{"role": "user", "content": prompt}]
             response = self.llm_client.chat_completion(
                 messages=messages,
                 temperature=0.2,
-                max_tokens=32768
+                max_tokens=_TOKEN_BUDGET['topic_comparison_legacy']
             )
             
-            final_output = f"""### 3.{topic_idx} {topic}
-
-本主题共检索到 **{len(topic_docs)}** 篇相关历史政策。
-
----
-
-{response.strip()}
-
-"""
-            return final_output
+            return _TOPIC_COMPARISON_LEGACY_OUTPUT.substitute(
+                topic_idx=topic_idx,
+                topic=topic,
+                num_docs=len(topic_docs),
+                analysis=response.strip(),
+            )
         except Exception as e:
             self.log(f"  主题'{topic}'深度分析生成失败: {e}", level="warning")
             return f"### 3.{topic_idx} 主题：{topic}\n\n（生成失败）\n\n"
@@ -8,6 +8,8 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data_processing"
 OUTPUT_DIR = PROJECT_ROOT / "output"
+LLM_CACHE_DIR = PROJECT_ROOT / ".cache" / "llm"  # LLM响应缓存（utils/llm_cache.py）
+EMBEDDING_CACHE_DIR = PROJECT_ROOT / ".cache" / "embedding"  # 向量缓存（utils/embedding_cache.py）
 
 # API配置 - 使用火山引擎
 # 火山引擎API配置（使用官方SDK）
@@ -34,6 +36,36 @@ RAG_CONFIG = {
     "industry_match_boost": 1.5,  # 同行业政策的相似度加权
 }
 
+# 报告生成线程池大小（generate_insights.py中各政策及其内部并行任务共用一个池）
+# 只决定同时处理的政策/章节数；各Agent内部还有自己的主题/维度线程，LLM调用总并发由下面的LLM_MAX_CONCURRENCY限制
+REPORT_MAX_WORKERS = 8
+
+# 进程内同时在途的火山引擎LLM请求上限（所有线程、所有Agent共用，超出的调用排队等待）
+# 建议取 接口QPS × 平均调用耗时(秒)，与接口配额匹配
+LLM_MAX_CONCURRENCY = 8
+
+# 行业分类时并发的DS32B请求数（IndustryAgent批量处理未命中缓存的文档）
+DS32B_MAX_WORKERS = 8
+
+# Chunk向量索引类型（仅新建集合时生效）：
+# - "GPU_CAGRA": GPU图索引，需GPU版Milvus；GPU显存不足或服务端不支持时自动回退到HNSW_SQ
+# - "HNSW_SQ": CPU HNSW + SQ8量化 + FP16精排
+CHUNK_INDEX_TYPE = "GPU_CAGRA"
+# 选用GPU_CAGRA所需的最少空闲显存（MB），与embedding模型共用GPU时避免显存争用
+CHUNK_GPU_INDEX_MIN_FREE_MB = 4096
+
+# Milvus批量导入（bulk_insert）：单次入库chunk数达到min_rows时，先写Parquet到Milvus使用的MinIO，
+# 再由服务端直接导入；未达到阈值或导入失败时回退到逐批insert
+MILVUS_BULK_INSERT_CONFIG = {
+    "min_rows": 20000,
+    "minio_endpoint": "localhost:9000",
+    "access_key": "minioadmin",
+    "secret_key": "minioadmin",
+    "bucket_name": "a-bucket",  # 与milvus.yaml中minio.bucketName一致
+    "remote_path": "milvus-bulk",
+    "timeout": 1800,  # 等待导入完成的最长秒数
+}
+
 # ⚠️ 注意：行业分类配置已迁移到citic_industries.py
 # 使用中信一级、二级、三级行业分类标准
 
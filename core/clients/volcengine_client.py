@@ -2,8 +2,12 @@
 火山引擎API客户端
 """
 from volcenginesdkarkruntime import Ark
-from typing import List, Dict
+import httpx
+from typing import Callable, List, Dict, Iterator, Optional
+import random
 import sys
+import threading
+import time
 from pathlib import Path
 
 # 添加项目根目录到路径
@@ -11,70 +15,267 @@ project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from config import VOLCENGINE_API_KEY, VOLCENGINE_BASE_URL, VOLCENGINE_MODEL
+from config import VOLCENGINE_API_KEY, VOLCENGINE_BASE_URL, VOLCENGINE_MODEL, LLM_MAX_CONCURRENCY
+
+
+class VolcEngineAPIError(RuntimeError):
+    """LLM调用在重试耗尽后仍失败（调用方据此区分失败与正常返回的内容）"""
+    
+    def __init__(self, message: str, rate_limited: bool = False):
+        super().__init__(message)
+        self.rate_limited = rate_limited
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """是否为限流/配额类错误（HTTP 429 或错误信息中的限流关键字）"""
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status_code == 429:
+        return True
+    error_str = str(error).lower()
+    return any(key in error_str for key in ('rate limit', '429', 'too many requests', 'quota'))
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """从异常携带的HTTP响应中读取Retry-After（秒），没有或无法解析时返回None"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('Retry-After') or headers.get('retry-after')
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(error: Exception, attempt: int, initial_delay: float, max_delay: float) -> float:
+    """重试等待时间：优先服务端Retry-After，否则指数退避 + 随机抖动（避免并发请求同时重试）"""
+    retry_after = _retry_after_seconds(error)
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    return min(max_delay, initial_delay * (2 ** attempt) + random.uniform(0, 1))
 
 
 class VolcEngineClient:
     """火山引擎API客户端"""
     
+    # 进程级限流冷却：任一线程遇到429后，所有实例/线程在冷却结束前都不再发起新请求
+    _cooldown_until = 0.0  # time.monotonic()时间点
+    _cooldown_lock = threading.Lock()
+    
+    # 进程级熔断：连续失败的调用（重试耗尽才计一次，不含限流）达到阈值后，熔断期内所有调用直接失败，不再请求服务端
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_OPEN_SECONDS = 30.0
+    _consecutive_failures = 0
+    _circuit_open_until = 0.0  # time.monotonic()时间点
+    _circuit_lock = threading.Lock()
+    
+    # 进程级并发上限：所有线程（报告线程池、各Agent内部的主题/维度线程）同时在途的请求不超过LLM_MAX_CONCURRENCY，
+    # 每次请求（含流式读取全过程）持有一个名额，重试前的退避等待不占名额
+    _inflight = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+    
+    @classmethod
+    def _wait_for_cooldown(cls):
+        """请求前检查：处于限流冷却期时等待冷却结束（等待期间冷却被其他线程延长则继续等待）"""
+        while True:
+            with cls._cooldown_lock:
+                wait = cls._cooldown_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+    
+    @classmethod
+    def _enter_cooldown(cls, delay: float):
+        """记录限流冷却期（只延长、不缩短）"""
+        with cls._cooldown_lock:
+            cls._cooldown_until = max(cls._cooldown_until, time.monotonic() + delay)
+    
+    @classmethod
+    def _check_circuit(cls):
+        """请求前检查：熔断期内直接抛出VolcEngineAPIError"""
+        with cls._circuit_lock:
+            remaining = cls._circuit_open_until - time.monotonic()
+        if remaining > 0:
+            raise VolcEngineAPIError(f"LLM服务连续失败，已熔断（{remaining:.0f}秒后恢复）")
+    
+    @classmethod
+    def _record_success(cls):
+        """请求成功：清零连续失败计数"""
+        with cls._circuit_lock:
+            cls._consecutive_failures = 0
+    
+    @classmethod
+    def _record_failure(cls):
+        """
+        记录一次非限流的失败调用（重试耗尽或流式输出中途失败时调用一次），达到阈值时打开熔断
+        
+        熔断结束后计数不清零：恢复后的第一个请求再失败会立即重新熔断，成功才清零。
+        """
+        with cls._circuit_lock:
+            cls._consecutive_failures += 1
+            if cls._consecutive_failures < cls.CIRCUIT_FAILURE_THRESHOLD:
+                return
+            cls._circuit_open_until = time.monotonic() + cls.CIRCUIT_OPEN_SECONDS
+        print(f"[VolcEngine] ⚠️ 连续失败{cls.CIRCUIT_FAILURE_THRESHOLD}次以上，熔断{cls.CIRCUIT_OPEN_SECONDS:.0f}秒")
+    
     def __init__(self):
         self.api_key = VOLCENGINE_API_KEY
         self.base_url = VOLCENGINE_BASE_URL
         self.model = VOLCENGINE_MODEL
         
+        # 连接池复用TCP/TLS连接；Ark客户端的chat.completions.create可在多线程间并发调用
         self.client = Ark(
             api_key=self.api_key,
-            base_url=self.base_url
+            base_url=self.base_url,
+            http_client=httpx.Client(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
         )
     
     def chat_completion(self, messages: List[Dict[str, str]], 
                        temperature: float = 0.3,
                        max_tokens: int = 32768,  # ⭐ API最大限制32768
-                       retry_count: int = 3) -> str:
-        """调用聊天完成API"""
-        import time
+                       max_retries: int = 3,
+                       initial_delay: float = 1.0,
+                       max_delay: float = 60.0,
+                       stream: bool = False,
+                       on_delta: Optional[Callable[[str], None]] = None) -> str:
+        """
+        调用聊天完成API
+        
+        失败时按指数退避+抖动重试（限流时优先遵循服务端Retry-After）；
+        重试耗尽或处于熔断期时抛出VolcEngineAPIError。
         
-        for attempt in range(retry_count + 1):
+        stream=True 时走流式接口并拼接完整文本：长输出不必等待整段生成完成，
+        截断（finish_reason='length'）在最后一个分片即可发现；on_delta 在每收到一段文本时回调。
+        """
+        if stream:
+            pieces = []
+            for piece in self.chat_completion_stream(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                max_retries=max_retries,
+                initial_delay=initial_delay,
+                max_delay=max_delay
+            ):
+                pieces.append(piece)
+                if on_delta is not None:
+                    on_delta(piece)
+            return "".join(pieces)
+        
+        for attempt in range(max_retries + 1):
+            self._wait_for_cooldown()
+            self._check_circuit()
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
+                with self._inflight:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
                 
 
-                # ⭐ 检查是否被截断
-                finish_reason = response.choices[0].finish_reason
-                if finish_reason == 'length':
+                # ⭐ 检查是否被截断（choices[0]只取一次）
+                choice = response.choices[0]
+                if choice.finish_reason == 'length':
                     print(f"[VolcEngine] ⚠️ 输出被截断（达到max_tokens={max_tokens}限制）")
                 
-                return response.choices[0].message.content
+                self._record_success()
+                return choice.message.content
                 
             except Exception as e:
-                error_str = str(e)
+                rate_limited = _is_rate_limited(e)
+                if attempt >= max_retries:
+                    # 熔断按调用计数：重试耗尽才记一次失败（各次重试不重复计数）
+                    if not rate_limited:
+                        self._record_failure()
+                    reason = "速率限制" if rate_limited else str(e)
+                    raise VolcEngineAPIError(f"LLM调用失败（已重试{max_retries}次）: {reason}",
+                                             rate_limited=rate_limited) from e
                 
-                if 'rate limit' in error_str.lower() or '429' in error_str:
-                    if attempt < retry_count:
-                        wait_time = (2 ** attempt) * 5
-                        print(f"[VolcEngine] 速率限制，等待 {wait_time}秒后重试...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        return f"错误: 速率限制"
+                wait_time = _backoff_delay(e, attempt, initial_delay, max_delay)
+                if rate_limited:
+                    # 进入全局冷却：本线程与其他线程都在下次请求前等待
+                    print(f"[VolcEngine] 速率限制，等待 {wait_time:.1f}秒后重试...")
+                    self._enter_cooldown(wait_time)
                 else:
-                    if attempt < retry_count:
-                        time.sleep(1)
-                        continue
-                    else:
-                        return f"错误: {str(e)}"
+                    time.sleep(wait_time)
+    
+    def chat_completion_stream(self, messages: List[Dict[str, str]],
+                               temperature: float = 0.3,
+                               max_tokens: int = 32768,
+                               max_retries: int = 3,
+                               initial_delay: float = 1.0,
+                               max_delay: float = 60.0) -> Iterator[str]:
+        """
+        流式调用聊天完成API，逐段yield生成的文本
         
-        return "错误: 未知错误"
+        只在尚未收到任何输出时重试（退避与熔断策略同chat_completion）；
+        输出中途失败时直接抛出原异常，重试耗尽或处于熔断期时抛出VolcEngineAPIError。
+        """
+        for attempt in range(max_retries + 1):
+            received = False
+            self._wait_for_cooldown()
+            self._check_circuit()
+            try:
+                with self._inflight:
+                    stream = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True
+                    )
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        choice = chunk.choices[0]
+                        content = choice.delta.content if choice.delta else None
+                        if content:
+                            received = True
+                            yield content
+                        if choice.finish_reason == 'length':
+                            print(f"[VolcEngine] ⚠️ 输出被截断（达到max_tokens={max_tokens}限制）")
+                self._record_success()
+                return
+                
+            except Exception as e:
+                rate_limited = _is_rate_limited(e)
+                # 输出中途失败不再重试：与重试耗尽一样，本次调用记一次失败
+                if (received or attempt >= max_retries) and not rate_limited:
+                    self._record_failure()
+                if received:
+                    raise
+                if attempt >= max_retries:
+                    reason = "速率限制" if rate_limited else str(e)
+                    raise VolcEngineAPIError(f"LLM调用失败（已重试{max_retries}次）: {reason}",
+                                             rate_limited=rate_limited) from e
+                
+                wait_time = _backoff_delay(e, attempt, initial_delay, max_delay)
+                if rate_limited:
+                    # 进入全局冷却：本线程与其他线程都在下次请求前等待
+                    print(f"[VolcEngine] 速率限制，等待 {wait_time:.1f}秒后重试...")
+                    self._enter_cooldown(wait_time)
+                else:
+                    time.sleep(wait_time)
+
+
+# 全局单例：所有Agent共享同一个客户端（同一个HTTP连接池）
+_client_instance = None
+_client_instance_lock = threading.Lock()
 
 
 def get_volcengine_client() -> VolcEngineClient:
-    """获取火山引擎客户端实例"""
-    return VolcEngineClient()
+    """获取火山引擎客户端实例（进程内单例，线程安全）"""
+    global _client_instance
+    if _client_instance is None:
+        with _client_instance_lock:
+            if _client_instance is None:
+                _client_instance = VolcEngineClient()
+    return _client_instance
 
 
 def test_volcengine_client():
@@ -111,12 +312,11 @@ def test_volcengine_client():
             max_tokens=100
         )
         
-        if response.startswith("错误:"):
-            print(f"  ❌ API调用失败: {response}")
-        else:
-            print(f"  ✅ API调用成功")
-            print(f"  响应内容: {response[:100]}..." if len(response) > 100 else f"  响应内容: {response}")
+        print(f"  ✅ API调用成功")
+        print(f"  响应内容: {response[:100]}..." if len(response) > 100 else f"  响应内容: {response}")
             
+    except VolcEngineAPIError as e:
+        print(f"  ❌ API调用失败: {e}")
     except Exception as e:
         print(f"  ❌ 测试失败: {e}")
         import traceback
@@ -137,10 +337,9 @@ def test_volcengine_client():
                 temperature=test_case["temperature"],
                 max_tokens=test_case["max_tokens"]
             )
-            if not response.startswith("错误:"):
-                print(f"    ✅ 成功: {response[:50]}...")
-            else:
-                print(f"    ❌ 失败: {response}")
+            print(f"    ✅ 成功: {response[:50]}...")
+        except VolcEngineAPIError as e:
+            print(f"    ❌ 失败: {e}")
         except Exception as e:
             print(f"    ❌ 异常: {e}")
     
@@ -9,7 +9,19 @@ from models import PolicySegment
 from report_generator import ReportGenerator
 import json
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import atexit
+import threading
+from config import REPORT_MAX_WORKERS
+
+# 全局共享的有界线程池：所有政策及其内部的并行任务共用
+# （LLM请求总并发由VolcEngineClient按config.LLM_MAX_CONCURRENCY统一限制，与接口配额匹配）
+EXECUTOR = ThreadPoolExecutor(max_workers=REPORT_MAX_WORKERS)
+atexit.register(EXECUTOR.shutdown, wait=True)
+
+# 表格中表示"空值"的占位字符串（附件列按原样比较，报告系列按小写比较）
+_NULL_MARKERS = frozenset({'None', 'nan', 'NaN', ''})
+_NULL_LOWER = frozenset({'null', 'none', 'nan', ''})
 
 print("=" * 80)
 print("政策分析系统 - 分块化生成投资建议")
@@ -78,22 +90,21 @@ print(f"   - 政策全文列: {content_col}")
 print(f"   - 附件内容列: {attachment_col or '无'}")
 print(f"   - 报告系列列: {report_series_col or '无'}")
 
-# 合并附件内容
+# 合并附件内容（整列向量化处理，避免逐行.at查找）
 if attachment_col is not None and content_col is not None:
-    merged_count = 0
-    for idx in df_test.index:
-        policy_content = str(df_test.at[idx, content_col]) if pd.notna(df_test.at[idx, content_col]) else ""
-        attachment_content = str(df_test.at[idx, attachment_col]) if pd.notna(df_test.at[idx, attachment_col]) else ""
-        
-        if attachment_content and attachment_content.strip() not in ['None', 'nan', 'NaN', '']:
-            if policy_content.strip():
-                merged_content = f"{policy_content}\n\n---附件内容---\n{attachment_content}"
-            else:
-                merged_content = attachment_content
-            df_test.at[idx, content_col] = merged_content
-            merged_count += 1
+    policy_content = df_test[content_col].fillna('').astype(str)
+    attachment_content = df_test[attachment_col].fillna('').astype(str)
+    has_attachment = ~attachment_content.str.strip().isin(_NULL_MARKERS)
+    has_content = policy_content.str.strip() != ''
+    
+    merged_count = int(has_attachment.sum())
     
     if merged_count > 0:
+        # 整列重建后一次性赋值（无附件的行保持原值），不做逐格写入
+        merged_content = attachment_content.where(
+            ~has_content, policy_content + "\n\n---附件内容---\n" + attachment_content
+        )
+        df_test[content_col] = merged_content.where(has_attachment, df_test[content_col])
         print(f"✅ 合并完成: {merged_count} 个文档")
 else:
     print(f"✅ 无需合并附件")
@@ -118,42 +129,38 @@ output_dir.mkdir(exist_ok=True)
 
 segments = []  # 需要入库的新文档
 segments_existing = []  # 已存在于Milvus的文档（不需要入库，但需要生成报告）
-seen_titles = set()
-seen_contents = set()
 seen_pairs = set()  # 本批次内的 (title, timestamp) 去重
 
-for i, row in df_test.iterrows():
+# 逐列预处理为Python列表，循环内只访问原生对象（不再逐行构造Series/按标签取值）
+num_cols = len(df_test.columns)
+titles = df_test.iloc[:, 0].astype(str).tolist() if num_cols > 0 else ["未命名文档"] * len(df_test)
+# 时间戳整列解析一次（无法解析/缺失的回退为2024-01-01），替代逐行try/except
+default_timestamp = pd.Timestamp(2024, 1, 1)
+if num_cols > 2:
+    timestamp_series = pd.to_datetime(
+        df_test.iloc[:, 2].astype(str).str.strip(), format='mixed', errors='coerce'
+    ).fillna(default_timestamp)
+    timestamps = [ts.to_pydatetime() for ts in timestamp_series]
+else:
+    timestamps = [default_timestamp.to_pydatetime()] * len(df_test)
+if content_col is not None:
+    contents = df_test[content_col].fillna('').astype(str).tolist()
+else:
+    contents = df_test.iloc[:, 7].fillna('').astype(str).tolist() if num_cols > 7 else [""] * len(df_test)
+if report_series_col is not None:
+    report_series_list = df_test[report_series_col].fillna('').astype(str).str.strip().tolist()
+else:
+    report_series_list = [""] * len(df_test)
+
+for i, title, timestamp_value, content, report_series in zip(
+        df_test.index, titles, timestamps, contents, report_series_list):
     print(f"\n{'='*60}")
-    title = str(row.iloc[0]) if len(row) > 0 else "未命名文档"
     print(f"政策 {i+1}/{len(df_test)}: {title[:50]}...")
     print(f"{'='*60}")
     
     try:
-        # 先解析时间戳（用于去重判断）
-        timestamp_value = None
-        timestamp_str_for_check = ""
-        if len(row) > 2:
-            timestamp_str = str(row.iloc[2]).strip()
-            if timestamp_str and timestamp_str.lower() not in ['', 'nan', 'none', 'nat']:
-                try:
-                    timestamp_value = datetime.fromisoformat(timestamp_str)
-                    timestamp_str_for_check = timestamp_value.isoformat()
-                except:
-                    try:
-                        timestamp_value = pd.to_datetime(timestamp_str)
-                        timestamp_str_for_check = timestamp_value.isoformat()
-                    except:
-                        pass
-        
-        if timestamp_value is None:
-            timestamp_value = datetime(2024, 1, 1)
-            timestamp_str_for_check = timestamp_value.isoformat()
-        
-        # 获取内容
-        if content_col is not None:
-            content = str(row[content_col]) if pd.notna(row[content_col]) else ""
-        else:
-            content = str(row.iloc[7]) if len(row) > 7 else ""
+        # 时间戳已在循环外解析（用于去重判断）
+        timestamp_str_for_check = timestamp_value.isoformat()
         
         # 本批次内去重（标题+时间组合）
         check_pair = (title, timestamp_str_for_check)
@@ -162,17 +169,10 @@ for i, row in df_test.iterrows():
             continue
         
         seen_pairs.add(check_pair)
-        seen_titles.add(title)
-        seen_contents.add(content)
         
         # 读取报告系列
-        report_series = ""
-        if report_series_col is not None:
-            rs_value = row.get(report_series_col) if hasattr(row, 'get') else row[report_series_col]
-            if pd.notna(rs_value):
-                report_series = str(rs_value).strip()
-                if report_series.lower() in ['null', 'none', 'nan']:
-                    report_series = ""
+        if report_series.lower() in _NULL_LOWER:
+            report_series = ""
         
         # 计算doc_id编号
         doc_id_number = max_doc_id_number + len(segments) + len(segments_existing) + 1
@@ -221,8 +221,9 @@ if new_segments:
         print(f"{'='*60}")
         print(f"  行业: {', '.join(seg.industries[:5]) if seg.industries else '无'}")
         print(f"  投资相关性: {seg.metadata.get('investment_relevance', '未判断')}")
-        db.add_documents([seg], batch_size=1)
-        print(f"  ✅ 文档已入库: {seg.doc_id}")
+    # 一次调用批量入库：chunk向量化与Milvus插入都按批进行，而不是每个文档单独一次
+    db.add_documents(new_segments, batch_size=64)
+    print(f"  ✅ {len(new_segments)} 个文档已入库: {[seg.doc_id for seg in new_segments]}")
 else:
     print("ℹ️ 没有新文档需要入库")
 
@@ -232,24 +233,35 @@ else:
 print(f"\n[步骤6] 生成分析报告...")
 print("-" * 80)
 
-for idx, seg in enumerate(all_segments):
-    print(f"\n{'='*60}")
-    print(f"生成报告: {seg.title[:50]}...")
-    print(f"{'='*60}")
-    
-    # ========== 新流程：Meeting对比 → 主题词 → 分主题RAG ==========
-    
-    # 6.1 行业分析（简单输出）
-    print(f"\n[6.1] 行业分类分析...")
+_print_lock = threading.Lock()
+
+
+def safe_print(*args, **kwargs):
+    """多线程生成报告时加锁打印，避免多条日志交错"""
+    with _print_lock:
+        print(*args, **kwargs)
+
+
+def generate_industry_section(seg):
+    """6.1 行业分类分析（简单输出）"""
+    safe_print(f"\n[6.1] 行业分类分析...")
     try:
         industry_section = investment_agent.generate_industry_section(seg)
-        print(f"  ✅ 行业分析生成完成")
+        safe_print(f"  ✅ 行业分析生成完成")
     except Exception as e:
-        print(f"  ⚠️ 行业分析生成失败: {e}")
+        safe_print(f"  ⚠️ 行业分析生成失败: {e}")
         industry_section = "## 行业分类分析\n\n（生成失败）"
+    return industry_section
+
+
+def generate_meeting_section(seg):
+    """
+    6.2 报告系列时间对比分析（提取主题词，供6.3使用）
     
-    # 6.2 报告系列时间对比分析（先执行，提取主题词）
-    print(f"\n[6.2] 报告系列时间对比分析（提取主题词）...")
+    Returns:
+        (meeting_section, meeting_topics)
+    """
+    safe_print(f"\n[6.2] 报告系列时间对比分析（提取主题词）...")
     meeting_topics = []
     try:
         meeting_result = investment_agent.generate_meeting_section(seg, vector_db=db)
@@ -257,27 +269,56 @@ for idx, seg in enumerate(all_segments):
         if isinstance(meeting_result, dict):
             meeting_section = meeting_result.get('analysis', '## 报告系列时间对比分析\n\n（生成失败）')
             meeting_topics = meeting_result.get('topics', [])
-            print(f"  ✅ 报告系列对比完成，提取到 {len(meeting_topics)} 个主题词")
+            safe_print(f"  ✅ 报告系列对比完成，提取到 {len(meeting_topics)} 个主题词")
             if meeting_topics:
-                print(f"  主题词: {meeting_topics[:10]}...")
+                safe_print(f"  主题词: {meeting_topics[:10]}...")
         else:
             # 兼容旧版返回字符串
             meeting_section = meeting_result
-            print(f"  ✅ 报告系列对比完成（旧版格式）")
+            safe_print(f"  ✅ 报告系列对比完成（旧版格式）")
     except Exception as e:
-        print(f"  ⚠️ 报告系列时间对比分析失败: {e}")
+        safe_print(f"  ⚠️ 报告系列时间对比分析失败: {e}")
         meeting_section = "## 报告系列时间对比分析\n\n（生成失败）"
+    return meeting_section, meeting_topics
+
+
+def process_segment(idx, seg, executor=EXECUTOR):
+    """
+    生成单个政策的分析报告（各政策之间相互独立，可在线程池中并行执行）
+    
+    Args:
+        idx: 政策序号
+        seg: 政策文档
+        executor: 用于内部并行任务的线程池（与外层共用，见下方防死锁说明）
+    
+    Returns:
+        (idx, md_content, report_file)
+    """
+    safe_print(f"\n{'='*60}")
+    safe_print(f"生成报告: {seg.title[:50]}...")
+    safe_print(f"{'='*60}")
+    
+    # ========== 新流程：Meeting对比 → 主题词 → 分主题RAG ==========
+    
+    # 6.1 行业分析 与 6.2 报告系列对比 互不依赖，并行执行；6.3 依赖6.2的主题词，在两者完成后执行
+    # 6.1提交到共享池，6.2在当前线程执行；若6.1因池已满尚未开始，则撤回并在当前线程执行，
+    # 避免外层任务占满线程池后等待内层任务造成死锁
+    industry_future = executor.submit(generate_industry_section, seg)
+    meeting_section, meeting_topics = generate_meeting_section(seg)
+    if industry_future.cancel():
+        industry_section = generate_industry_section(seg)
+    else:
+        industry_section = industry_future.result()
     
     # 6.3 分主题RAG增量分析（使用meeting提取的主题词）
-    print(f"\n[6.3] 分主题RAG增量分析...")
+    safe_print(f"\n[6.3] 分主题RAG增量分析...")
     try:
         # 将meeting提取的主题词传给novelty_agent
         novelty_result = novelty_agent.analyze_with_topics(seg, topics=meeting_topics)
         novelty_section = novelty_result.get('analysis', '## 分主题增量分析\n\n（生成失败）')
-        topic_rag_results = novelty_result.get('topic_rag_results', {})
-        print(f"  ✅ 分主题增量分析完成")
+        safe_print(f"  ✅ 分主题增量分析完成")
     except Exception as e:
-        print(f"  ⚠️ 分主题增量分析失败: {e}")
+        safe_print(f"  ⚠️ 分主题增量分析失败: {e}")
         import traceback
         traceback.print_exc()
         novelty_section = "## 分主题增量分析\n\n（生成失败）"
@@ -291,7 +332,7 @@ for idx, seg in enumerate(all_segments):
     }
     
     # 6.3 生成Markdown报告
-    print(f"\n[6.3] 生成Markdown报告...")
+    safe_print(f"\n[6.3] 生成Markdown报告...")
     
     # 组装完整的Markdown报告（新顺序：行业 → Meeting对比 → 分主题增量分析）
     md_content = f"""# 政策分析报告
@@ -314,25 +355,35 @@ for idx, seg in enumerate(all_segments):
 {results.get('novelty', '')}
 """
     
-    # 6.4 生成总的投资建议
-    print(f"\n[6.4] 生成投资建议总结...")
+    # 6.4 生成总的投资建议（流式生成，边生成边写入报告文件，中途崩溃也能保留已生成部分）
+    safe_print(f"\n[6.4] 生成投资建议总结...")
+    report_file = output_dir / f"report_{idx+1:04d}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
     try:
-        investment_summary = investment_agent.generate_final_investment_summary(md_content, seg.title)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(md_content)
+            f.write("\n\n---\n\n")
+            f.flush()
+            
+            def write_delta(delta):
+                f.write(delta)
+                f.flush()
+            
+            investment_summary = investment_agent.generate_final_investment_summary(
+                md_content, seg.title, on_delta=write_delta
+            )
         md_content += f"""
 
 ---
 
 {investment_summary}
 """
-        print(f"  ✅ 投资建议总结生成完成")
+        safe_print(f"  ✅ 投资建议总结生成完成")
     except Exception as e:
-        print(f"  ⚠️ 投资建议总结生成失败: {e}")
+        safe_print(f"  ⚠️ 投资建议总结生成失败: {e}")
     
-    # 保存为Markdown文件
-    report_file = output_dir / f"report_{idx+1:04d}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(md_content)
-    print(f"  ✅ 报告已保存: {report_file}")
+    # 保存为Markdown文件（覆盖流式写入的中间结果，保证最终文件与md_content一致）
+    report_file.write_bytes(md_content.encode('utf-8'))
+    safe_print(f"  ✅ 报告已保存: {report_file}")
     
     # （备用）如需生成Word报告，取消下面注释：
     # doc = report_generator.generate_report(
@@ -344,6 +395,32 @@ for idx, seg in enumerate(all_segments):
     # )
     # word_file = output_dir / f"report_{idx+1:04d}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
     # report_generator.save(str(word_file))
+    
+    return idx, md_content, report_file
+
+
+# 各政策的报告生成主要耗时在远程LLM调用（I/O密集），用共享线程池并行；Milvus入库已在上面串行完成
+# 滑动窗口提交：同时在途的政策不超过REPORT_WINDOW个，完成一个再提交下一个，
+# 政策数量再多也不会一次性堆积future；窗口取线程池的一半，给各政策内部的并行任务留出线程
+REPORT_WINDOW = max(1, REPORT_MAX_WORKERS // 2)
+pending_segments = iter(enumerate(all_segments))
+inflight = set()
+for idx, seg in pending_segments:
+    inflight.add(EXECUTOR.submit(process_segment, idx, seg, EXECUTOR))
+    if len(inflight) >= REPORT_WINDOW:
+        break
+
+while inflight:
+    done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+    for future in done:
+        try:
+            idx, _, report_file = future.result()
+            safe_print(f"  ✅ [{idx+1}/{len(all_segments)}] 报告完成: {report_file}")
+        except Exception as e:
+            safe_print(f"  ⚠️ 报告生成失败: {e}")
+        next_item = next(pending_segments, None)
+        if next_item is not None:
+            inflight.add(EXECUTOR.submit(process_segment, *next_item, EXECUTOR))
 
 print(f"\n{'='*80}")
 print("✅ 所有政策处理完成！")
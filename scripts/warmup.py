@@ -0,0 +1,20 @@
+"""
+预编译Agent注册的JIT kernel（在服务启动前运行一次）
+
+目前没有Agent通过 BaseAgent.register_warmup 注册kernel，运行结果为0个；
+之后有Agent用 @BaseAgent.jit_kernel() 编写数值kernel并注册预热函数时，本脚本无需修改。
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import agents  # noqa: F401  导入各Agent模块，使模块级的 register_warmup 调用（如有）生效
+from agents.base import BaseAgent
+
+if __name__ == "__main__":
+    print("正在预编译JIT kernel...")
+    count = BaseAgent.warmup_all()
+    print(f"✅ 预热完成: {count} 个kernel")
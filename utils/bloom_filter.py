@@ -0,0 +1,101 @@
+"""
+布隆过滤器 - 只需成员判断的大规模去重集合（如Milvus中已存在的 (标题, 时间) 组合）
+
+使用方式：
+    from utils.bloom_filter import BloomFilter
+
+    bf = BloomFilter(capacity=200000, error_rate=1e-6)
+    bf.add_many([("标题", "2024-01-01"), ...])
+    ("标题", "2024-01-01") in bf     # True
+    bf.save(path); bf = BloomFilter.load(path)
+
+说明：
+- 位数组用numpy存储，1e-6误判率下约3.6字节/元素（Python set[tuple[str, str]]约数百字节/元素）
+- 只有假阳性（不存在的元素可能被判为存在），没有假阴性
+- 元组键按 \\x00 拼接后哈希；哈希采用blake2b双重哈希，跨进程/跨运行稳定，可持久化
+"""
+from typing import Any, Iterable
+from pathlib import Path
+import hashlib
+import math
+
+import numpy as np
+
+
+class BloomFilter:
+    """基于numpy位数组的布隆过滤器"""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6):
+        """
+        初始化布隆过滤器
+
+        Args:
+            capacity: 预计元素数量（超出后误判率上升）
+            error_rate: 目标误判率
+        """
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self._bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self._count = 0  # 已加入的不同元素数（近似：假阳性的元素不计入）
+
+    @staticmethod
+    def _hash_pair(key: Any):
+        """键 -> (h1, h2) 两个64位哈希"""
+        if isinstance(key, tuple):
+            key = "\x00".join(str(part) for part in key)
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def _positions(self, keys: Iterable[Any]) -> np.ndarray:
+        """批量计算位位置，shape=(len(keys), num_hashes)"""
+        pairs = np.array([self._hash_pair(key) for key in keys], dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        # 双重哈希：h1 + i*h2（uint64按模2^64回绕）
+        return (pairs[:, :1] + steps * pairs[:, 1:]) % np.uint64(self.num_bits)
+
+    def _test(self, positions: np.ndarray) -> np.ndarray:
+        """positions中每行的位是否全部为1"""
+        byte_idx = (positions >> np.uint64(3)).astype(np.int64)
+        bit_mask = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        return ((self._bits[byte_idx] & bit_mask) != 0).all(axis=1)
+
+    def add_many(self, keys: Iterable[Any]):
+        """批量加入元素（批内重复只计一次）"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        positions = self._positions(keys)
+        self._count += int((~self._test(positions)).sum())
+        flat = positions.ravel()
+        np.bitwise_or.at(
+            self._bits,
+            (flat >> np.uint64(3)).astype(np.int64),
+            np.left_shift(1, (flat & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        )
+
+    def add(self, key: Any):
+        """加入单个元素"""
+        self.add_many([key])
+
+    def __contains__(self, key: Any) -> bool:
+        return bool(self._test(self._positions([key]))[0])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def save(self, path: Path):
+        """保存到.npz文件"""
+        np.savez(
+            path, bits=self._bits,
+            meta=np.array([self.num_bits, self.num_hashes, self._count], dtype=np.int64)
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "BloomFilter":
+        """从save()保存的.npz文件加载"""
+        with np.load(path) as data:
+            bf = cls.__new__(cls)
+            bf.num_bits, bf.num_hashes, bf._count = (int(x) for x in data['meta'])
+            bf._bits = data['bits'].copy()
+        return bf
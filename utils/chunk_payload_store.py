@@ -0,0 +1,58 @@
+"""
+Chunk负载本地存储 - 按Milvus主键缓存chunk的标量字段（正文、标题、时间等）
+
+使用方式：
+    from utils.chunk_payload_store import ChunkPayloadStore
+
+    store = ChunkPayloadStore(path)
+    store.set_many({milvus_id: {"doc_id": ..., "content": ..., ...}, ...})   # 插入Milvus后写入
+    payloads = store.get_many(hit_ids)                                        # {milvus_id: dict}，只含命中项
+    store.clear()                                                             # 集合重建时清空
+
+说明：
+- 向量检索只向Milvus取主键和距离，负载从本地SQLite（OS页缓存）读取，省去Milvus按命中取字段的开销
+- 存的是写入Milvus时的原始值（字典编号、压缩正文等），读取后的解码逻辑与直接读Milvus相同
+- 主键为Milvus auto_id，集合重建后旧主键不会再出现；未命中的主键由调用方回源Milvus并补写
+"""
+from typing import Any, Dict, List
+from pathlib import Path
+import json
+
+from utils.sqlite_kv import SQLiteKVStore
+
+
+class ChunkPayloadStore:
+    """基于SQLite的chunk负载存储（线程安全）"""
+
+    def __init__(self, path: Path):
+        """
+        初始化存储
+
+        Args:
+            path: SQLite文件路径（每个chunk集合一个文件）
+        """
+        self.path = Path(path)
+        self._store = SQLiteKVStore(
+            self.path,
+            encode=lambda payload: json.dumps(payload, ensure_ascii=False),
+            decode=json.loads,
+            tag="ChunkPayloadStore",
+            key_type="INTEGER",
+            table="payload"
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._store.enabled
+
+    def get_many(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """批量读取，只返回命中的 {id: 负载dict}"""
+        return self._store.get_many(int(i) for i in ids)
+
+    def set_many(self, items: Dict[int, Dict[str, Any]]):
+        """批量写入（失败时跳过，缺失的负载会回源Milvus）"""
+        self._store.set_many({int(row_id): payload for row_id, payload in items.items()})
+
+    def clear(self):
+        """清空存储"""
+        self._store.clear()
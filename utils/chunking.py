@@ -4,11 +4,50 @@
 严格控制chunk长度，确保不超过Milvus限制
 """
 import re
-from typing import List, Dict, Any
-from dataclasses import dataclass
+import functools
+import logging
+import math
+from typing import Callable, List, Dict, Any, Iterator, Optional, Tuple
+from dataclasses import dataclass, fields
 
+try:
+    from semantic_text_splitter import TextSplitter  # 可选：Rust实现的文本切分（超长段落切分提速）
+except ImportError:
+    TextSplitter = None
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+try:
+    import re2  # 可选：google-re2（DFA匹配，线性时间、无回溯）
+except ImportError:
+    re2 = None
+
+# RE2的\d、\s只匹配ASCII，换成Unicode类以保持与Python re一致
+_RE2_CLASS_MAP = {r'\d': r'\p{Nd}', r'\s': r'[\s\x{1c}-\x{1f}\x{85}\p{Z}]'}
+
+
+def _compile_pattern(pattern: str):
+    """
+    编译正则：安装了google-re2时优先用RE2，模式不被RE2支持（或未安装）时用Python re
+    
+    RE2不接受非ASCII字符前的转义（如全角括号前的反斜杠），编译前去掉这类多余的反斜杠。
+    """
+    if re2 is not None:
+        re2_pattern = re.sub(r'\\([^\x00-\x7f])', r'\1', pattern)
+        re2_pattern = re.sub(r'\\[ds]', lambda m: _RE2_CLASS_MAP[m.group(0)], re2_pattern)
+        try:
+            return re2.compile(re2_pattern)
+        except Exception:
+            pass
+    return re.compile(pattern)
+
+
+def _cap(value: Any, max_chars: int) -> str:
+    """元数据转为字符串并截断到max_chars（已是str时不再调用str()）"""
+    return value[:max_chars] if isinstance(value, str) else str(value)[:max_chars]
+
+
+@dataclass(slots=True)
 class DocumentChunk:
     """文档块（包含完整元数据供RAG使用）"""
     # Chunk标识字段
@@ -39,7 +78,11 @@ class PolicyDocumentChunker:
         chunk_size_target: int = 800,  # ⭐ 大幅增加：800字符，保持更完整的语义上下文
         chunk_size_max: int = 1000,    # ⭐ 大幅增加：1000字符，允许更大的chunk
         overlap: int = 150,            # ⭐ 增加重叠：150字符，确保上下文连贯
-        absolute_max: int = 1200       # ⭐ 大幅增加：1200字符（约600-800 tokens）
+        absolute_max: int = 1200,      # ⭐ 大幅增加：1200字符（约600-800 tokens）
+        fast_split: bool = False,      # 超长段落改用Rust切分器（需安装semantic-text-splitter）
+        tokenizer: Optional[Callable[[str], int]] = None,  # 返回文本token数的函数（如embedding模型tokenizer）
+        max_tokens: Optional[int] = None,  # 每个chunk的token上限（需同时提供tokenizer）
+        num_special_tokens: int = 2    # tokenizer计数中包含的特殊token数（[CLS]/[SEP]）
     ):
         """
         Args:
@@ -51,6 +94,12 @@ class PolicyDocumentChunker:
                          2. 中文: 1字符 ≈ 1-1.5 tokens
                          3. 安全值: 1200字符 ≈ 1200-1800 tokens
                          4. Milvus: VARCHAR(5000) - 远大于此，不是瓶颈
+            fast_split: 超长段落（>absolute_max）交给semantic-text-splitter在Rust中切分；
+                        切分点与Python实现不完全相同，默认关闭，未安装时自动回退
+            tokenizer / max_tokens: 按真实token数校验chunk长度。UTF-8字节数已在预算内的chunk
+                        不调用tokenizer；超出预算的chunk在句子/段落边界处缩短到预算内
+            num_special_tokens: tokenizer返回的token数中特殊token（如[CLS]/[SEP]）的个数，
+                        与模型实际输入一致；tokenizer不计特殊token时传0
                          
         优化说明（2024-12更新）：
         - 更大的chunk（800-1200字符）可以保持更完整的政策语义
@@ -62,6 +111,11 @@ class PolicyDocumentChunker:
         self.chunk_size_max = chunk_size_max
         self.overlap = overlap
         self.absolute_max = absolute_max
+        self.fast_split = fast_split and TextSplitter is not None
+        self._text_splitter = TextSplitter(absolute_max) if self.fast_split else None
+        self.tokenizer = tokenizer if max_tokens else None
+        self.max_tokens = max_tokens
+        self.num_special_tokens = num_special_tokens
         
         # ⭐ 优化：优先在段落/条款边界截断，保持语义完整
         # 优先级：段落分隔符 > 条款标记 > 句号 > 其他标点
@@ -78,6 +132,10 @@ class PolicyDocumentChunker:
             r'^第[一二三四五六七八九十\d]+[条章节]',  # 第一条 第二章
             r'^【.*?】',  # 【重要】【通知】
         ]
+        # 预编译：各条款模式合并为一个交替正则，判断条款开头只需一次match
+        self._clause_re = _compile_pattern('|'.join(f'(?:{p})' for p in self.clause_patterns))
+        self._paragraph_split_re = _compile_pattern(r'\n\s*\n+')
+        self._clause_split_re = re.compile(r'(\n[一二三四五六七八九十]+[、\.])')
     
     def _smart_truncate(self, text: str, max_length: int) -> str:
         """
@@ -100,18 +158,21 @@ class PolicyDocumentChunker:
         best_pos = -1
         best_priority = -1
         
+        # rfind只扫描满足最少保留比例的尾部区间（区间外的位置本来也不会被采用）
         # 优先级1：段落分隔符（最高优先级）
+        para_start = int(max_length * 0.5) + 1  # 至少保留50%内容
         for delimiter in self.paragraph_delimiters:
-            pos = truncated.rfind(delimiter)
-            if pos > best_pos and pos > max_length * 0.5:  # 至少保留50%内容
+            pos = truncated.rfind(delimiter, para_start)
+            if pos > best_pos:
                 best_pos = pos + len(delimiter)
                 best_priority = 1
         
         # 优先级2：句子分隔符（如果没找到段落分隔符）
         if best_pos < 0:
+            sent_start = int(max_length * 0.6) + 1  # 至少保留60%内容
             for delimiter in self.sentence_delimiters:
-                pos = truncated.rfind(delimiter)
-                if pos > best_pos and pos > max_length * 0.6:  # 至少保留60%内容
+                pos = truncated.rfind(delimiter, sent_start)
+                if pos > best_pos:
                     best_pos = pos + len(delimiter)
                     best_priority = 2
         
@@ -120,8 +181,8 @@ class PolicyDocumentChunker:
             return text[:best_pos].strip()
         
         # 优先级3：在空格处截断（避免截断单词）
-        space_pos = truncated.rfind(' ')
-        if space_pos > max_length * 0.8:
+        space_pos = truncated.rfind(' ', int(max_length * 0.8) + 1)
+        if space_pos > 0:
             return text[:space_pos].strip()
         
         # 最后手段：硬截断
@@ -136,11 +197,71 @@ class PolicyDocumentChunker:
         industries: str = "",
         investment_relevance: str = "",
         report_series: str = "",  # ⭐ 报告系列
-        industry_policy_segments: str = "",  # JSON格式：{"行业名": ["政策片段1", "政策片段2"]}
-        create_summary: bool = False  # 默认不创建summary
+        industry_policy_segments: str = ""  # JSON格式：{"行业名": ["政策片段1", "政策片段2"]}
     ) -> List[DocumentChunk]:
         """
-        对文档进行智能切分（严格长度控制+完整元数据）
+        对文档进行智能切分，返回全部chunk（参数同iter_chunks）
+        
+        Returns:
+            DocumentChunk列表（每个chunk保证≤absolute_max字符，包含完整元数据）
+        """
+        chunks = list(self.iter_chunks(
+            doc_id=doc_id,
+            title=title,
+            content=content,
+            timestamp=timestamp,
+            industries=industries,
+            investment_relevance=investment_relevance,
+            report_series=report_series,
+            industry_policy_segments=industry_policy_segments
+        ))
+        max_len = max(len(c.content) for c in chunks) if chunks else 0
+        logger.info("✅ 文档切分完成: %d 个chunks，最大长度=%d字符 (限制:%d)", len(chunks), max_len, self.absolute_max)
+        return chunks
+    
+    def chunk_document_columns(self, **kwargs) -> Dict[str, List[Any]]:
+        """
+        对文档进行智能切分，按列返回（参数同iter_chunks）
+        
+        每个字段一个列表（与Milvus按列插入的entities格式一致）；文档级元数据对所有chunk相同，
+        最后按chunk数整列填充，不再逐个chunk读取。
+        
+        Returns:
+            {字段名: [各chunk的值]}，字段与DocumentChunk一致
+        """
+        per_chunk = ('chunk_id', 'chunk_index', 'chunk_type', 'content')
+        columns = {name: [] for name in per_chunk}
+        first = None
+        for chunk in self.iter_chunks(**kwargs):
+            if first is None:
+                first = chunk
+            columns['chunk_id'].append(chunk.chunk_id)
+            columns['chunk_index'].append(chunk.chunk_index)
+            columns['chunk_type'].append(chunk.chunk_type)
+            columns['content'].append(chunk.content)
+        
+        num_chunks = len(columns['content'])
+        return {
+            f.name: columns[f.name] if f.name in columns
+            else [getattr(first, f.name)] * num_chunks if first is not None else []
+            for f in fields(DocumentChunk)
+        }
+    
+    def iter_chunks(
+        self,
+        doc_id: str,
+        title: str,
+        content: str,
+        timestamp: str = "",
+        industries: str = "",
+        investment_relevance: str = "",
+        report_series: str = "",
+        industry_policy_segments: str = ""
+    ) -> Iterator[DocumentChunk]:
+        """
+        对文档进行智能切分（严格长度控制+完整元数据），逐个产出chunk
+        
+        调用方可边切分边处理（如按批写入），内存中不必同时持有整篇文档的全部chunk。
         
         Args:
             doc_id: 文档ID
@@ -148,17 +269,28 @@ class PolicyDocumentChunker:
             content: 文档内容
             timestamp: 时间戳（ISO格式）
             industries: 中信一级行业（逗号分隔）
-            create_summary: 是否创建摘要chunk
             
-        Returns:
-            DocumentChunk列表（每个chunk保证≤450字符，包含完整元数据）
+        Yields:
+            DocumentChunk（每个chunk保证≤absolute_max字符，包含完整元数据）
         """
-        # ⭐ 预先截断所有元数据，确保不超过Milvus限制
-        title = str(title)[:500]
-        timestamp = str(timestamp)[:150]
-        industries = str(industries)[:500]
+        # ⭐ 预先截断所有元数据，确保不超过Milvus限制（长度与Schema的max_length一致）
+        # industry_policy_segments是JSON，不在此截断，由入库时按JSON结构裁剪
+        title = _cap(title, 500)
+        timestamp = _cap(timestamp, 150)
+        industries = _cap(industries, 500)
+        investment_relevance = _cap(investment_relevance, 10)
+        report_series = _cap(report_series, 50)
         
-        chunks = []
+        # 同一文档所有chunk共享的元数据（构建一次，各输出点展开传入）
+        meta = {
+            'doc_id': doc_id,
+            'title': title,
+            'timestamp': timestamp,
+            'industries': industries,
+            'investment_relevance': investment_relevance,
+            'report_series': report_series,
+            'industry_policy_segments': industry_policy_segments,
+        }
         
         # 不再创建summary chunk，直接从内容开始切分
         
@@ -168,6 +300,7 @@ class PolicyDocumentChunker:
         # 合并段落为chunks
         current_chunk_parts = []
         current_chunk_size = 0
+        current_has_clause = False  # current_chunk_parts中是否有条款开头的段落（随追加累积）
         chunk_idx = 0  # 从0开始，不再有summary chunk
         
         for para in paragraphs:
@@ -178,48 +311,30 @@ class PolicyDocumentChunker:
                 # 先保存当前积累的
                 if current_chunk_parts:
                     chunk_content = '\n\n'.join(current_chunk_parts)
-                    chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
-                    chunks.append(DocumentChunk(
+                    if len(chunk_content) > self.absolute_max:
+                        chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
+                    yield DocumentChunk(
                         chunk_id=f"{doc_id}_chunk_{chunk_idx}",
-                        doc_id=doc_id,
                         chunk_index=chunk_idx,
                         chunk_type='paragraph',
-                        content=chunk_content,
-                        title=title,
-                        timestamp=timestamp,
-                        industries=industries,
-                        investment_relevance=investment_relevance,
-                        report_series=report_series,
-                        industry_policy_segments=industry_policy_segments
-                    ))
+                        content=self._fit_token_budget(chunk_content),
+                        **meta
+                    )
                     chunk_idx += 1
                     current_chunk_parts = []
                     current_chunk_size = 0
+                    current_has_clause = False
                 
                 # 超长段落智能切分（在句号处截断）
-                remaining = para
-                while len(remaining) > 0:
-                    if len(remaining) <= self.absolute_max:
-                        chunk_part = remaining
-                        remaining = ""
-                    else:
-                        chunk_part = self._smart_truncate(remaining, self.absolute_max)
-                        remaining = remaining[len(chunk_part):].lstrip()
-                    
+                for chunk_part in self._split_long_paragraph(para):
                     if chunk_part:
-                        chunks.append(DocumentChunk(
+                        yield DocumentChunk(
                             chunk_id=f"{doc_id}_chunk_{chunk_idx}",
-                            doc_id=doc_id,
                             chunk_index=chunk_idx,
                             chunk_type='paragraph',
                             content=chunk_part,
-                            title=title,
-                            timestamp=timestamp,
-                            industries=industries,
-                            investment_relevance=investment_relevance,
-                            report_series=report_series,
-                            industry_policy_segments=industry_policy_segments
-                        ))
+                            **meta
+                        )
                         chunk_idx += 1
                 continue
             
@@ -239,21 +354,16 @@ class PolicyDocumentChunker:
             if should_start_new and current_chunk_parts:
                 # 保存当前chunk（智能截断）
                 chunk_content = '\n\n'.join(current_chunk_parts)
-                chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
+                if len(chunk_content) > self.absolute_max:
+                    chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
                 
-                chunks.append(DocumentChunk(
+                yield DocumentChunk(
                     chunk_id=f"{doc_id}_chunk_{chunk_idx}",
-                    doc_id=doc_id,
                     chunk_index=chunk_idx,
-                    chunk_type='clause' if any(self._is_clause_start(p) for p in current_chunk_parts) else 'paragraph',
-                    content=chunk_content,
-                    title=title,
-                    timestamp=timestamp,
-                    industries=industries,
-                    investment_relevance=investment_relevance,
-                    report_series=report_series,
-                    industry_policy_segments=industry_policy_segments
-                ))
+                    chunk_type='clause' if current_has_clause else 'paragraph',
+                    content=self._fit_token_budget(chunk_content),
+                    **meta
+                )
                 chunk_idx += 1
                 
                 # ⭐ 优化：添加重叠（使用更大的重叠窗口）
@@ -268,64 +378,95 @@ class PolicyDocumentChunker:
                     
                     current_chunk_parts = [overlap_text, para] if overlap_text else [para]
                     current_chunk_size = len(overlap_text) + para_size if overlap_text else para_size
+                    # 重叠文本是截取出的新片段，需单独判断是否为条款开头
+                    current_has_clause = is_clause or self._is_clause_start(overlap_text)
                 else:
                     current_chunk_parts = [para]
                     current_chunk_size = para_size
+                    current_has_clause = is_clause
             else:
                 # 继续添加到当前chunk
                 current_chunk_parts.append(para)
                 current_chunk_size += para_size
+                current_has_clause = current_has_clause or is_clause
             
             # 如果累积太大，智能切分
             if current_chunk_size > self.chunk_size_max:
                 chunk_content = '\n\n'.join(current_chunk_parts)
-                chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
+                if len(chunk_content) > self.absolute_max:
+                    chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
                 
-                chunks.append(DocumentChunk(
+                yield DocumentChunk(
                     chunk_id=f"{doc_id}_chunk_{chunk_idx}",
-                    doc_id=doc_id,
                     chunk_index=chunk_idx,
                     chunk_type='paragraph',
-                    content=chunk_content,
-                    title=title,
-                    timestamp=timestamp,
-                    industries=industries,
-                    investment_relevance=investment_relevance,
-                    report_series=report_series,
-                    industry_policy_segments=industry_policy_segments
-                ))
+                    content=self._fit_token_budget(chunk_content),
+                    **meta
+                )
                 chunk_idx += 1
                 current_chunk_parts = []
                 current_chunk_size = 0
+                current_has_clause = False
         
         # 保存最后一个chunk（智能截断）
         if current_chunk_parts:
             chunk_content = '\n\n'.join(current_chunk_parts)
-            chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
+            if len(chunk_content) > self.absolute_max:
+                chunk_content = self._smart_truncate(chunk_content, self.absolute_max)
             
-            chunks.append(DocumentChunk(
+            yield DocumentChunk(
                 chunk_id=f"{doc_id}_chunk_{chunk_idx}",
-                doc_id=doc_id,
                 chunk_index=chunk_idx,
                 chunk_type='paragraph',
-                content=chunk_content,
-                title=title,
-                timestamp=timestamp,
-                industries=industries,
-                investment_relevance=investment_relevance,
-                report_series=report_series,
-                industry_policy_segments=industry_policy_segments
-            ))
-        
-        # 最终验证：确保所有chunk都不超过absolute_max（智能截断）
-        for chunk in chunks:
-            if len(chunk.content) > self.absolute_max:
-                print(f"⚠️ 警告: chunk {chunk.chunk_id} 超长({len(chunk.content)})，智能截断到{self.absolute_max}")
-                chunk.content = self._smart_truncate(chunk.content, self.absolute_max)
+                content=self._fit_token_budget(chunk_content),
+                **meta
+            )
+    
+    def _fit_token_budget(self, text: str) -> str:
+        """
+        将文本缩短到max_tokens以内（未配置tokenizer时原样返回）
         
-        max_len = max(len(c.content) for c in chunks) if chunks else 0
-        print(f"✅ 文档切分完成: {len(chunks)} 个chunks，最大长度={max_len}字符 (限制:{self.absolute_max})")
-        return chunks
+        按超出比例估算保留长度后用_smart_truncate在边界处截断，直到token数满足预算。
+        字节级BPE的每个正文token至少对应1个字节，UTF-8字节数不超过 max_tokens - 特殊token数 时
+        必然满足，跳过tokenizer。
+        """
+        if self.tokenizer is None or len(text.encode('utf-8')) <= self.max_tokens - self.num_special_tokens:
+            return text
+        
+        num_tokens = self.tokenizer(text)
+        while num_tokens > self.max_tokens and len(text) > 1:
+            target_len = min(len(text) - 1, int(len(text) * self.max_tokens / num_tokens))
+            text = self._smart_truncate(text, max(target_len, 1))
+            num_tokens = self.tokenizer(text)
+        return text
+    
+    def _split_long_paragraph(self, para: str) -> List[str]:
+        """
+        将超过absolute_max的段落切分为多段（fast_split时由Rust切分器完成）
+        
+        Args:
+            para: 段落文本
+            
+        Returns:
+            切分后的片段列表（每段≤absolute_max）
+        """
+        # Rust切分器不感知token预算，配置了tokenizer时走Python实现
+        if self._text_splitter is not None and self.tokenizer is None:
+            return self._text_splitter.chunks(para)
+        
+        parts = []
+        remaining = para
+        while len(remaining) > 0:
+            if len(remaining) <= self.absolute_max:
+                chunk_part = remaining
+                remaining = ""
+            else:
+                chunk_part = self._smart_truncate(remaining, self.absolute_max)
+            # 超出token预算的部分留在remaining中，进入下一段
+            chunk_part = self._fit_token_budget(chunk_part)
+            remaining = remaining[len(chunk_part):].lstrip()
+            parts.append(chunk_part)
+        return parts
     
     def _split_into_paragraphs(self, content: str) -> List[str]:
         """
@@ -338,23 +479,32 @@ class PolicyDocumentChunker:
             段落列表
         """
         # ⭐ 优化：先按双换行符切分（主要段落分隔符）
-        paragraphs = re.split(r'\n\s*\n+', content)
+        # finditer按切分点直接切片，strip与过滤太短的段落在同一遍完成
+        paragraphs = []
+        num_splits = 1  # 切分出的原始段数（含空段），用于判断是否改按条款切分
+        prev = 0
+        for m in self._paragraph_split_re.finditer(content):
+            para = content[prev:m.start()].strip()
+            if len(para) > 10:  # 过滤太短的段落
+                paragraphs.append(para)
+            prev = m.end()
+            num_splits += 1
+        para = content[prev:].strip()
+        if len(para) > 10:
+            paragraphs.append(para)
         
         # 如果段落太少，尝试按单换行符+条款标记切分
-        if len(paragraphs) < 3:
+        if num_splits < 3:
             # 尝试按条款标记切分（如：一、二、三、）
-            clause_split = re.split(r'(\n[一二三四五六七八九十]+[、\.])', content)
-            if len(clause_split) > len(paragraphs):
+            clause_split = self._clause_split_re.split(content)
+            if len(clause_split) > num_splits:
                 # 合并条款标记和内容
                 merged = []
                 for i in range(0, len(clause_split) - 1, 2):
                     if i + 1 < len(clause_split):
                         merged.append(clause_split[i] + clause_split[i + 1])
                 if merged:
-                    paragraphs = merged
-        
-        # 过滤空段落并清理
-        paragraphs = [p.strip() for p in paragraphs if p.strip() and len(p.strip()) > 10]  # 过滤太短的段落
+                    paragraphs = [p.strip() for p in merged if len(p.strip()) > 10]
         
         return paragraphs
     
@@ -368,10 +518,7 @@ class PolicyDocumentChunker:
         Returns:
             是否是条款开头
         """
-        for pattern in self.clause_patterns:
-            if re.match(pattern, paragraph.strip()):
-                return True
-        return False
+        return self._clause_re.match(paragraph.lstrip()) is not None
     
     def _extract_overlap_text(self, text: str, target_length: int) -> str:
         """
@@ -387,30 +534,55 @@ class PolicyDocumentChunker:
         if len(text) <= target_length:
             return text
         
-        # 从末尾开始，查找句子边界
+        # 从末尾开始，查找句子边界（直接在原文上按区间find，不先切出副本）
         start_pos = len(text) - target_length
-        truncated = text[start_pos:]
+        max_offset = math.ceil(target_length * 0.3) - 1  # 在开头30%内找到
         
         # 查找第一个句子分隔符
         for delimiter in self.sentence_delimiters:
-            pos = truncated.find(delimiter)
-            if pos > 0 and pos < target_length * 0.3:  # 在开头30%内找到
-                return truncated[pos + len(delimiter):].strip()
+            pos = text.find(delimiter, start_pos, start_pos + max_offset + len(delimiter))
+            if pos > start_pos:
+                return text[pos + len(delimiter):].strip()
         
         # 如果没找到，返回末尾文本
-        return truncated.strip()
+        return text[start_pos:].strip()
+
+
+# 文档数少于该值时串行切分（进程启动与序列化开销大于并行收益）
+_PARALLEL_MIN_DOCS = 16
+
+
+@functools.lru_cache(maxsize=8)
+def _get_worker_chunker(config: Tuple[Tuple[str, Any], ...]) -> PolicyDocumentChunker:
+    """子进程内按配置复用切分器（避免每个文档重新编译正则）"""
+    return PolicyDocumentChunker(**dict(config))
+
+
+def _chunk_one(config: Tuple[Tuple[str, Any], ...], doc: Dict[str, Any]) -> Tuple[str, List[DocumentChunk]]:
+    """进程池任务：切分单个文档（模块级函数，可被pickle）"""
+    chunks = _get_worker_chunker(config).chunk_document(
+        doc_id=doc['doc_id'],
+        title=doc['title'],
+        content=doc['content']
+    )
+    return doc['doc_id'], chunks
 
 
 def chunk_documents_batch(
     documents: List[Dict[str, Any]],
-    chunker: PolicyDocumentChunker = None
+    chunker: PolicyDocumentChunker = None,
+    max_workers: Optional[int] = None
 ) -> Dict[str, List[DocumentChunk]]:
     """
     批量切分文档
     
+    文档间相互独立，文档较多时用进程池按CPU核数并行切分；
+    传给子进程的是切分器配置（而非实例），子进程内按配置重建并复用。
+    
     Args:
         documents: 文档列表，每个文档包含 {'doc_id', 'title', 'content'}
         chunker: 切分器实例，None则使用默认配置
+        max_workers: 进程数，None为CPU核数，1为串行
         
     Returns:
         {doc_id: [chunks]} 的字典
@@ -419,13 +591,30 @@ def chunk_documents_batch(
         chunker = PolicyDocumentChunker()
     
     result = {}
-    for doc in documents:
-        chunks = chunker.chunk_document(
-            doc_id=doc['doc_id'],
-            title=doc['title'],
-            content=doc['content']
-        )
-        result[doc['doc_id']] = chunks
+    # 自定义tokenizer通常不可pickle，此时也串行处理
+    if max_workers == 1 or len(documents) < _PARALLEL_MIN_DOCS or chunker.tokenizer is not None:
+        for doc in documents:
+            chunks = chunker.chunk_document(
+                doc_id=doc['doc_id'],
+                title=doc['title'],
+                content=doc['content']
+            )
+            result[doc['doc_id']] = chunks
+        return result
+    
+    from concurrent.futures import ProcessPoolExecutor
+    config = (
+        ('chunk_size_target', chunker.chunk_size_target),
+        ('chunk_size_max', chunker.chunk_size_max),
+        ('overlap', chunker.overlap),
+        ('absolute_max', chunker.absolute_max),
+        ('fast_split', chunker.fast_split),
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for doc_id, chunks in executor.map(
+            _chunk_one, [config] * len(documents), documents, chunksize=8
+        ):
+            result[doc_id] = chunks
     
     return result
 
@@ -0,0 +1,107 @@
+"""
+Chunk正文压缩 - zstd + 训练字典，压缩后以base64存入Milvus的VARCHAR字段
+
+使用方式：
+    from utils.content_codec import ContentCodec
+
+    codec = ContentCodec(dict_path)           # 字典文件不存在时不使用字典
+    codec.train(sample_texts)                 # 无字典且样本足够时训练并保存字典（只训练一次）
+    stored = codec.encode(text)               # -> "zs1:..."（无字典或zstandard未安装时原样返回）
+    text = codec.decode(stored)               # 兼容未压缩的历史数据
+
+说明：
+- Milvus没有变长二进制标量类型，压缩结果用base64编码后存VARCHAR，并加 "zs1:" 前缀区分未压缩的旧数据
+- 中文政策文本在训练字典下约可压缩3-4倍（base64膨胀4/3后仍约2.5倍）
+- 只在有字典时压缩：短chunk不用字典压缩后再base64，反而比原文更大
+- 字典一旦用于写入就不能替换或丢失，否则已入库的正文无法解码
+- zstandard为可选依赖，未安装时直接存原文
+"""
+from typing import List, Optional
+from pathlib import Path
+import base64
+import threading
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+
+# 压缩数据前缀（未带前缀的值视为原文）
+_PREFIX = "zs1:"
+# 字典大小与训练所需的最少样本数
+_DICT_SIZE = 100_000
+_MIN_TRAIN_SAMPLES = 1000
+
+
+class ContentCodec:
+    """chunk正文的zstd压缩/解压"""
+
+    def __init__(self, dict_path: Path, level: int = 19):
+        """
+        初始化编解码器
+
+        Args:
+            dict_path: zstd字典文件路径（*.zdict）
+            level: 压缩级别（chunk只压缩一次、解压多次，取高压缩比）
+        """
+        self.dict_path = Path(dict_path)
+        self.level = level
+        self._dict: Optional["zstd.ZstdCompressionDict"] = None
+        # zstd的压缩/解压器不是线程安全的（多线程共用会报Data corruption），每个线程各建一份
+        self._local = threading.local()
+
+        if zstd is not None and self.dict_path.exists():
+            self._dict = zstd.ZstdCompressionDict(self.dict_path.read_bytes())
+
+    @property
+    def enabled(self) -> bool:
+        return zstd is not None
+
+    @property
+    def has_dictionary(self) -> bool:
+        return self._dict is not None
+
+    def _codecs(self) -> threading.local:
+        """当前线程的压缩/解压器（字典变化后重建）"""
+        local = self._local
+        if not hasattr(local, 'decompressor') or local.dict is not self._dict:
+            local.dict = self._dict
+            local.compressor = zstd.ZstdCompressor(level=self.level, dict_data=self._dict)
+            local.decompressor = zstd.ZstdDecompressor(dict_data=self._dict)
+        return local
+
+    def train(self, samples: List[str]) -> bool:
+        """
+        用样本训练字典并保存（已有字典或样本不足时跳过）
+
+        Returns:
+            是否训练了新字典
+        """
+        if zstd is None or self._dict is not None or len(samples) < _MIN_TRAIN_SAMPLES:
+            return False
+        try:
+            self._dict = zstd.train_dictionary(_DICT_SIZE, [text.encode('utf-8') for text in samples if text])
+        except Exception as e:
+            print(f"[ContentCodec] ⚠️ zstd字典训练失败: {e}，不使用字典压缩")
+            return False
+        self.dict_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.dict_path.with_suffix('.tmp')
+        tmp_path.write_bytes(self._dict.as_bytes())
+        tmp_path.replace(self.dict_path)
+        print(f"[ContentCodec] ✅ zstd字典训练完成（{len(samples)} 个样本）: {self.dict_path}")
+        return True
+
+    def encode(self, text: str) -> str:
+        """压缩正文（还没有字典或zstandard未安装时原样返回）"""
+        if zstd is None or self._dict is None or not text:
+            return text
+        return _PREFIX + base64.b64encode(self._codecs().compressor.compress(text.encode('utf-8'))).decode('ascii')
+
+    def decode(self, value: Optional[str]) -> Optional[str]:
+        """解压正文（未带压缩前缀的旧数据原样返回）"""
+        if not value or not value.startswith(_PREFIX):
+            return value
+        if zstd is None:
+            raise RuntimeError("正文为zstd压缩数据，需要安装zstandard才能读取")
+        return self._codecs().decompressor.decompress(base64.b64decode(value[len(_PREFIX):])).decode('utf-8')
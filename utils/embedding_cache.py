@@ -0,0 +1,79 @@
+"""
+Embedding缓存 - 按 (模型, 文本) 哈希持久化缓存FP16向量
+
+使用方式：
+    from utils.embedding_cache import get_embedding_cache
+
+    cache = get_embedding_cache("xiaobu-embedding-v2")
+    keys = [cache.make_key(text) for text in texts]
+    cached = cache.get_many(keys)          # {key: np.float16向量}
+    ...
+    cache.set_many({key: vector, ...})
+
+说明：
+- 存储为 SQLite（标准库，无额外依赖，见utils/sqlite_kv.py），按模型名分文件
+- 向量以float16小端字节保存（1792维约3.5KB/条），读取时还原为np.float16数组
+- 只缓存归一化后的向量；模型或归一化方式变化时应换用新的命名空间
+"""
+from typing import Dict, List
+from pathlib import Path
+import hashlib
+import threading
+
+import numpy as np
+
+from config import EMBEDDING_CACHE_DIR
+from utils.sqlite_kv import SQLiteKVStore
+
+
+class EmbeddingCache:
+    """基于SQLite的embedding向量缓存（线程安全）"""
+
+    def __init__(self, namespace: str, cache_dir: Path = EMBEDDING_CACHE_DIR):
+        """
+        初始化缓存
+
+        Args:
+            namespace: 缓存命名空间（通常为模型名，对应一个SQLite文件）
+            cache_dir: 缓存目录
+        """
+        self.namespace = namespace
+        self._store = SQLiteKVStore(
+            Path(cache_dir) / f"{namespace}.sqlite3",
+            encode=lambda vector: np.asarray(vector, dtype='<f2').tobytes(),
+            decode=lambda value: np.frombuffer(value, dtype='<f2'),
+            tag="EmbeddingCache",
+            value_type="BLOB"
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._store.enabled
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        """由文本生成sha256缓存键"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """批量读取缓存，只返回命中的 {key: np.float16向量}"""
+        return self._store.get_many(keys)
+
+    def set_many(self, items: Dict[str, np.ndarray]):
+        """批量写入缓存（失败时静默跳过，不影响主流程）"""
+        self._store.set_many(items)
+
+
+# 全局单例（按namespace）
+_cache_instances: Dict[str, EmbeddingCache] = {}
+_cache_instances_lock = threading.Lock()
+
+
+def get_embedding_cache(namespace: str) -> EmbeddingCache:
+    """获取指定namespace的缓存单例"""
+    with _cache_instances_lock:
+        cache = _cache_instances.get(namespace)
+        if cache is None:
+            cache = EmbeddingCache(namespace)
+            _cache_instances[namespace] = cache
+        return cache
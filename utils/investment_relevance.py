@@ -9,9 +9,22 @@
 
 注意：报告系列（会议系列）标签已改为纯人工标注，不再由LLM自动判断
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from models import PolicySegment
 from core.clients.ds32b_client import get_ds32b_client
+from utils.llm_cache import get_llm_cache
+from config import DS32B_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# prompt版本号：修改合并判断的prompt时需要+1，使旧缓存失效
+PROMPT_VERSION = 1
+
+# 从响应中第一个'{'处解码JSON对象（raw_decode自行确定结束位置，字符串中的花括号不受影响）
+_JSON_DECODER = json.JSONDecoder()
 
 # 中信一级行业列表（用于LLM打标）
 CITIC_LEVEL1_INDUSTRIES = [
@@ -20,11 +33,31 @@ CITIC_LEVEL1_INDUSTRIES = [
     "家电", "纺织服装", "医药", "食品饮料", "农林牧渔", "银行", "非银行金融", "房地产",
     "交通运输", "电力及公用事业", "电子", "通信", "计算机", "传媒", "综合", "综合金融"
 ]
+# 成员判断用（列表保留给prompt按顺序展示）
+_CITIC_SET = frozenset(CITIC_LEVEL1_INDUSTRIES)
+
+
+def _prepare_previews(matched_segments: Dict[str, List[Dict]],
+                      max_per_industry: int = 3, max_chars: int = 200) -> Dict[str, str]:
+    """
+    每个行业匹配片段的prompt预览文本（编号列表，每段截断到max_chars），每个政策构建一次
+    
+    Returns:
+        {行业: 预览文本}，没有有效片段的行业不出现
+    """
+    previews = {}
+    for industry, segments in matched_segments.items():
+        sentences = [seg['sentence'].strip()[:max_chars]
+                     for seg in segments[:max_per_industry] if seg.get('sentence')]
+        if sentences:
+            previews[industry] = "\n".join(f"{i}. {sent}" for i, sent in enumerate(sentences, 1))
+    return previews
 
 
 def judge_investment_and_industries(segment: PolicySegment, 
                                     candidate_industries: List[str],
-                                    matched_segments: Dict[str, List[Dict]]) -> Dict[str, Any]:
+                                    matched_segments: Dict[str, List[Dict]],
+                                    previews: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     """
     合并判断：LLM行业打标 + 投资相关性 + 行业过滤（一次DS32B调用）
     
@@ -38,6 +71,7 @@ def judge_investment_and_industries(segment: PolicySegment,
         segment: 政策文档
         candidate_industries: 关键词匹配得到的候选行业列表
         matched_segments: 每个行业匹配到的政策片段
+        previews: _prepare_previews(matched_segments)的结果（重复调用时可预先构建传入）
         
     Returns:
         {
@@ -53,24 +87,20 @@ def judge_investment_and_industries(segment: PolicySegment,
     title = segment.title
     
     # 构建关键词匹配的行业信息（板块+对应政策片段）
-    industry_sections = []
-    for industry in candidate_industries:
-        segments = matched_segments.get(industry, [])
-        if not segments:
-            continue
-        policy_sentences = [seg.get('sentence', '').strip()[:200] for seg in segments[:3] if seg.get('sentence')]
-        if policy_sentences:
-            policy_text = "\n".join([f"{i}. {sent}" for i, sent in enumerate(policy_sentences, 1)])
-            industry_sections.append(f"板块：{industry}\n匹配到的政策片段：\n{policy_text}")
+    if previews is None:
+        previews = _prepare_previews(matched_segments)
+    industry_sections = [
+        f"板块：{industry}\n匹配到的政策片段：\n{previews[industry]}"
+        for industry in candidate_industries if industry in previews
+    ]
     
     keyword_industry_text = "\n\n".join(industry_sections) if industry_sections else "无"
     
-    # 先输出给用户看
-    print(f"\n  [合并判断：LLM行业打标 + 投资相关性 + 行业过滤]")
-    print(f"    标题: {title}")
-    print(f"    内容预览: {content_preview[:200]}...")
+    # 调试信息（DEBUG级别才格式化输出）
+    logger.debug("[合并判断：LLM行业打标 + 投资相关性 + 行业过滤] 标题: %s", title)
+    logger.debug("    内容预览: %s...", content_preview[:200])
     if candidate_industries:
-        print(f"    关键词匹配行业: {', '.join(candidate_industries)}")
+        logger.debug("    关键词匹配行业: %s", ', '.join(candidate_industries))
     
     # 构建候选行业列表字符串
     keyword_candidate_list = ", ".join(candidate_industries) if candidate_industries else "无"
@@ -138,46 +168,39 @@ def judge_investment_and_industries(segment: PolicySegment,
         {"role": "user", "content": prompt}
     ]
     
+    # 同一政策重复入库（流水线重跑）时prompt完全相同：按prompt内容缓存DS32B的原始响应
+    llm_cache = get_llm_cache("investment_relevance")
+    cache_key = llm_cache.make_key(
+        "judge_investment_and_industries", PROMPT_VERSION, messages[0]["content"], prompt
+    )
+    
     try:
-        response = client.chat_completion(messages)
+        response = llm_cache.get(cache_key)
+        from_cache = response is not None
+        if not from_cache:
+            response = client.chat_completion(messages)
         if response:
-            # 尝试解析JSON
-            import json
-            
-            # 提取JSON部分（支持嵌套JSON）
+            # 提取并解析JSON部分（支持嵌套JSON，忽略JSON之后的多余文字）
             start_idx = response.find('{')
             if start_idx != -1:
-                brace_count = 0
-                end_idx = start_idx
-                for i in range(start_idx, len(response)):
-                    if response[i] == '{':
-                        brace_count += 1
-                    elif response[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end_idx = i + 1
-                            break
-                
-                if end_idx > start_idx:
-                    json_str = response[start_idx:end_idx]
-                else:
-                    json_str = None
-            else:
-                json_str = None
-            
-            if json_str:
                 try:
-                    result = json.loads(json_str)
+                    result, _ = _JSON_DECODER.raw_decode(response, start_idx)
+                    # 只缓存能解析出JSON的响应，请求失败/格式异常的结果下次重新调用
+                    if not from_cache:
+                        llm_cache.set(cache_key, response)
                     
                     # 1. 提取LLM打标的行业
                     llm_industries = result.get('llm_industries', [])
                     # 过滤：只保留有效的中信一级行业
-                    llm_industries = [ind for ind in llm_industries if ind in CITIC_LEVEL1_INDUSTRIES]
-                    print(f"    [LLM打标] 识别行业: {llm_industries}")
+                    llm_industries = [ind for ind in llm_industries if ind in _CITIC_SET]
+                    logger.debug("    [LLM打标] 识别行业: %s", llm_industries)
                     
-                    # 2. 合并关键词匹配和LLM打标结果（去重）
-                    all_industries = list(set(candidate_industries + llm_industries))
-                    print(f"    [合并结果] 关键词({len(candidate_industries)}) + LLM({len(llm_industries)}) = {len(all_industries)} 个行业")
+                    # 2. 合并关键词匹配和LLM打标结果（去重，保持先关键词后LLM的顺序，输出稳定）
+                    all_industries = list(dict.fromkeys(candidate_industries + llm_industries))
+                    llm_industry_set = set(llm_industries)
+                    keyword_industry_set = set(candidate_industries)
+                    logger.debug("    [合并结果] 关键词(%d) + LLM(%d) = %d 个行业",
+                                 len(candidate_industries), len(llm_industries), len(all_industries))
                     
                     # 3. 提取投资相关性
                     investment_relevance = result.get('investment_relevance', '低')
@@ -186,7 +209,7 @@ def judge_investment_and_industries(segment: PolicySegment,
                     
                     # 4. 提取行业过滤结果
                     industry_filter = result.get('industry_filter', {})
-                    print(f"    [DS32B返回] industry_filter: {industry_filter}")
+                    logger.debug("    [DS32B返回] industry_filter: %s", industry_filter)
                     
                     filtered_industries = []
                     
@@ -204,8 +227,8 @@ def judge_investment_and_industries(segment: PolicySegment,
                         # 3. 如果DS32B明确返回"否"，不保留
                         should_keep = False
                         reason = ""
-                        is_from_llm = industry in llm_industries
-                        is_from_keyword = industry in candidate_industries
+                        is_from_llm = industry in llm_industry_set
+                        is_from_keyword = industry in keyword_industry_set
                         
                         if decision is None:
                             # DS32B没有返回该行业
@@ -233,18 +256,17 @@ def judge_investment_and_industries(segment: PolicySegment,
                             if is_from_llm:
                                 source.append("LLM")
                             source_str = "+".join(source)
-                            print(f"    [保留] {industry} ({source_str}): {len(policy_segments_list)} 个片段 ({reason})")
+                            logger.debug("    [保留] %s (%s): %d 个片段 (%s)", industry, source_str, len(policy_segments_list), reason)
                             filtered_industries.append({
                                 'industry': industry,
                                 'policy_segments': policy_segments_list,
                                 'source': source_str
                             })
                         else:
-                            print(f"    [过滤] {industry}: ({reason})")
+                            logger.debug("    [过滤] %s: (%s)", industry, reason)
                     
-                    print(f"    ✅ 投资相关性: {investment_relevance}")
-                    print(f"    ✅ 最终行业: {len(filtered_industries)}/{len(all_industries)} 个")
-                    print(f"    ⚠️ 报告系列: 需人工标注（使用manual_label_editor.ipynb）")
+                    logger.info("✅ 合并判断完成《%s》: 投资相关性=%s，最终行业 %d/%d 个（报告系列需人工标注）",
+                                title, investment_relevance, len(filtered_industries), len(all_industries))
                     
                     return {
                         'investment_relevance': investment_relevance,
@@ -254,7 +276,7 @@ def judge_investment_and_industries(segment: PolicySegment,
                         'keyword_industries': candidate_industries  # 额外返回关键词匹配结果
                     }
                 except json.JSONDecodeError:
-                    print(f"    ⚠️ JSON解析失败，使用保守策略")
+                    logger.warning("⚠️ 《%s》DS32B响应JSON解析失败，使用保守策略", title)
             
             # 如果JSON解析失败，尝试简单文本解析
             result_text = response.strip()
@@ -272,7 +294,7 @@ def judge_investment_and_industries(segment: PolicySegment,
                     'source': '关键词'
                 })
             
-            print(f"    ⚠️ 使用保守策略（投资相关性: {investment_relevance}，保留所有关键词匹配行业）")
+            logger.warning("⚠️ 《%s》使用保守策略（投资相关性: %s，保留所有关键词匹配行业）", title, investment_relevance)
             return {
                 'investment_relevance': investment_relevance,
                 'report_series': 'N/A',
@@ -282,8 +304,7 @@ def judge_investment_and_industries(segment: PolicySegment,
             }
             
     except Exception as e:
-        print(f"    ❌ 判断失败: {e}")
-        print(f"[合并判断] 失败: {e}")
+        logger.warning("❌ 《%s》合并判断失败: %s", title, e)
     
     # 默认返回（保守策略）
     filtered_industries = []
@@ -302,3 +323,25 @@ def judge_investment_and_industries(segment: PolicySegment,
         'llm_industries': [],
         'keyword_industries': candidate_industries
     }
+
+
+def judge_investment_and_industries_batch(
+        items: List[Tuple[PolicySegment, List[str], Dict[str, List[Dict]]]],
+        max_workers: int = DS32B_MAX_WORKERS) -> List[Dict[str, Any]]:
+    """
+    批量合并判断：多个政策的DS32B调用并发执行，N次串行往返变为约N/max_workers轮
+    
+    每个政策仍是独立的一次调用（prompt与单条判断完全相同），只是并发发出。
+    
+    Args:
+        items: [(segment, candidate_industries, matched_segments), ...]
+        max_workers: 最大并发请求数
+        
+    Returns:
+        与items顺序一致的判断结果列表（格式同judge_investment_and_industries）
+    """
+    if len(items) <= 1 or max_workers <= 1:
+        return [judge_investment_and_industries(*item) for item in items]
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(lambda item: judge_investment_and_industries(*item), items))
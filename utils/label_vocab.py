@@ -0,0 +1,96 @@
+"""
+标签字典 - 低基数字符串字段（行业、报告系列、投资相关性）与INT32编号互转
+
+使用方式：
+    from utils.label_vocab import LabelVocab
+
+    vocab = LabelVocab(path)                            # 文件不存在时为空字典
+    vocab.encode("report_series", "晨会纪要")           # -> 1（新标签自动分配编号）
+    vocab.encode_list("industries", "电子,计算机")      # -> [1, 2]
+    vocab.decode("report_series", 1)                    # -> "晨会纪要"
+    vocab.decode_list("industries", [1, 2])             # -> "电子,计算机"
+    vocab.save()                                        # 有新增标签时写回JSON
+
+说明：
+- 编号0固定表示空字符串，已分配的编号永不变更（Milvus中存的是编号，改动会导致历史数据错乱）
+- 多值字段（industries）按逗号分隔，编码为编号列表
+- 字典以JSON保存：{字段名: {标签: 编号}}
+"""
+from typing import Dict, List
+from pathlib import Path
+import json
+
+
+class LabelVocab:
+    """按字段维护的 标签 <-> 编号 字典（持久化为JSON）"""
+
+    def __init__(self, path: Path):
+        """
+        初始化字典
+
+        Args:
+            path: JSON文件路径
+        """
+        self.path = Path(path)
+        self._label_to_id: Dict[str, Dict[str, int]] = {}
+        self._id_to_label: Dict[str, Dict[int, str]] = {}
+        self._dirty = False
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for field, mapping in json.load(f).items():
+                        self._label_to_id[field] = {label: int(i) for label, i in mapping.items()}
+            except Exception as e:
+                print(f"[LabelVocab] ⚠️ 读取标签字典失败（{self.path}）: {e}")
+                raise
+        for field, mapping in self._label_to_id.items():
+            self._id_to_label[field] = {i: label for label, i in mapping.items()}
+
+    def encode(self, field: str, label: str) -> int:
+        """标签 -> 编号（新标签分配下一个编号；空值为0）"""
+        label = (label or "").strip()
+        if not label:
+            return 0
+        mapping = self._label_to_id.setdefault(field, {})
+        label_id = mapping.get(label)
+        if label_id is None:
+            label_id = max(mapping.values(), default=0) + 1
+            mapping[label] = label_id
+            self._id_to_label.setdefault(field, {})[label_id] = label
+            self._dirty = True
+        return label_id
+
+    def encode_list(self, field: str, labels: str) -> List[int]:
+        """逗号分隔的多值标签 -> 编号列表（去重，保持顺序）"""
+        ids = [self.encode(field, label) for label in (labels or "").split(',')]
+        return list(dict.fromkeys(i for i in ids if i))
+
+    def lookup(self, field: str, label: str):
+        """标签 -> 编号（不分配新编号；未知标签返回None）"""
+        label = (label or "").strip()
+        if not label:
+            return 0
+        return self._label_to_id.get(field, {}).get(label)
+
+    def decode(self, field: str, label_id) -> str:
+        """编号 -> 标签（未知编号返回空字符串）"""
+        if label_id is None:
+            return ""
+        return self._id_to_label.get(field, {}).get(int(label_id), "")
+
+    def decode_list(self, field: str, label_ids) -> str:
+        """编号列表 -> 逗号分隔的标签"""
+        labels = [self.decode(field, i) for i in (label_ids or [])]
+        return ','.join(label for label in labels if label)
+
+    def save(self):
+        """有新增标签时写回JSON（先写临时文件再替换，避免中断导致文件损坏）"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._label_to_id, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(self.path)
+        self._dirty = False
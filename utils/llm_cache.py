@@ -0,0 +1,82 @@
+"""
+LLM响应缓存 - 按内容哈希持久化缓存低温度LLM调用的结果
+
+使用方式：
+    from utils.llm_cache import get_llm_cache
+
+    cache = get_llm_cache("novelty")
+    key = cache.make_key("split_dimensions", PROMPT_VERSION, segment.doc_id, segment.content, topic)
+    result = cache.get(key)
+    if result is None:
+        result = call_llm(...)
+        cache.set(key, result)
+
+说明：
+- 存储为 SQLite（标准库，无额外依赖，见utils/sqlite_kv.py），按 namespace 分文件
+- 值以JSON保存，只适合 str / list / dict 等可序列化结果
+- prompt 变化时调用方应提升 key 中的版本号，使旧缓存自然失效
+"""
+from typing import Any, Dict, Optional
+from pathlib import Path
+import hashlib
+import json
+import threading
+
+from config import LLM_CACHE_DIR
+from utils.sqlite_kv import SQLiteKVStore
+
+
+class LLMResponseCache:
+    """基于SQLite的LLM响应缓存（线程安全）"""
+
+    def __init__(self, namespace: str, cache_dir: Path = LLM_CACHE_DIR):
+        """
+        初始化缓存
+
+        Args:
+            namespace: 缓存命名空间（对应一个SQLite文件）
+            cache_dir: 缓存目录
+        """
+        self.namespace = namespace
+        self._store = SQLiteKVStore(
+            Path(cache_dir) / f"{namespace}.sqlite3",
+            encode=lambda value: json.dumps(value, ensure_ascii=False),
+            decode=json.loads,
+            tag="LLMCache"
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._store.enabled
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """由任意多个部分（prompt版本、doc_id、原文、主题等）生成sha256缓存键"""
+        hasher = hashlib.sha256()
+        for part in parts:
+            hasher.update(str(part).encode('utf-8'))
+            hasher.update(b'\x1f')
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中返回None"""
+        return self._store.get_many([key]).get(key)
+
+    def set(self, key: str, value: Any):
+        """写入缓存（失败时静默跳过，不影响主流程）"""
+        self._store.set_many({key: value})
+
+
+# 全局单例（按namespace）
+_cache_instances: Dict[str, LLMResponseCache] = {}
+_cache_instances_lock = threading.Lock()
+
+
+def get_llm_cache(namespace: str) -> LLMResponseCache:
+    """获取指定namespace的缓存单例"""
+    with _cache_instances_lock:
+        cache = _cache_instances.get(namespace)
+        if cache is None:
+            cache = LLMResponseCache(namespace)
+            _cache_instances[namespace] = cache
+        return cache
@@ -9,6 +9,7 @@ Reranker模块 - 二阶段精排（提升检索精度）
     results = reranker.rerank(query, results, top_k=10)  # 精排：选出最好的10个
 """
 from typing import List, Dict, Any
+import threading
 import torch
 
 
@@ -24,6 +25,9 @@ class BCEReranker:
         """
         print(f"[Reranker] 正在加载模型: {model_name}")
         
+        # 模型与fast tokenizer都不支持并发调用（多线程同时tokenize会报"Already borrowed"），打分时串行
+        self._lock = threading.Lock()
+        
         try:
             from sentence_transformers import CrossEncoder
             
@@ -54,7 +58,9 @@ class BCEReranker:
             
             print(f"[Reranker] ✅ 模型已加载")
             if torch.cuda.is_available():
-                print(f"[Reranker] ✅ 使用GPU: {torch.cuda.get_device_name(0)}")
+                # GPU上使用fp16推理：显存与带宽减半，cross-encoder打分精度损失可忽略
+                self.model.model.half()
+                print(f"[Reranker] ✅ 使用GPU(fp16): {torch.cuda.get_device_name(0)}")
             else:
                 print(f"[Reranker] ⚠️ 使用CPU（速度较慢）")
             
@@ -81,7 +87,9 @@ class BCEReranker:
         results: List[Dict[str, Any]], 
         top_k: int = 10,
         query_max_length: int = 512,
-        passage_max_length: int = 512
+        passage_max_length: int = 512,
+        batch_size: int = 64,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         对检索结果进行重排序
@@ -92,9 +100,11 @@ class BCEReranker:
             top_k: 返回top-K结果
             query_max_length: query最大长度
             passage_max_length: passage最大长度
+            batch_size: 每批打分的query-passage对数量
+            raise_errors: 打分失败时抛出异常（默认返回原始顺序、分数记为0）
             
         Returns:
-            重排序后的结果列表（添加了'rerank_score'字段）
+            重排序后的结果列表（添加了'rerank_score'字段，取值[0,1]）
         """
         if not self.enabled:
             print(f"[Reranker] ⚠️ Reranker未启用，返回原始结果")
@@ -120,7 +130,8 @@ class BCEReranker:
         
         # 批量计算精排分数
         try:
-            scores = self.model.predict(pairs, show_progress_bar=False)
+            with self._lock:
+                scores = self.model.predict(pairs, batch_size=batch_size, show_progress_bar=False)
             
             # 将分数添加到结果中
             for i, result in enumerate(results):
@@ -143,6 +154,8 @@ class BCEReranker:
             
         except Exception as e:
             print(f"[Reranker] ❌ 精排失败: {e}，返回原始结果")
+            if raise_errors:
+                raise
             import traceback
             print(f"[Reranker] 错误详情:")
             traceback.print_exc()
@@ -157,6 +170,7 @@ class BCEReranker:
 
 # 全局单例
 _reranker_instance = None
+_reranker_instance_lock = threading.Lock()
 
 
 def get_reranker():
@@ -166,23 +180,24 @@ def get_reranker():
     优先尝试手动加载方式（绕过torch版本检查），失败后回退到标准加载
     """
     global _reranker_instance
-    if _reranker_instance is None:
-        # 优先尝试手动加载（避免torch版本问题）
-        try:
-            from .reranker_manual import get_manual_reranker
-            print("[Reranker] 尝试使用手动加载方式...")
-            manual_reranker = get_manual_reranker()
-            if manual_reranker.enabled:
-                print("[Reranker] ✅ 手动加载成功！")
-                _reranker_instance = manual_reranker
-                return _reranker_instance
-            else:
-                print("[Reranker] ⚠️ 手动加载失败，尝试标准加载...")
-        except Exception as e:
-            print(f"[Reranker] ⚠️ 手动加载出错: {e}，尝试标准加载...")
+    with _reranker_instance_lock:  # 多线程首次调用时只加载一次模型
+        if _reranker_instance is None:
+            # 优先尝试手动加载（避免torch版本问题）
+            try:
+                from .reranker_manual import get_manual_reranker
+                print("[Reranker] 尝试使用手动加载方式...")
+                manual_reranker = get_manual_reranker()
+                if manual_reranker.enabled:
+                    print("[Reranker] ✅ 手动加载成功！")
+                    _reranker_instance = manual_reranker
+                    return _reranker_instance
+                else:
+                    print("[Reranker] ⚠️ 手动加载失败，尝试标准加载...")
+            except Exception as e:
+                print(f"[Reranker] ⚠️ 手动加载出错: {e}，尝试标准加载...")
+            
+            # 回退到标准加载
+            _reranker_instance = BCEReranker()
         
-        # 回退到标准加载
-        _reranker_instance = BCEReranker()
-    
-    return _reranker_instance
+        return _reranker_instance
 
@@ -3,6 +3,7 @@ Reranker手动加载版 - 绕过torch版本检查
 直接加载safetensors文件，不依赖transformers的自动加载机制
 """
 from typing import List, Dict, Any
+import threading
 import torch
 import os
 from pathlib import Path
@@ -21,6 +22,8 @@ class ManualBCEReranker:
         print(f"[Reranker-手动] 正在初始化模型: {model_name}")
         
         self.enabled = False
+        # 模型与fast tokenizer都不支持并发调用（多线程同时tokenize会报"Already borrowed"），按批串行
+        self._lock = threading.Lock()
         
         try:
             # 1. 检查是否已下载模型
@@ -102,9 +105,10 @@ class ManualBCEReranker:
             
             # 4. 移动到GPU
             if torch.cuda.is_available():
-                self.model = self.model.cuda()
+                # GPU上使用fp16推理：显存与带宽减半，可用更大的batch
+                self.model = self.model.cuda().half()
                 self.device = 'cuda'
-                print(f"[Reranker-手动] ✅ 模型已加载到GPU: {torch.cuda.get_device_name(0)}")
+                print(f"[Reranker-手动] ✅ 模型已加载到GPU(fp16): {torch.cuda.get_device_name(0)}")
             else:
                 self.device = 'cpu'
                 print(f"[Reranker-手动] ⚠️ 使用CPU（速度较慢）")
@@ -166,7 +170,8 @@ class ManualBCEReranker:
         top_k: int = 10,
         query_max_length: int = 512,
         passage_max_length: int = 512,
-        batch_size: int = 32
+        batch_size: int = 64,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         对检索结果进行重排序（分批处理，避免显存溢出）
@@ -177,10 +182,11 @@ class ManualBCEReranker:
             top_k: 返回top-K结果
             query_max_length: query最大长度
             passage_max_length: passage最大长度
-            batch_size: 每批处理的文档数量（默认32，8GB显存建议16-32）
+            batch_size: 每批处理的文档数量（默认64，fp16下8GB显存可用；CPU或显存紧张时可调小）
+            raise_errors: 打分失败时抛出异常（默认返回原始顺序、分数记为0）
             
         Returns:
-            重排序后的结果列表（添加了'rerank_score'字段）
+            重排序后的结果列表（添加了'rerank_score'字段，取值[0,1]）
         """
         if not self.enabled:
             print(f"[Reranker-手动] ⚠️ Reranker未启用，返回原始结果")
@@ -210,23 +216,25 @@ class ManualBCEReranker:
                     passage = r.get('content', '')[:passage_max_length]
                     pairs.append((query[:query_max_length], passage))
                 
-                # 批量tokenize
-                encoded = self.tokenizer(
-                    pairs,
-                    padding=True,
-                    truncation=True,
-                    max_length=512,
-                    return_tensors='pt'
-                )
-                
-                # 移动到GPU
-                if self.device == 'cuda':
-                    encoded = {k: v.cuda() for k, v in encoded.items()}
-                
-                # 推理
-                with torch.no_grad():
-                    outputs = self.model(**encoded)
-                    batch_scores = outputs.logits.squeeze(-1).cpu().numpy()
+                with self._lock:
+                    # 批量tokenize
+                    encoded = self.tokenizer(
+                        pairs,
+                        padding=True,
+                        truncation=True,
+                        max_length=512,
+                        return_tensors='pt'
+                    )
+                    
+                    # 移动到GPU
+                    if self.device == 'cuda':
+                        encoded = {k: v.cuda() for k, v in encoded.items()}
+                    
+                    # 推理
+                    with torch.no_grad():
+                        outputs = self.model(**encoded)
+                        # sigmoid把logit映射为[0,1]相关概率，与CrossEncoder（BCEReranker）的分数尺度一致
+                        batch_scores = torch.sigmoid(outputs.logits.squeeze(-1).float()).cpu().numpy()
                 
                 # 收集分数
                 if batch_scores.ndim == 0:
@@ -262,6 +270,8 @@ class ManualBCEReranker:
             
         except Exception as e:
             print(f"[Reranker-手动] ❌ 精排失败: {e}")
+            if raise_errors:
+                raise
             import traceback
             traceback.print_exc()
             for i, result in enumerate(results):
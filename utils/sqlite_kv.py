@@ -0,0 +1,104 @@
+"""
+SQLite键值存储 - LLM响应缓存、embedding缓存、chunk负载存储共用的底层表
+
+使用方式：
+    from utils.sqlite_kv import SQLiteKVStore
+
+    store = SQLiteKVStore(path, encode=json.dumps, decode=json.loads, tag="LLMCache")
+    store.set_many({key: value, ...})
+    found = store.get_many(keys)          # {key: value}，只含命中项
+    store.clear()
+
+说明：
+- 一个SQLite文件一张表：(key 主键, value)，值的序列化由调用方传入的 encode/decode 决定
+- 线程安全（连接跨线程共用，读写持锁）
+- 初始化或读写失败时不抛异常：初始化失败则 enabled=False、读写均为空操作，读失败返回已读到的部分，
+  写失败打印警告后跳过——这些存储都只是加速用的缓存，不能影响主流程
+"""
+from typing import Any, Callable, Dict, Iterable
+from pathlib import Path
+import sqlite3
+import threading
+
+
+# SQLite单条语句的参数上限（旧版本为999），批量查询按此分组
+_SQLITE_MAX_PARAMS = 900
+
+
+class SQLiteKVStore:
+    """基于SQLite的键值表（线程安全，失败静默降级）"""
+
+    def __init__(self, path: Path, encode: Callable[[Any], Any], decode: Callable[[Any], Any],
+                 tag: str, key_type: str = "TEXT", value_type: str = "TEXT", table: str = "cache"):
+        """
+        初始化存储
+
+        Args:
+            path: SQLite文件路径（父目录不存在时自动创建）
+            encode: 值 -> 存入SQLite的对象（str/bytes）
+            decode: SQLite读出的对象 -> 值
+            tag: 日志前缀（如 "LLMCache"）
+            key_type: 键的SQLite类型（TEXT/INTEGER）
+            value_type: 值的SQLite类型（TEXT/BLOB）
+            table: 表名
+        """
+        self.path = Path(path)
+        self.tag = tag
+        self._encode = encode
+        self._decode = decode
+        self._table = table
+        self._lock = threading.Lock()
+        self.enabled = False
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key {key_type} PRIMARY KEY, value {value_type} NOT NULL)"
+            )
+            self._conn.commit()
+            self.enabled = True
+        except Exception as e:
+            print(f"[{tag}] ⚠️ 初始化失败（{self.path.name}）: {e}，本次运行不使用")
+
+    def get_many(self, keys: Iterable[Any]) -> Dict[Any, Any]:
+        """批量读取，只返回命中的 {key: value}"""
+        if not self.enabled:
+            return {}
+        found = {}
+        try:
+            unique_keys = list(dict.fromkeys(keys))
+            with self._lock:
+                for start in range(0, len(unique_keys), _SQLITE_MAX_PARAMS):
+                    part = unique_keys[start:start + _SQLITE_MAX_PARAMS]
+                    placeholders = ",".join("?" * len(part))
+                    rows = self._conn.execute(
+                        f"SELECT key, value FROM {self._table} WHERE key IN ({placeholders})", part
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = self._decode(value)
+            return found
+        except Exception:
+            return found
+
+    def set_many(self, items: Dict[Any, Any]):
+        """批量写入（失败时打印警告后跳过）"""
+        if not self.enabled or not items:
+            return
+        try:
+            rows = [(key, self._encode(value)) for key, value in items.items()]
+            with self._lock:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self._table} (key, value) VALUES (?, ?)", rows
+                )
+                self._conn.commit()
+        except Exception as e:
+            print(f"[{self.tag}] ⚠️ 写入失败（{self.path.name}）: {e}")
+
+    def clear(self):
+        """清空表"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table}")
+            self._conn.commit()
@@ -8,11 +8,20 @@
 - 双层索引：文档级（粗排）+ Chunk级（精排）
 - 时间感知：支持时间过滤和时间加权
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 import torch
 import os
+import json
+import functools
+import platform
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from pymilvus import (
     connections,
@@ -24,8 +33,264 @@ from pymilvus import (
 )
 
 from models import PolicySegment
-from config import OUTPUT_DIR
+from config import OUTPUT_DIR, CHUNK_INDEX_TYPE, CHUNK_GPU_INDEX_MIN_FREE_MB, MILVUS_BULK_INSERT_CONFIG
 from utils.chunking import PolicyDocumentChunker, DocumentChunk
+from utils.embedding_cache import get_embedding_cache
+from utils.bloom_filter import BloomFilter
+from utils.label_vocab import LabelVocab
+from utils.content_codec import ContentCodec
+from utils.chunk_payload_store import ChunkPayloadStore
+
+try:
+    from pymilvus import BulkInsertState
+    from pymilvus.bulk_writer import RemoteBulkWriter, BulkFileType
+except ImportError:
+    RemoteBulkWriter = None
+
+
+# Chunk集合索引：HNSW图上存SQ8（INT8）量化向量做粗排，再用FP16原始向量精排（Milvus HNSW_SQ + refine）
+_CHUNK_INDEX_PARAMS = {
+    "metric_type": "L2",
+    "index_type": "HNSW_SQ",
+    "params": {"M": 16, "efConstruction": 200, "sq_type": "SQ8", "refine": True, "refine_type": "FP16"}
+}
+# GPU CAGRA图索引（cuVS）：批量查询时由GPU并行完成图遍历
+_CHUNK_GPU_INDEX_PARAMS = {
+    "metric_type": "L2",
+    "index_type": "GPU_CAGRA",
+    "params": {"intermediate_graph_degree": 64, "graph_degree": 32}
+}
+_CHUNK_SEARCH_EF = 200      # 搜索ef下限（不足limit时取limit）
+_CHUNK_REFINE_K = 4         # 精排候选放大倍数：粗排取 limit×4 个候选，用FP16向量重新计算距离
+_CHUNK_ITOPK_SIZE = 128     # CAGRA搜索itopk_size下限（不足limit时取limit）
+_SCAN_BATCH_SIZE = 16384    # 全量扫描（query_iterator）每页条数
+
+_ENCODE_TOKEN_BUDGET = 16384  # 单次encode的token预算（按桶内最长文本×条数计，含padding）
+
+# chunk负载字段：检索时Milvus只返回主键和距离，这些字段从本地ChunkPayloadStore读取（未命中再回源Milvus）
+_CHUNK_PAYLOAD_FIELDS = ["chunk_id", "doc_id", "content", "chunk_index", "chunk_type", "title", "timestamp",
+                         "industries", "investment_relevance", "report_series", "industry_policy_segments"]
+
+# 训练正文zstd字典时，从集合中已有数据读取的最多样本数
+_CONTENT_DICT_SAMPLES = 5000
+
+# chunk集合按doc_id哈希划分的分区数（partition key）：doc_id == / in 查询只扫描命中的分区
+_CHUNK_NUM_PARTITIONS = 16
+
+MILVUS_PORT = '19530'
+# wsl子进程合并输出中路由与hostname -I两段之间的分隔行
+_WSL_OUTPUT_SEP = '___SEP___'
+# 没有timeout参数的Milvus调用（如num_entities）在此单线程池中执行，用future.result(timeout)限时
+_RPC_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="milvus-rpc")
+# 上次连接成功的Milvus主机（按运行环境区分），下次启动优先尝试
+_MILVUS_HOST_CACHE = Path.home() / ".cache" / "policy_analysis" / "milvus_host.json"
+
+
+def _parse_segments_json(value: str) -> Dict[str, Any]:
+    """industry_policy_segments的JSON字符串 -> dict（空值或被截断成非法JSON时返回空dict）"""
+    if not value:
+        return {}
+    try:
+        parsed = json.loads(value)
+        return parsed if isinstance(parsed, dict) else {}
+    except ValueError:
+        return {}
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_environment() -> Tuple[bool, bool]:
+    """检测运行环境，返回 (是否Windows, 是否WSL)"""
+    is_windows = platform.system() == 'Windows'
+    is_wsl = False
+    try:
+        # 检测是否在WSL中运行（检查/proc/version或WSL相关环境变量）
+        if os.path.exists('/proc/version'):
+            with open('/proc/version', 'r') as f:
+                version_info = f.read().lower()
+                if 'microsoft' in version_info or 'wsl' in version_info:
+                    is_wsl = True
+    except:
+        pass
+    
+    # 如果明确设置了WSL_DISTRO_NAME，说明在WSL中
+    if os.environ.get('WSL_DISTRO_NAME'):
+        is_wsl = True
+    return is_windows, is_wsl
+
+
+def _environment_key() -> str:
+    is_windows, is_wsl = _detect_environment()
+    return 'wsl' if is_wsl else platform.system().lower()
+
+
+def _load_cached_milvus_host() -> Optional[Tuple[str, str]]:
+    """读取当前运行环境上次连接成功的 (host, port)"""
+    try:
+        cached = json.loads(_MILVUS_HOST_CACHE.read_text(encoding='utf-8'))
+        host_port = cached.get(_environment_key())
+        return tuple(host_port) if host_port else None
+    except Exception:
+        return None
+
+
+def _save_cached_milvus_host(host_port: Tuple[str, str]):
+    """记录当前运行环境连接成功的 (host, port)（失败时静默跳过）"""
+    try:
+        try:
+            cached = json.loads(_MILVUS_HOST_CACHE.read_text(encoding='utf-8'))
+        except Exception:
+            cached = {}
+        if cached.get(_environment_key()) == list(host_port):
+            return
+        cached[_environment_key()] = list(host_port)
+        _MILVUS_HOST_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        _MILVUS_HOST_CACHE.write_text(json.dumps(cached), encoding='utf-8')
+    except Exception:
+        pass
+
+
+@functools.lru_cache(maxsize=1)
+def resolve_milvus_hosts() -> Tuple[Tuple[str, str], ...]:
+    """
+    按运行环境检测可能的Milvus地址，返回按优先级排列、去重后的 (host, port) 列表
+    
+    - 环境变量/Windows注册表中的MILVUS_HOST
+    - Windows：WSL网关IP或WSL IP（通过wsl子进程获取），最后是localhost（需端口转发）
+    - WSL/Linux/Mac：localhost
+    
+    结果在进程内缓存，重复创建MilvusVectorDatabase不会再次启动子进程。
+    """
+    is_windows, is_wsl = _detect_environment()
+    hosts = []
+    
+    # 优先检查环境变量（允许手动指定主机）
+    milvus_host = os.environ.get('MILVUS_HOST')
+    if not milvus_host and is_windows:
+        # 如果当前进程中没有，尝试从注册表读取用户级环境变量（Windows）
+        try:
+            import winreg
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Environment')
+            try:
+                milvus_host, _ = winreg.QueryValueEx(key, 'MILVUS_HOST')
+                winreg.CloseKey(key)
+            except FileNotFoundError:
+                winreg.CloseKey(key)
+                milvus_host = None
+        except:
+            milvus_host = None
+    
+    if milvus_host:
+        hosts.append(milvus_host)
+    
+    # 根据运行环境选择连接方式
+    if is_windows and not is_wsl:
+        # 在Windows中运行：需要尝试WSL网关IP或配置端口转发
+        wsl_gateway_ip = None
+        # 一次wsl子进程同时取默认路由和hostname -I（每次启动wsl都有数百毫秒的互操作开销），用分隔行拆分两段输出
+        try:
+            result = subprocess.run(
+                ['wsl', 'bash', '-c', f"ip route show default | head -1; echo {_WSL_OUTPUT_SEP}; hostname -I"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            route_output, _, hostname_output = result.stdout.partition(_WSL_OUTPUT_SEP)
+            route_output = route_output.strip()
+            
+            # 方法1: WSL2的默认网关IP（Windows主机在WSL网络中的IP）- 这是从Windows访问WSL服务的正确IP
+            if route_output:
+                print(f"[MilvusVectorDB] 🔍 WSL路由命令输出: '{route_output}'")
+                
+                # 从路由输出中提取IP（格式：default via 172.28.48.1 dev eth0...）
+                ip_match = re.search(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', route_output)
+                if ip_match:
+                    wsl_gateway_ip = ip_match.group(1)
+                    hosts.append(wsl_gateway_ip)
+                    print(f"[MilvusVectorDB] ✅ 检测到WSL网关IP（Windows在WSL中的IP）: {wsl_gateway_ip} ⭐ 这是从Windows访问WSL的正确IP")
+                else:
+                    print(f"[MilvusVectorDB] ⚠️ 无法从路由输出中提取IP: '{route_output}'")
+            else:
+                print(f"[MilvusVectorDB] ⚠️ WSL路由命令无输出，返回码: {result.returncode}")
+                if result.stderr:
+                    print(f"[MilvusVectorDB] ⚠️ 错误输出: {result.stderr[:200]}")
+            
+            # 方法2: 网关IP检测失败时，从WSL hostname -I获取第一个IP（可能是网关IP）
+            if not wsl_gateway_ip:
+                # 通常第一个IP是主IP，可能是172.x.x.x格式（WSL2常用）
+                for wsl_ip in hostname_output.strip().split()[:2]:  # 只取前2个IP尝试
+                    if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', wsl_ip) and \
+                            (wsl_ip.startswith('172.') or wsl_ip.startswith('192.168.')):
+                        hosts.append(wsl_ip)
+                        print(f"[MilvusVectorDB] 🔍 检测到WSL IP: {wsl_ip}")
+                        break
+        except Exception as e:
+            print(f"[MilvusVectorDB] ⚠️ 无法获取WSL网关IP/WSL IP，异常: {type(e).__name__}: {e}")
+    
+    # 最后尝试localhost（WSL/Linux/Mac直接可用；Windows需要WSL端口转发配置）
+    # localhost与127.0.0.1是同一地址，只保留一个，避免服务未启动时重复等待超时
+    hosts.append('localhost')
+    return tuple((host, MILVUS_PORT) for host in dict.fromkeys(hosts))
+
+
+def _connect_first(candidates: List[Tuple[Tuple[str, str], int]]) -> Tuple[Optional[Tuple[str, str]], Optional[Exception]]:
+    """
+    依次尝试连接 [((host, port), 超时秒数), ...]
+    
+    Returns:
+        (连接成功的 (host, port) 或 None, 最后一次连接错误)
+    """
+    last_error = None
+    if candidates:
+        print(f"[MilvusVectorDB] 🔍 尝试连接Milvus，共 {len(candidates)} 个配置...")
+    for i, ((host, port), timeout) in enumerate(candidates):
+        try:
+            print(f"[MilvusVectorDB]   尝试 {i+1}/{len(candidates)}: {host}:{port}")
+            connections.connect(
+                alias='default',
+                host=host,
+                port=port,
+                timeout=timeout
+            )
+            print(f"[MilvusVectorDB] ✅ 已连接到Milvus ({host}:{port})")
+            return (host, port), None
+        except Exception as e:
+            print(f"[MilvusVectorDB]   ❌ 连接失败: {str(e)[:100]}")
+            last_error = e
+    return None, last_error
+
+
+class ExistingPairSet:
+    """
+    Milvus中已存在的 (标题, 发布时间) 组合（get_existing_title_timestamp_pairs的返回值）
+    
+    先查布隆过滤器：不在其中的组合一定不存在；命中时再用 title == ... && timestamp == ...
+    精确查询确认，布隆过滤器的假阳性不会让新文档被当作已存在而跳过。
+    """
+    
+    def __init__(self, bloom: BloomFilter, collection: Optional[Collection] = None):
+        self._bloom = bloom
+        self._collection = collection
+        self._confirmed: Dict[Tuple[str, str], bool] = {}
+    
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        if self._collection is None or pair not in self._bloom:
+            return False
+        if pair not in self._confirmed:
+            title, timestamp = (str(part).replace('\\', '\\\\').replace('"', '\\"') for part in pair)
+            try:
+                self._confirmed[pair] = bool(self._collection.query(
+                    expr=f'title == "{title}" && timestamp == "{timestamp}"',
+                    output_fields=["id"],
+                    limit=1
+                ))
+            except Exception as e:
+                # 无法确认时按布隆过滤器的结果处理（宁可不入库，也不重复入库）
+                print(f"[MilvusVectorDB] ⚠️ 确认 (标题, 时间) 是否已存在失败: {e}，按已存在处理")
+                return True
+        return self._confirmed[pair]
+    
+    def __len__(self) -> int:
+        return len(self._bloom)
 
 
 class MilvusVectorDatabase:
@@ -64,160 +329,29 @@ class MilvusVectorDatabase:
         print(f"[MilvusVectorDB] 简化版RAG: {'只使用chunk级别' if chunk_only else '双层索引' if enable_chunking else '禁用'}")
         
         # 1. 连接到Milvus（自动检测运行环境和IP）
-        connection_configs = []
-        
-        # 检测运行环境：是否在WSL中运行
-        import platform
-        is_wsl = False
-        is_windows = platform.system() == 'Windows'
-        
-        try:
-            # 检测是否在WSL中运行（检查/proc/version或WSL相关环境变量）
-            if os.path.exists('/proc/version'):
-                with open('/proc/version', 'r') as f:
-                    version_info = f.read().lower()
-                    if 'microsoft' in version_info or 'wsl' in version_info:
-                        is_wsl = True
-        except:
-            pass
-        
-        # 如果明确设置了WSL_DISTRO_NAME，说明在WSL中
-        if os.environ.get('WSL_DISTRO_NAME'):
-            is_wsl = True
-        
+        is_windows, is_wsl = _detect_environment()
         print(f"[MilvusVectorDB] 🔍 运行环境检测: Windows={is_windows}, WSL={is_wsl}")
         
-        # 优先检查环境变量（允许手动指定主机）
+        # 连接顺序：环境变量指定的主机 > 上次连接成功的主机（1秒超时） > 完整检测结果
+        # 完整检测（注册表、wsl子进程）只在前两者都失败时才执行
+        candidates = []
         milvus_host = os.environ.get('MILVUS_HOST')
-        if not milvus_host and is_windows:
-            # 如果当前进程中没有，尝试从注册表读取用户级环境变量（Windows）
-            try:
-                import winreg
-                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Environment')
-                try:
-                    milvus_host, _ = winreg.QueryValueEx(key, 'MILVUS_HOST')
-                    winreg.CloseKey(key)
-                except FileNotFoundError:
-                    winreg.CloseKey(key)
-                    milvus_host = None
-            except:
-                milvus_host = None
-        
         if milvus_host:
-            connection_configs.append({'host': milvus_host, 'port': '19530'})
+            candidates.append(((milvus_host, MILVUS_PORT), 5))
             print(f"[MilvusVectorDB] ✅ 使用环境变量指定的Milvus主机: {milvus_host}")
-        
-        # 根据运行环境选择连接方式
-        try:
-            import subprocess
-            import re
-            
-            if is_wsl:
-                # 在WSL中运行：直接使用localhost（最简单的方式）
-                print(f"[MilvusVectorDB] 🔍 检测到WSL环境，使用localhost连接")
-                connection_configs = [
-                    {'host': 'localhost', 'port': '19530'},
-                    {'host': '127.0.0.1', 'port': '19530'},
-                ]
-            elif is_windows:
-                # 在Windows中运行：需要尝试WSL网关IP或配置端口转发
-                wsl_gateway_ip = None
-                # 方法1: 获取WSL2的默认网关IP（Windows主机在WSL网络中的IP）- 这是从Windows访问WSL服务的正确IP
-                try:
-                    # 尝试多种方式提取IP
-                    result = subprocess.run(
-                        ['wsl', 'bash', '-c', "ip route show default | head -1"],
-                        capture_output=True,
-                        text=True,
-                        timeout=5
-                    )
-                    if result.returncode == 0:
-                        route_output = result.stdout.strip()
-                        print(f"[MilvusVectorDB] 🔍 WSL路由命令输出: '{route_output}'")
-                        
-                        # 从路由输出中提取IP（格式：default via 172.28.48.1 dev eth0...）
-                        # 使用正则表达式提取IP
-                        ip_match = re.search(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})', route_output)
-                        if ip_match:
-                            wsl_gateway_ip = ip_match.group(1)
-                            if wsl_gateway_ip not in [c['host'] for c in connection_configs]:
-                                connection_configs.append({'host': wsl_gateway_ip, 'port': '19530'})
-                                print(f"[MilvusVectorDB] ✅ 检测到WSL网关IP（Windows在WSL中的IP）: {wsl_gateway_ip} ⭐ 这是从Windows访问WSL的正确IP")
-                        else:
-                            print(f"[MilvusVectorDB] ⚠️ 无法从路由输出中提取IP: '{route_output}'")
-                    else:
-                        print(f"[MilvusVectorDB] ⚠️ WSL路由命令失败，返回码: {result.returncode}")
-                        if result.stderr:
-                            print(f"[MilvusVectorDB] ⚠️ 错误输出: {result.stderr[:200]}")
-                except Exception as e:
-                    print(f"[MilvusVectorDB] ⚠️ 无法获取WSL网关IP，异常: {type(e).__name__}: {e}")
-                
-                # 如果网关IP检测失败，尝试其他方法
-                if not wsl_gateway_ip:
-                    # 方法2: 从WSL hostname -I获取第一个IP（可能是网关IP）
-                    try:
-                        result = subprocess.run(
-                            ['wsl', 'hostname', '-I'],
-                            capture_output=True,
-                            text=True,
-                            timeout=3
-                        )
-                        if result.returncode == 0:
-                            wsl_ips = result.stdout.strip().split()
-                            # 通常第一个IP是主IP，可能是172.x.x.x格式（WSL2常用）
-                            for wsl_ip in wsl_ips[:2]:  # 只取前2个IP尝试
-                                if wsl_ip and re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', wsl_ip):
-                                    # WSL2通常使用172.x.x.x网段
-                                    if wsl_ip.startswith('172.') or wsl_ip.startswith('192.168.'):
-                                        if wsl_ip not in [c['host'] for c in connection_configs]:
-                                            connection_configs.append({'host': wsl_ip, 'port': '19530'})
-                                            print(f"[MilvusVectorDB] 🔍 检测到WSL IP: {wsl_ip}")
-                                        break
-                    except Exception as e:
-                        print(f"[MilvusVectorDB] ⚠️ 无法获取WSL IP: {e}")
-                
-                # 最后尝试localhost（需要WSL端口转发配置）
-                connection_configs.append({'host': 'localhost', 'port': '19530'})
-                connection_configs.append({'host': '127.0.0.1', 'port': '19530'})
-            else:
-                # 纯Linux/Mac环境（非WSL），直接使用localhost
-                print(f"[MilvusVectorDB] 🔍 检测到Linux/Mac环境，使用localhost连接")
-                if not connection_configs:
-                    connection_configs = [
-                        {'host': 'localhost', 'port': '19530'},
-                        {'host': '127.0.0.1', 'port': '19530'},
-                    ]
-        except Exception as e:
-            print(f"[MilvusVectorDB] ⚠️ 环境检测出错: {e}")
-            # 如果检测失败，使用默认配置
-            if not connection_configs:
-                connection_configs = [
-                    {'host': 'localhost', 'port': '19530'},
-                    {'host': '127.0.0.1', 'port': '19530'},
-                ]
-        
-        # 尝试连接
-        connected = False
-        last_error = None
-        print(f"[MilvusVectorDB] 🔍 尝试连接Milvus，共 {len(connection_configs)} 个配置...")
-        for i, config in enumerate(connection_configs):
-            try:
-                print(f"[MilvusVectorDB]   尝试 {i+1}/{len(connection_configs)}: {config['host']}:{config['port']}")
-                connections.connect(
-                    alias='default',
-                    host=config['host'],
-                    port=config['port'],
-                    timeout=5  # 5秒超时
-                )
-                print(f"[MilvusVectorDB] ✅ 已连接到Milvus ({config['host']}:{config['port']})")
-                connected = True
-                break
-            except Exception as e:
-                print(f"[MilvusVectorDB]   ❌ 连接失败: {str(e)[:100]}")
-                last_error = e
-                continue
-        
-        if not connected:
+        cached_host = _load_cached_milvus_host()
+        if cached_host and cached_host != (milvus_host, MILVUS_PORT):
+            candidates.append((cached_host, 1))
+        
+        connected, last_error = _connect_first(candidates)
+        if connected is None:
+            tried = {host_port for host_port, _ in candidates}
+            detected = [(host_port, 5) for host_port in resolve_milvus_hosts() if host_port not in tried]
+            connected, last_error = _connect_first(detected)
+        
+        if connected is not None:
+            _save_cached_milvus_host(connected)
+        else:
             print(f"\n[MilvusVectorDB] ❌ 所有连接尝试均失败！")
             print(f"[MilvusVectorDB] 最后错误: {last_error}")
             
@@ -255,10 +389,14 @@ class MilvusVectorDatabase:
         print(f"[MilvusVectorDB] 加载嵌入模型: {embedding_model}")
         self.model = SentenceTransformer(embedding_model)
         if torch.cuda.is_available():
-            self.model = self.model.cuda()
-            print(f"[MilvusVectorDB] ✅ 模型已加载到GPU: {torch.cuda.get_device_name(0)}")
+            # GPU上以FP16推理：权重与激活字节数减半（向量本身也按FP16入库）
+            self.model = self.model.cuda().half()
+            print(f"[MilvusVectorDB] ✅ 模型已加载到GPU (FP16): {torch.cuda.get_device_name(0)}")
         else:
             print(f"[MilvusVectorDB] ⚠️ GPU不可用，使用CPU")
+        self._embedding_cache = get_embedding_cache(Path(embedding_model).name)
+        # 嵌入模型与fast tokenizer都不支持多线程并发调用（会报"Already borrowed"），_encode中持锁使用
+        self._model_lock = threading.Lock()
         
         # 3. 初始化chunker（如果启用）
         if self.enable_chunking:
@@ -274,7 +412,7 @@ class MilvusVectorDatabase:
         # 4. 创建或获取集合（只使用chunk级别）
         self._init_chunk_collection()
         
-        chunk_count = self.chunk_collection.num_entities
+        chunk_count = self._get_entity_count()
         print(f"[MilvusVectorDB] ✅ 初始化完成（简化版：只使用chunk级别）")
         print(f"[MilvusVectorDB]   - Chunk级: {chunk_count} 个chunks")
     
@@ -286,17 +424,18 @@ class MilvusVectorDatabase:
         fields = [
             FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
             FieldSchema(name="chunk_id", dtype=DataType.VARCHAR, max_length=150),
-            FieldSchema(name="doc_id", dtype=DataType.VARCHAR, max_length=100),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=self.embedding_dim),
-            FieldSchema(name="content", dtype=DataType.VARCHAR, max_length=5000),  # 超保守设置，规避pymilvus bug
+            FieldSchema(name="doc_id", dtype=DataType.VARCHAR, max_length=100, is_partition_key=True),  # ⭐ 分区键：按doc_id哈希分区
+            FieldSchema(name="embedding", dtype=DataType.FLOAT16_VECTOR, dim=self.embedding_dim),  # ⭐ FP16：单条向量3584字节（FP32的一半）
+            FieldSchema(name="content", dtype=DataType.VARCHAR, max_length=2000),  # ⭐ zstd+字典压缩后的base64（见self._content_codec）
             FieldSchema(name="chunk_index", dtype=DataType.INT64),
             FieldSchema(name="chunk_type", dtype=DataType.VARCHAR, max_length=20),
             FieldSchema(name="title", dtype=DataType.VARCHAR, max_length=500),  # 文档标题
             FieldSchema(name="timestamp", dtype=DataType.VARCHAR, max_length=150),  # 发布时间
-            FieldSchema(name="industries", dtype=DataType.VARCHAR, max_length=500),  # ⭐ 中信一级行业（逗号分隔，经过DS32B过滤）
-            FieldSchema(name="investment_relevance", dtype=DataType.VARCHAR, max_length=10),  # ⭐ 投资相关性：高/低
-            FieldSchema(name="report_series", dtype=DataType.VARCHAR, max_length=50),  # ⭐ 报告系列：晨会纪要/晚间速递/策略研究等
-            FieldSchema(name="industry_policy_segments", dtype=DataType.VARCHAR, max_length=20000),  # ⭐ 行业及对应政策片段（JSON格式，增加到20000以支持大型JSON）
+            # ⭐ 以下三个低基数字段存字典编号（标签<->编号映射见self._label_vocab），过滤时为整数比较
+            FieldSchema(name="industries", dtype=DataType.ARRAY, element_type=DataType.INT32, max_capacity=64),  # ⭐ 中信一级行业（经过DS32B过滤）
+            FieldSchema(name="investment_relevance", dtype=DataType.INT32),  # ⭐ 投资相关性：高/低
+            FieldSchema(name="report_series", dtype=DataType.INT32),  # ⭐ 报告系列：晨会纪要/晚间速递/策略研究等
+            FieldSchema(name="industry_policy_segments", dtype=DataType.JSON),  # ⭐ 行业及对应政策片段（原生JSON，二进制存储，可按子路径过滤）
         ]
         
         schema = CollectionSchema(fields, description="政策文档Chunk向量库")
@@ -312,64 +451,70 @@ class MilvusVectorDatabase:
                 print(f"[MilvusVectorDB] ⚠️ 现有collection缺少title字段，重新创建...")
                 utility.drop_collection(self.chunk_collection_name)
                 print(f"[MilvusVectorDB] 创建新的Chunk集合...")
-                self.chunk_collection = Collection(self.chunk_collection_name, schema)
+                self.chunk_collection = Collection(self.chunk_collection_name, schema, num_partitions=_CHUNK_NUM_PARTITIONS)
                 
                 # 创建索引
-                index_params = {
-                    "metric_type": "L2",
-                    "index_type": "HNSW",
-                    "params": {"M": 16, "efConstruction": 200}
-                }
-                self.chunk_collection.create_index("embedding", index_params)
-                print(f"[MilvusVectorDB] ✅ Chunk索引创建完成 (HNSW)")
+                self._create_chunk_index()
             else:
                 print(f"[MilvusVectorDB] ✅ Chunk集合schema正确，加载中...")
                 self.chunk_collection = existing_collection
         else:
             print(f"[MilvusVectorDB] 创建新Chunk集合...")
-            self.chunk_collection = Collection(self.chunk_collection_name, schema)
+            self.chunk_collection = Collection(self.chunk_collection_name, schema, num_partitions=_CHUNK_NUM_PARTITIONS)
             
             # 创建索引
-            index_params = {
-                "metric_type": "L2",
-                "index_type": "HNSW",
-                "params": {"M": 16, "efConstruction": 200}
-            }
-            self.chunk_collection.create_index("embedding", index_params)
-            print(f"[MilvusVectorDB] ✅ Chunk索引创建完成 (HNSW)")
+            self._create_chunk_index()
+        
+        # 旧集合的embedding仍为FP32时沿用原类型（重建集合才会切换到FP16）
+        self._chunk_vector_fp16 = any(
+            field.name == "embedding" and field.dtype == DataType.FLOAT16_VECTOR
+            for field in self.chunk_collection.schema.fields
+        )
+        print(f"[MilvusVectorDB] Chunk向量类型: {'FP16' if self._chunk_vector_fp16 else 'FP32'}")
+        # 旧集合的industry_policy_segments为VARCHAR（JSON字符串），新集合为原生JSON字段
+        self._segments_json = any(
+            field.name == "industry_policy_segments" and field.dtype == DataType.JSON
+            for field in self.chunk_collection.schema.fields
+        )
+        # 旧集合的industries/investment_relevance/report_series为VARCHAR原文，新集合为字典编号
+        self._labels_encoded = any(
+            field.name == "industries" and field.dtype == DataType.ARRAY
+            for field in self.chunk_collection.schema.fields
+        )
+        self._label_vocab = LabelVocab(OUTPUT_DIR / "milvus_vocabs" / f"{self.chunk_collection_name}.json")
+        # chunk正文压缩（读取时兼容未压缩的旧数据）
+        self._content_codec = ContentCodec(OUTPUT_DIR / "milvus_vocabs" / f"{self.chunk_collection_name}.zdict")
+        # 检索结果的负载字段本地存储（按Milvus主键）
+        self._chunk_payload_store = ChunkPayloadStore(OUTPUT_DIR / "milvus_payload" / f"{self.chunk_collection_name}.sqlite3")
+        # 搜索参数按集合实际的索引类型生成（旧集合为HNSW）
+        try:
+            self._chunk_index_type = next(
+                (index.params.get("index_type") for index in self.chunk_collection.indexes
+                 if index.field_name == "embedding"),
+                "HNSW"
+            )
+        except Exception:
+            self._chunk_index_type = "HNSW"
         
         # 加载集合到内存（优化：检查状态后再加载）
         print(f"[MilvusVectorDB] 🔄 正在加载Chunk集合到内存...")
+        self._entity_count = None
         try:
             # 检查集合是否为空（带超时保护）
-            import threading
-            
-            entity_count = [None]
-            count_error = [None]
-            
-            def get_count():
-                try:
-                    entity_count[0] = self.chunk_collection.num_entities
-                except Exception as e:
-                    count_error[0] = e
-            
-            count_thread = threading.Thread(target=get_count, daemon=True)
-            count_thread.start()
-            count_thread.join(timeout=10)  # 10秒超时
-            
-            if count_thread.is_alive():
+            try:
+                entity_count = self._get_entity_count(timeout=10)  # 10秒超时
+            except FutureTimeoutError:
                 print(f"[MilvusVectorDB] ⚠️ 检查集合大小超时，假设为空集合（新集合）")
                 print(f"[MilvusVectorDB] ✅ 跳过load操作（新集合不需要load，插入数据时会自动加载）")
                 return  # 直接返回，不执行后续load
-            
-            if count_error[0]:
-                print(f"[MilvusVectorDB] ⚠️ 检查集合大小失败: {count_error[0]}，假设为空集合")
+            except Exception as count_error:
+                print(f"[MilvusVectorDB] ⚠️ 检查集合大小失败: {count_error}，假设为空集合")
                 print(f"[MilvusVectorDB] ✅ 跳过load操作（新集合不需要load）")
                 return
             
-            print(f"[MilvusVectorDB] 🔍 当前集合实体数: {entity_count[0]}")
+            print(f"[MilvusVectorDB] 🔍 当前集合实体数: {entity_count}")
             
-            if entity_count[0] == 0:
+            if entity_count == 0:
                 # 空集合，跳过load操作（空集合不需要load）
                 print(f"[MilvusVectorDB] ✅ 空集合，跳过load操作（插入数据时会自动加载）")
             else:
@@ -381,28 +526,12 @@ class MilvusVectorDatabase:
                     print(f"[MilvusVectorDB] ✅ 集合已在内存中")
                 except:
                     # 未加载，执行加载（带超时保护）
-                    print(f"[MilvusVectorDB] 🔄 正在加载 {entity_count[0]} 个实体到内存...")
+                    print(f"[MilvusVectorDB] 🔄 正在加载 {entity_count} 个实体到内存...")
                     print(f"[MilvusVectorDB] ⚠️ 如果长时间卡在此处，可能是MinIO未运行")
                     
-                    # 使用线程+超时机制，避免无限等待
-                    import threading
-                    import time
-                    
-                    load_success = [False]
-                    load_error = [None]
+                    load_error = self._load_chunk_collection(timeout=30)
                     
-                    def load_in_thread():
-                        try:
-                            self.chunk_collection.load()
-                            load_success[0] = True
-                        except Exception as e:
-                            load_error[0] = e
-                    
-                    load_thread = threading.Thread(target=load_in_thread, daemon=True)
-                    load_thread.start()
-                    load_thread.join(timeout=30)  # 30秒超时
-                    
-                    if load_thread.is_alive():
+                    if isinstance(load_error, TimeoutError):
                         print(f"[MilvusVectorDB] ❌ 加载超时（30秒）")
                         print(f"[MilvusVectorDB] 💡 可能原因：MinIO服务未正常运行")
                         print(f"[MilvusVectorDB] 💡 检查命令: docker ps | grep minio")
@@ -412,8 +541,8 @@ class MilvusVectorDatabase:
                         print(f"   docker compose up -d")
                         print(f"[MilvusVectorDB] ⚠️ 跳过load操作，继续初始化（如果是新集合可能不需要load）")
                         # 不抛出异常，允许继续（对于新集合可以跳过load）
-                    elif load_error[0]:
-                        print(f"[MilvusVectorDB] ❌ 加载失败: {load_error[0]}")
+                    elif load_error:
+                        print(f"[MilvusVectorDB] ❌ 加载失败: {load_error}")
                         print(f"[MilvusVectorDB] 💡 可能原因：MinIO服务未正常运行")
                         print(f"[MilvusVectorDB] 💡 检查命令: docker ps | grep minio")
                         print(f"[MilvusVectorDB] 💡 修复步骤:")
@@ -424,13 +553,130 @@ class MilvusVectorDatabase:
                         print(f"   5. 等待30秒后重试")
                         print(f"[MilvusVectorDB] ⚠️ 跳过load操作，继续初始化（新集合可能不需要load）")
                         # 不抛出异常，允许继续
-                    elif load_success[0]:
+                    else:
                         print(f"[MilvusVectorDB] ✅ Chunk集合已加载到内存")
                 
         except Exception as e:
             print(f"[MilvusVectorDB] ❌ 加载集合时出错: {e}")
             raise
     
+    def _label_value(self, entity, field: str) -> str:
+        """读取标签字段（industries/investment_relevance/report_series）：编号字段解码为原文"""
+        value = entity.get(field)
+        if not self._labels_encoded or value is None:
+            return value
+        if field == "industries":
+            return self._label_vocab.decode_list(field, value)
+        return self._label_vocab.decode(field, value)
+    
+    def _fetch_chunk_payloads(self, results) -> Dict[int, Dict[str, Any]]:
+        """
+        取检索命中chunk的负载字段（_CHUNK_PAYLOAD_FIELDS）
+        
+        先查本地ChunkPayloadStore；未命中的主键（bulk_insert导入或本地存储建立前的数据）
+        用一次 id in [...] 查询回源Milvus，并补写到本地。
+        
+        Returns:
+            {Milvus主键: 负载dict}
+        """
+        ids = list(dict.fromkeys(hit.id for hits in results for hit in hits))
+        payloads = self._chunk_payload_store.get_many(ids)
+        missing = [i for i in ids if i not in payloads]
+        # 单次query的limit上限为16384
+        for start in range(0, len(missing), _SCAN_BATCH_SIZE):
+            part = missing[start:start + _SCAN_BATCH_SIZE]
+            fetched = {
+                row['id']: {field: row.get(field) for field in _CHUNK_PAYLOAD_FIELDS}
+                for row in self.chunk_collection.query(
+                    expr=f"id in {part}",
+                    output_fields=_CHUNK_PAYLOAD_FIELDS,
+                    limit=len(part)
+                )
+            }
+            self._chunk_payload_store.set_many(fetched)
+            payloads.update(fetched)
+        return payloads
+    
+    def _sample_chunk_contents(self, limit: int) -> List[str]:
+        """从chunk集合顺序读取至多limit条正文（解压后），用作zstd字典的训练样本"""
+        if self._get_entity_count() == 0:
+            return []
+        samples = []
+        try:
+            iterator = self.chunk_collection.query_iterator(
+                batch_size=min(limit, _SCAN_BATCH_SIZE),
+                output_fields=["content"]
+            )
+            try:
+                while len(samples) < limit:
+                    batch = iterator.next()
+                    if not batch:
+                        break
+                    samples.extend(self._content_codec.decode(row.get('content')) for row in batch)
+            finally:
+                iterator.close()
+        except Exception as e:
+            print(f"[MilvusVectorDB] ⚠️ 读取已有正文作为字典训练样本失败: {e}")
+        return [text for text in samples[:limit] if text]
+    
+    def decode_content(self, value: Optional[str]) -> Optional[str]:
+        """解压从chunk集合直接查询到的content字段"""
+        return self._content_codec.decode(value)
+    
+    def _get_entity_count(self, timeout: Optional[float] = None) -> int:
+        """
+        chunk集合实体数（缓存在self._entity_count，插入数据后失效，下次访问时重新查询）
+        
+        Args:
+            timeout: 查询超时秒数，超时抛出concurrent.futures.TimeoutError；None为不限时
+        """
+        if self._entity_count is None:
+            if timeout is None:
+                self._entity_count = self.chunk_collection.num_entities
+            else:
+                future = _RPC_EXECUTOR.submit(lambda: self.chunk_collection.num_entities)
+                self._entity_count = future.result(timeout=timeout)
+        return self._entity_count
+    
+    def _load_chunk_collection(self, timeout: float = 30) -> Optional[Exception]:
+        """
+        加载chunk集合到内存，最多等待timeout秒
+        
+        用 load(_async=True) 发起加载后轮询加载进度：超时只是不再等待，
+        加载由Milvus在服务端继续完成，不会留下阻塞在RPC上的后台线程。
+        
+        Returns:
+            None表示加载完成；超时返回TimeoutError；失败返回对应异常
+        """
+        try:
+            self.chunk_collection.load(_async=True)
+            deadline = time.monotonic() + timeout
+            while True:
+                progress = utility.loading_progress(self.chunk_collection_name)
+                if str(progress.get('loading_progress', '')).rstrip('%') == '100':
+                    return None
+                if time.monotonic() >= deadline:
+                    return TimeoutError(f"加载超时（{timeout}秒）")
+                time.sleep(0.5)
+        except Exception as e:
+            return e
+    
+    def _load_chunk_collection_with_retry(self, max_retries: int = 3):
+        """加载chunk集合到内存（每次最多等待30秒，失败后等待5秒重试；不抛出异常）"""
+        print(f"[MilvusVectorDB] [Chunk级] 🔄 尝试加载集合到内存...")
+        for retry in range(max_retries):
+            load_error = self._load_chunk_collection(timeout=30)
+            if load_error is None:
+                print(f"[MilvusVectorDB] [Chunk级] ✅ 集合已加载到内存")
+                return
+            if isinstance(load_error, TimeoutError):
+                print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载超时（尝试 {retry+1}/{max_retries}）")
+            else:
+                print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载失败: {load_error} （尝试 {retry+1}/{max_retries}）")
+            if retry < max_retries - 1:
+                print(f"[MilvusVectorDB] [Chunk级] 🔄 等待5秒后重试...")
+                time.sleep(5)
+    
     def get_max_doc_id_number(self) -> int:
         """
         获取最大的doc_id编号（用于继续编号）
@@ -485,6 +731,70 @@ class MilvusVectorDatabase:
         
         return max_number
     
+    def _scan_existing_keys(self, entity_count: int):
+        """
+        一次顺序扫描chunk集合，得到已存在的doc_id集合和 (title, timestamp) 组合的布隆过滤器
+        
+        扫描结果按实体数缓存到磁盘（output/milvus_existing_keys/<集合名>.json 和 .npz），
+        实体数不变时直接读取缓存，插入新数据后实体数变化，缓存自然失效。
+        
+        Returns:
+            (doc_id集合, (title, timestamp)布隆过滤器)
+        """
+        cache_dir = OUTPUT_DIR / "milvus_existing_keys"
+        cache_file = cache_dir / f"{self.chunk_collection_name}.json"
+        bloom_file = cache_dir / f"{self.chunk_collection_name}.npz"
+        try:
+            if cache_file.exists() and bloom_file.exists():
+                cached = json.loads(cache_file.read_text(encoding='utf-8'))
+                if cached.get('num_entities') == entity_count:
+                    print(f"[MilvusVectorDB] ✅ 命中已存在文档缓存（{entity_count} 个chunks）")
+                    return set(cached['doc_ids']), BloomFilter.load(bloom_file)
+        except Exception as e:
+            print(f"[MilvusVectorDB] ⚠️ 读取已存在文档缓存失败: {e}，重新扫描")
+        
+        doc_ids = set()
+        # 每个chunk至多一个组合，按实体数的2倍预留容量
+        pairs = BloomFilter(capacity=2 * entity_count, error_rate=1e-6)
+        scanned = 0
+        
+        # query_iterator按主键顺序分页，不受 offset + limit <= 16384 的限制
+        iterator = self.chunk_collection.query_iterator(
+            batch_size=_SCAN_BATCH_SIZE,
+            output_fields=["doc_id", "title", "timestamp"]
+        )
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                for result in batch:
+                    doc_id = result.get('doc_id')
+                    if doc_id:
+                        doc_ids.add(doc_id)
+                # 使用 (title, timestamp) 元组作为唯一标识
+                pairs.add_many(
+                    (result['title'], result.get('timestamp', ''))
+                    for result in batch if result.get('title')
+                )
+                scanned += len(batch)
+                if scanned % (_SCAN_BATCH_SIZE * 4) < len(batch):
+                    print(f"[MilvusVectorDB]   已检查 {scanned}/{entity_count} 个chunks...")
+        finally:
+            iterator.close()
+        
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            pairs.save(bloom_file)
+            cache_file.write_text(json.dumps({
+                'num_entities': entity_count,
+                'doc_ids': sorted(doc_ids)
+            }, ensure_ascii=False), encoding='utf-8')
+        except Exception as e:
+            print(f"[MilvusVectorDB] ⚠️ 写入已存在文档缓存失败: {e}")
+        
+        return doc_ids, pairs
+    
     def _get_existing_doc_ids(self) -> set:
         """
         获取Milvus中已存在的所有doc_id（用于断点续传）
@@ -506,79 +816,35 @@ class MilvusVectorDatabase:
                 print(f"[MilvusVectorDB] ⚠️ 集合加载失败: {load_error}，尝试继续查询")
                 # 如果加载失败，尝试继续查询（新插入的数据可能在内存中）
             
-            entity_count = self.chunk_collection.num_entities
+            entity_count = self._get_entity_count()
             print(f"[MilvusVectorDB] 📊 集合 {self.chunk_collection_name} 共有 {entity_count} 个entities")
             if entity_count == 0:
                 print(f"[MilvusVectorDB] ⚠️ 集合为空，无已存在的doc_id")
                 return set()
             
-            # 查询所有唯一的doc_id
-            existing_doc_ids = set()
-            
-            try:
-                total = self.chunk_collection.num_entities
-                print(f"[MilvusVectorDB] 🔍 检查已存在的文档（共 {total} 个chunks）...")
-                
-                # 使用迭代器查询所有doc_id（分批查询避免内存溢出）
-                batch_size = 10000
-                for offset in range(0, total, batch_size):
-                    limit = min(batch_size, total - offset)
-                    try:
-                        results = self.chunk_collection.query(
-                            expr=f"id >= {offset} && id < {offset + limit}",
-                            output_fields=["doc_id"],
-                            limit=limit
-                        )
-                        for result in results:
-                            doc_id = result.get('doc_id')
-                            if doc_id:
-                                existing_doc_ids.add(doc_id)
-                    except Exception as batch_error:
-                        # 如果批量查询失败，尝试简单查询
-                        print(f"[MilvusVectorDB] ⚠️ 批量查询失败，尝试简单查询: {batch_error}")
-                        break
-                    
-                    if (offset + batch_size) % 50000 == 0:
-                        print(f"[MilvusVectorDB]   已检查 {min(offset + batch_size, total)}/{total} 个chunks...")
-                
-                # 如果批量查询失败，尝试简单查询所有数据
-                if len(existing_doc_ids) == 0 and total > 0:
-                    try:
-                        results = self.chunk_collection.query(
-                            expr="id >= 0",
-                            output_fields=["doc_id"],
-                            limit=min(100000, total)  # 最多查询10万条
-                        )
-                        for result in results:
-                            doc_id = result.get('doc_id')
-                            if doc_id:
-                                existing_doc_ids.add(doc_id)
-                    except Exception as e2:
-                        print(f"[MilvusVectorDB] ⚠️ 查询失败，假设无已存在文档: {e2}")
-                        return set()
-                
-                print(f"[MilvusVectorDB] ✅ 检查完成，发现 {len(existing_doc_ids)} 个唯一的doc_id")
-            except Exception as e:
-                print(f"[MilvusVectorDB] ⚠️ 检查已存在文档失败: {e}，假设无已存在文档")
-                return set()
-            
+            print(f"[MilvusVectorDB] 🔍 检查已存在的文档（共 {entity_count} 个chunks）...")
+            existing_doc_ids, _ = self._scan_existing_keys(entity_count)
+            print(f"[MilvusVectorDB] ✅ 检查完成，发现 {len(existing_doc_ids)} 个唯一的doc_id")
             return existing_doc_ids
         except Exception as e:
             print(f"[MilvusVectorDB] ⚠️ 检查已存在文档失败: {e}，假设无已存在文档")
             return set()
     
-    def get_existing_title_timestamp_pairs(self) -> set:
+    def get_existing_title_timestamp_pairs(self) -> ExistingPairSet:
         """
         获取Milvus中已存在的所有 (标题, 发布时间) 组合（用于入库前去重）
         
         去重逻辑：标题和发布时间同时一样才算重复
         
+        调用方只做成员判断（pair in 结果）与计数，因此底层用布隆过滤器而非set（约3.6字节/组合）；
+        布隆过滤器命中的组合再向Milvus精确查询确认，误判不会导致新文档被跳过。
+        
         Returns:
-            已存在的 (title, timestamp) 元组集合
+            已存在的 (title, timestamp) 组合（支持 in / len，len为近似的唯一组合数）
         """
         try:
             if not utility.has_collection(self.chunk_collection_name):
-                return set()
+                return ExistingPairSet(BloomFilter(capacity=1))
             
             # 尝试加载集合
             try:
@@ -586,59 +852,19 @@ class MilvusVectorDatabase:
             except:
                 pass
             
-            entity_count = self.chunk_collection.num_entities
+            entity_count = self._get_entity_count()
             if entity_count == 0:
-                return set()
+                return ExistingPairSet(BloomFilter(capacity=1))
             
-            existing_pairs = set()
-            
-            # 分批查询所有 (title, timestamp) 组合
-            # ⭐ Milvus限制：offset + limit 不能超过 16384
             print(f"[MilvusVectorDB] 🔍 获取已存在的 (标题, 时间) 组合（共 {entity_count} 条记录）...")
-            
-            batch_size = 10000  # 每批查询10000条
-            offset = 0
-            
-            while offset < entity_count:
-                try:
-                    # 计算本批次查询数量（不超过16384限制）
-                    current_limit = min(batch_size, entity_count - offset, 16384 - offset % 16384)
-                    if current_limit <= 0:
-                        break
-                    
-                    results = self.chunk_collection.query(
-                        expr="id >= 0",
-                        output_fields=["title", "timestamp"],
-                        offset=offset,
-                        limit=current_limit
-                    )
-                    
-                    if not results:
-                        break
-                    
-                    for result in results:
-                        title = result.get('title', '')
-                        timestamp = result.get('timestamp', '')
-                        if title:
-                            # 使用 (title, timestamp) 元组作为唯一标识
-                            existing_pairs.add((title, timestamp))
-                    
-                    offset += len(results)
-                    
-                    # 如果返回数量少于请求数量，说明已到末尾
-                    if len(results) < current_limit:
-                        break
-                        
-                except Exception as e:
-                    print(f"[MilvusVectorDB] ⚠️ 分批查询失败 (offset={offset}): {e}")
-                    break
+            _, existing_pairs = self._scan_existing_keys(entity_count)
             
             print(f"[MilvusVectorDB] ✅ 已存在 {len(existing_pairs)} 个唯一的 (标题, 时间) 组合")
-            return existing_pairs
+            return ExistingPairSet(existing_pairs, self.chunk_collection)
             
         except Exception as e:
             print(f"[MilvusVectorDB] ⚠️ 获取已存在组合失败: {e}")
-            return set()
+            return ExistingPairSet(BloomFilter(capacity=1))
     
     def add_documents(self, segments: List[PolicySegment], batch_size: int = 100, skip_existing: bool = True):
         """
@@ -701,7 +927,7 @@ class MilvusVectorDatabase:
             self._add_chunk_level(segments, batch_size)
             
             print(f"[MilvusVectorDB] ✅ 全部插入完成")
-            print(f"[MilvusVectorDB]   - Chunk级: {self.chunk_collection.num_entities} 个")
+            print(f"[MilvusVectorDB]   - Chunk级: {self._get_entity_count()} 个")
         except Exception as e:
             print(f"[MilvusVectorDB] ❌ 数据插入失败: {e}")
             print(f"[MilvusVectorDB] 错误类型: {type(e).__name__}")
@@ -712,6 +938,66 @@ class MilvusVectorDatabase:
     
     # 删除文档级向量添加方法，只使用chunk级别
     
+    def _create_chunk_index(self):
+        """
+        为chunk集合的embedding字段创建索引
+        
+        CHUNK_INDEX_TYPE为GPU_CAGRA时，先检查本机GPU空闲显存（与embedding模型争用），
+        不足或服务端不支持GPU索引时回退到HNSW_SQ。
+        """
+        # 标签字段的标量索引（旧VARCHAR集合不建）
+        if any(field.name == "industries" and field.dtype == DataType.ARRAY
+               for field in self.chunk_collection.schema.fields):
+            self.chunk_collection.create_index("industries", {"index_type": "INVERTED"})
+            self.chunk_collection.create_index("investment_relevance", {"index_type": "STL_SORT"})
+            self.chunk_collection.create_index("report_series", {"index_type": "STL_SORT"})
+        
+        if CHUNK_INDEX_TYPE == "GPU_CAGRA":
+            use_gpu = False
+            if torch.cuda.is_available():
+                try:
+                    free_bytes, _ = torch.cuda.mem_get_info()
+                    use_gpu = free_bytes >= CHUNK_GPU_INDEX_MIN_FREE_MB * 1024 * 1024
+                    if not use_gpu:
+                        print(f"[MilvusVectorDB] ⚠️ GPU空闲显存不足{CHUNK_GPU_INDEX_MIN_FREE_MB}MB，Chunk索引回退到HNSW_SQ")
+                except Exception as e:
+                    print(f"[MilvusVectorDB] ⚠️ 无法读取GPU显存: {e}，Chunk索引回退到HNSW_SQ")
+            else:
+                print(f"[MilvusVectorDB] ⚠️ 未检测到GPU，Chunk索引回退到HNSW_SQ")
+            
+            if use_gpu:
+                try:
+                    self.chunk_collection.create_index("embedding", _CHUNK_GPU_INDEX_PARAMS)
+                    print(f"[MilvusVectorDB] ✅ Chunk索引创建完成 (GPU_CAGRA)")
+                    return
+                except Exception as e:
+                    print(f"[MilvusVectorDB] ⚠️ GPU_CAGRA索引创建失败: {e}，回退到HNSW_SQ")
+        
+        self.chunk_collection.create_index("embedding", _CHUNK_INDEX_PARAMS)
+        print(f"[MilvusVectorDB] ✅ Chunk索引创建完成 (HNSW_SQ/SQ8 + FP16精排)")
+    
+    def _chunk_search_params(self, limit: int) -> Dict[str, Any]:
+        """Chunk集合搜索参数（按索引类型：CAGRA用itopk_size，HNSW用ef；均不小于limit）"""
+        if self._chunk_index_type == "GPU_CAGRA":
+            params = {"itopk_size": max(_CHUNK_ITOPK_SIZE, limit)}
+        else:
+            params = {"ef": max(_CHUNK_SEARCH_EF, limit)}
+            if self._chunk_index_type == "HNSW_SQ":
+                params["refine_k"] = _CHUNK_REFINE_K
+        return {"metric_type": "L2", "params": params}
+    
+    def _to_chunk_vectors(self, embeddings: np.ndarray) -> list:
+        """
+        将embedding转换为chunk集合embedding字段的插入/查询格式
+        
+        FP16集合：按行返回np.float16数组（pymilvus的FLOAT16_VECTOR格式）；
+        FP32集合：返回嵌套list。单条向量（1维）视为1行。
+        """
+        embeddings = np.atleast_2d(embeddings)
+        if self._chunk_vector_fp16:
+            return list(embeddings.astype(np.float16, copy=False))
+        return embeddings.tolist()
+    
     def _add_chunk_level(self, segments: List[PolicySegment], batch_size: int = 100):
         """添加Chunk级别数据到Milvus"""
         if not segments:
@@ -721,7 +1007,7 @@ class MilvusVectorDatabase:
         # 检查集合是否需要加载（空集合不需要load，插入时会自动加载）
         try:
             # 先检查集合是否为空
-            entity_count = self.chunk_collection.num_entities
+            entity_count = self._get_entity_count()
             print(f"[MilvusVectorDB] [Chunk级] 🔍 当前集合实体数: {entity_count}")
             
             if entity_count == 0:
@@ -737,32 +1023,18 @@ class MilvusVectorDatabase:
                     # 未加载，执行加载（带超时保护）
                     print(f"[MilvusVectorDB] [Chunk级] 🔄 集合有数据但未加载，正在加载...")
                     
-                    import threading
-                    
-                    load_success = [False]
-                    load_error = [None]
-                    
-                    def load_in_thread():
-                        try:
-                            self.chunk_collection.load()
-                            load_success[0] = True
-                        except Exception as e:
-                            load_error[0] = e
-                    
-                    load_thread = threading.Thread(target=load_in_thread, daemon=True)
-                    load_thread.start()
-                    load_thread.join(timeout=30)  # 30秒超时
+                    load_error = self._load_chunk_collection(timeout=30)
                     
-                    if load_thread.is_alive():
+                    if isinstance(load_error, TimeoutError):
                         print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载超时（30秒），尝试继续插入")
                         print(f"[MilvusVectorDB] [Chunk级] 💡 如果后续插入失败，检查MinIO: docker ps | grep minio")
-                    elif load_error[0]:
-                        error_msg = str(load_error[0])
+                    elif load_error:
+                        error_msg = str(load_error)
                         if "collection not loaded" in error_msg.lower():
                             print(f"[MilvusVectorDB] [Chunk级] ⚠️ 集合未加载，尝试继续插入（Milvus可能会自动加载）")
                         else:
-                            print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载失败，但尝试继续插入: {load_error[0]}")
-                    elif load_success[0]:
+                            print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载失败，但尝试继续插入: {load_error}")
+                    else:
                         print(f"[MilvusVectorDB] [Chunk级] ✅ 集合已加载")
         except Exception as check_error:
             # 检查失败，假设是空集合，继续插入
@@ -782,9 +1054,9 @@ class MilvusVectorDatabase:
             report_series = seg.metadata.get('report_series', 'N/A')  # ⭐ 报告系列
             industry_policy_segments_dict = seg.metadata.get('industry_policy_segments', {})
             # 序列化为JSON字符串
-            import json
             industry_policy_segments_json = json.dumps(industry_policy_segments_dict, ensure_ascii=False) if industry_policy_segments_dict else ""
-            chunks = self.chunker.chunk_document(
+            # 逐个接收chunk直接放入汇总列表，不再为每篇文档额外构建一个chunk列表
+            chunks = self.chunker.iter_chunks(
                 doc_id=seg.doc_id,
                 title=seg.title,
                 content=seg.content,
@@ -862,16 +1134,8 @@ class MilvusVectorDatabase:
         if truncated_count > 0:
             print(f"  - ⚠️ 发现{truncated_count}个超长chunk（已截断）")
         
-        # 使用GPU批量生成向量（归一化）
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        embeddings = self.model.encode(
-            chunk_texts,
-            device=device,
-            batch_size=batch_size,
-            show_progress_bar=True,
-            convert_to_numpy=True,
-            normalize_embeddings=True  # ⭐ 归一化：方便计算相似度
-        )
+        # 使用GPU批量生成向量（归一化，命中缓存的chunk不重新编码）
+        embeddings = self._encode(chunk_texts, show_progress=True, use_cache=True)
         
         print(f"[MilvusVectorDB] [Chunk级] ✅ 向量生成完成，shape: {embeddings.shape}")
         
@@ -900,8 +1164,8 @@ class MilvusVectorDatabase:
         print(f"  embeddings[0]类型: {type(embeddings[0])}")
         print(f"  embeddings[0] shape/len: {embeddings[0].shape if hasattr(embeddings[0], 'shape') else len(embeddings[0])}")
         
-        # 转换embeddings
-        embeddings_list = embeddings.tolist()
+        # 转换embeddings（FP16集合转为float16数组）
+        embeddings_list = self._to_chunk_vectors(embeddings)
         print(f"  embeddings_list类型: {type(embeddings_list)}")
         print(f"  embeddings_list[0]类型: {type(embeddings_list[0])}")
         print(f"  embeddings_list[0]长度: {len(embeddings_list[0])}")
@@ -1104,7 +1368,6 @@ class MilvusVectorDatabase:
             if len(seg_str) > max_segments_length:
                 # 尝试智能截断：保留JSON结构
                 try:
-                    import json
                     seg_dict = json.loads(seg_str)
                     # 如果JSON太大，截断每个行业的政策片段列表
                     for industry, segments_list in seg_dict.items():
@@ -1133,201 +1396,199 @@ class MilvusVectorDatabase:
         else:
             print(f"  ✅ 所有 industry_policy_segments 字段长度正常")
         
-        for i in range(0, total_chunks, CHUNK_INSERT_BATCH):
-            end_idx = min(i + CHUNK_INSERT_BATCH, total_chunks)
-            
-            # 准备批次数据 - 修复字段顺序匹配Schema
-            batch_entities = [
-                entities[0][i:end_idx],  # chunk_id
-                entities[1][i:end_idx],  # doc_id
-                entities[2][i:end_idx],  # embedding
-                entities[3][i:end_idx],  # content
-                entities[4][i:end_idx],  # chunk_index
-                entities[5][i:end_idx],  # chunk_type
-                entities[6][i:end_idx],  # title
-                entities[7][i:end_idx],  # timestamp
-                entities[8][i:end_idx],  # industries
-                entities[9][i:end_idx],  # investment_relevance
-                entities[10][i:end_idx],  # report_series
-                entities[11][i:end_idx],  # industry_policy_segments
-            ]
-            
-            # 插入批次（添加错误处理和断点续传提示）
-            batch_num = i//CHUNK_INSERT_BATCH + 1
-            total_batches = (total_chunks-1)//CHUNK_INSERT_BATCH + 1
-            print(f"[MilvusVectorDB] [Chunk级] 插入批次 {batch_num}/{total_batches} ({end_idx-i} chunks)...")
-            try:
-                self.chunk_collection.insert(batch_entities)
-                total_inserted += (end_idx - i)
-            except Exception as e:
-                print(f"[MilvusVectorDB] ❌ 批次 {batch_num} 插入失败: {e}")
-                print(f"[MilvusVectorDB] 💡 提示: 已成功插入前 {total_inserted} 个chunks")
-                print(f"[MilvusVectorDB] 💡 提示: 可以重新运行程序，已插入的数据不会重复（Milvus会自动去重）")
-                raise e
+        # 标签字段编码为字典编号（字典先落盘再插入，保证已入库的编号都能解码）
+        if self._labels_encoded:
+            entities[8] = [self._label_vocab.encode_list('industries', value) for value in entities[8]]
+            entities[9] = [self._label_vocab.encode('investment_relevance', value) for value in entities[9]]
+            entities[10] = [self._label_vocab.encode('report_series', value) for value in entities[10]]
+            self._label_vocab.save()
+        
+        # 正文压缩：还没有字典时用集合中已有的正文 + 本批chunk训练（样本不足则本批存原文，下次入库再试）
+        if self._content_codec.enabled:
+            if not self._content_codec.has_dictionary:
+                self._content_codec.train(self._sample_chunk_contents(_CONTENT_DICT_SAMPLES) + entities[3])
+            entities[3] = [self._content_codec.encode(value) for value in entities[3]]
+        
+        # 大批量入库优先走bulk_insert（服务端直接读取Parquet），失败时回退到逐批insert
+        bulk_inserted = (
+            total_chunks >= MILVUS_BULK_INSERT_CONFIG["min_rows"]
+            and self._bulk_insert_chunks(entities)
+        )
+        if bulk_inserted:
+            total_inserted = total_chunks
+        
+        if not bulk_inserted:
+            # 负载字段在批次数据中的下标（跳过embedding），插入成功后按返回的主键写入本地存储
+            payload_columns = [(idx, field) for idx, field in enumerate(
+                ['chunk_id', 'doc_id', None, 'content', 'chunk_index', 'chunk_type', 'title', 'timestamp',
+                 'industries', 'investment_relevance', 'report_series', 'industry_policy_segments']
+            ) if field]
+            for i in range(0, total_chunks, CHUNK_INSERT_BATCH):
+                end_idx = min(i + CHUNK_INSERT_BATCH, total_chunks)
+                
+                # 准备批次数据 - 修复字段顺序匹配Schema
+                batch_entities = [
+                    entities[0][i:end_idx],  # chunk_id
+                    entities[1][i:end_idx],  # doc_id
+                    entities[2][i:end_idx],  # embedding
+                    entities[3][i:end_idx],  # content
+                    entities[4][i:end_idx],  # chunk_index
+                    entities[5][i:end_idx],  # chunk_type
+                    entities[6][i:end_idx],  # title
+                    entities[7][i:end_idx],  # timestamp
+                    entities[8][i:end_idx],  # industries
+                    entities[9][i:end_idx],  # investment_relevance
+                    entities[10][i:end_idx],  # report_series
+                    # industry_policy_segments：JSON字段传dict，旧VARCHAR字段传字符串
+                    [_parse_segments_json(value) for value in entities[11][i:end_idx]]
+                    if self._segments_json else entities[11][i:end_idx],
+                ]
+                
+                # 插入批次（添加错误处理和断点续传提示）
+                batch_num = i//CHUNK_INSERT_BATCH + 1
+                total_batches = (total_chunks-1)//CHUNK_INSERT_BATCH + 1
+                print(f"[MilvusVectorDB] [Chunk级] 插入批次 {batch_num}/{total_batches} ({end_idx-i} chunks)...")
+                try:
+                    insert_result = self.chunk_collection.insert(batch_entities)
+                    total_inserted += (end_idx - i)
+                    self._chunk_payload_store.set_many({
+                        row_id: {field: batch_entities[idx][offset] for idx, field in payload_columns}
+                        for offset, row_id in enumerate(insert_result.primary_keys)
+                    })
+                except Exception as e:
+                    print(f"[MilvusVectorDB] ❌ 批次 {batch_num} 插入失败: {e}")
+                    print(f"[MilvusVectorDB] 💡 提示: 已成功插入前 {total_inserted} 个chunks")
+                    print(f"[MilvusVectorDB] 💡 提示: 可以重新运行程序，已插入的数据不会重复（Milvus会自动去重）")
+                    raise e
+        
+        # 实体数已变化，下次访问时重新查询
+        self._entity_count = None
         
         # 执行flush（数据持久化）- 添加超时保护
         # 注意：插入数据后不需要load集合，直接flush即可
         print(f"[MilvusVectorDB] [Chunk级] 🔄 正在flush数据到存储...")
         print(f"[MilvusVectorDB] [Chunk级] ⚠️ 如果长时间卡在此处，可能是Milvus rootcoord服务异常")
         
-        import threading
-        
-        flush_success = [False]
-        flush_error = [None]
-        
-        def flush_in_thread():
-            try:
-                # ⭐ flush操作：刷新数据到磁盘（可能失败，但不影响数据插入）
-                try:
-                    self.chunk_collection.flush()
-                    print(f"[MilvusVectorDB] ✅ 数据已刷新到磁盘")
-                except Exception as flush_error:
-                    # flush失败不影响数据插入，数据已经在Milvus中
-                    error_msg = str(flush_error)
-                    if "channel not found" in error_msg or "rootcoord" in error_msg:
-                        print(f"[MilvusVectorDB] ⚠️ flush操作失败（Milvus服务内部错误），但数据已成功插入")
-                        print(f"[MilvusVectorDB] 💡 建议：如果频繁出现此错误，请重启Milvus服务")
-                    else:
-                        print(f"[MilvusVectorDB] ⚠️ flush操作失败: {flush_error}")
-                    # 不抛出异常，因为数据已经插入成功
-                flush_success[0] = True
-            except Exception as e:
-                flush_error[0] = e
-        
-        flush_thread = threading.Thread(target=flush_in_thread, daemon=True)
-        flush_thread.start()
-        flush_thread.join(timeout=60)  # 60秒超时
-        
-        if flush_thread.is_alive():
-            print(f"[MilvusVectorDB] [Chunk级] ⚠️ Flush超时（60秒），跳过flush继续执行")
-            print(f"[MilvusVectorDB] [Chunk级] 💡 可能原因：Milvus rootcoord服务异常")
+        try:
+            # ⭐ flush操作：刷新数据到磁盘（60秒超时；失败不影响数据插入，数据已经在Milvus中）
+            self.chunk_collection.flush(timeout=60)
+            print(f"[MilvusVectorDB] [Chunk级] ✅ 数据已flush到存储")
+        except Exception as flush_error:
+            error_msg = str(flush_error)
+            if "channel not found" in error_msg.lower() or "rootcoord" in error_msg.lower():
+                print(f"[MilvusVectorDB] [Chunk级] ⚠️ Flush失败：Milvus rootcoord服务异常")
+            else:
+                print(f"[MilvusVectorDB] [Chunk级] ⚠️ Flush失败或超时（60秒）: {flush_error}")
             print(f"[MilvusVectorDB] [Chunk级] 💡 排查步骤：")
             print(f"   1. 检查Milvus容器状态: docker ps | grep milvus")
             print(f"   2. 查看Milvus日志: docker logs milvus-standalone --tail 50")
             print(f"   3. 重启Milvus服务: docker restart milvus-standalone")
             print(f"[MilvusVectorDB] [Chunk级] ⚠️ 数据已插入但未flush，Milvus会在后台自动flush")
-            # 确保集合被加载到内存（带重试机制）
-            print(f"[MilvusVectorDB] [Chunk级] 🔄 尝试加载集合到内存...")
-            max_retries = 3
-            for retry in range(max_retries):
-                try:
-                    # 使用线程+超时避免卡死
-                    load_done = [False]
-                    load_err = [None]
-                    
-                    def do_load():
-                        try:
-                            self.chunk_collection.load()
-                            load_done[0] = True
-                        except Exception as e:
-                            load_err[0] = e
-                    
-                    load_t = threading.Thread(target=do_load, daemon=True)
-                    load_t.start()
-                    load_t.join(timeout=30)  # 30秒超时
-                    
-                    if load_done[0]:
-                        print(f"[MilvusVectorDB] [Chunk级] ✅ 集合已加载到内存")
-                        break
-                    elif load_t.is_alive():
-                        print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载超时（尝试 {retry+1}/{max_retries}）")
-                        if retry < max_retries - 1:
-                            print(f"[MilvusVectorDB] [Chunk级] 🔄 等待5秒后重试...")
-                            import time
-                            time.sleep(5)
-                    else:
-                        print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载失败: {load_err[0]} （尝试 {retry+1}/{max_retries}）")
-                        if retry < max_retries - 1:
-                            print(f"[MilvusVectorDB] [Chunk级] 🔄 等待5秒后重试...")
-                            import time
-                            time.sleep(5)
-                except Exception as e:
-                    print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载异常: {e} （尝试 {retry+1}/{max_retries}）")
-            # 不抛出异常，允许程序继续
-        elif flush_error[0]:
-            error_msg = str(flush_error[0])
-            if "channel not found" in error_msg.lower():
-                print(f"[MilvusVectorDB] [Chunk级] ⚠️ Flush失败：Milvus rootcoord服务异常")
-                print(f"[MilvusVectorDB] [Chunk级] 💡 可能原因：")
-                print(f"   1. Milvus rootcoord服务未正常运行")
-                print(f"   2. Milvus服务状态异常")
-                print(f"[MilvusVectorDB] [Chunk级] 💡 排查步骤：")
-                print(f"   1. 检查Milvus容器状态: docker ps | grep milvus")
-                print(f"   2. 查看Milvus日志: docker logs milvus-standalone --tail 50")
-                print(f"   3. 重启Milvus服务: docker restart milvus-standalone")
-                print(f"[MilvusVectorDB] [Chunk级] ⚠️ 数据已插入但未flush，Milvus会在后台自动flush")
-                # 确保集合被加载到内存（带重试机制）
-                print(f"[MilvusVectorDB] [Chunk级] 🔄 尝试加载集合到内存...")
-                max_retries = 3
-                for retry in range(max_retries):
-                    try:
-                        load_done = [False]
-                        load_err = [None]
-                        def do_load():
-                            try:
-                                self.chunk_collection.load()
-                                load_done[0] = True
-                            except Exception as e:
-                                load_err[0] = e
-                        load_t = threading.Thread(target=do_load, daemon=True)
-                        load_t.start()
-                        load_t.join(timeout=30)
-                        if load_done[0]:
-                            print(f"[MilvusVectorDB] [Chunk级] ✅ 集合已加载到内存")
-                            break
-                        elif load_t.is_alive():
-                            print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载超时（尝试 {retry+1}/{max_retries}）")
-                            if retry < max_retries - 1:
-                                import time
-                                time.sleep(5)
-                        else:
-                            print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载失败: {load_err[0]} （尝试 {retry+1}/{max_retries}）")
-                            if retry < max_retries - 1:
-                                import time
-                                time.sleep(5)
-                    except Exception as e:
-                        print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载异常: {e} （尝试 {retry+1}/{max_retries}）")
-                # 不抛出异常，允许程序继续（数据可能已经部分持久化）
-            else:
-                print(f"[MilvusVectorDB] [Chunk级] ⚠️ Flush失败: {flush_error[0]}")
-                print(f"[MilvusVectorDB] [Chunk级] ⚠️ 数据已插入但未flush，继续执行")
-                # 确保集合被加载到内存（带重试机制）
-                print(f"[MilvusVectorDB] [Chunk级] 🔄 尝试加载集合到内存...")
-                max_retries = 3
-                for retry in range(max_retries):
-                    try:
-                        load_done = [False]
-                        load_err = [None]
-                        def do_load():
-                            try:
-                                self.chunk_collection.load()
-                                load_done[0] = True
-                            except Exception as e:
-                                load_err[0] = e
-                        load_t = threading.Thread(target=do_load, daemon=True)
-                        load_t.start()
-                        load_t.join(timeout=30)
-                        if load_done[0]:
-                            print(f"[MilvusVectorDB] [Chunk级] ✅ 集合已加载到内存")
-                            break
-                        elif load_t.is_alive():
-                            print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载超时（尝试 {retry+1}/{max_retries}）")
-                            if retry < max_retries - 1:
-                                import time
-                                time.sleep(5)
-                        else:
-                            print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载失败: {load_err[0]} （尝试 {retry+1}/{max_retries}）")
-                            if retry < max_retries - 1:
-                                import time
-                                time.sleep(5)
-                    except Exception as e:
-                        print(f"[MilvusVectorDB] [Chunk级] ⚠️ 加载异常: {e} （尝试 {retry+1}/{max_retries}）")
-                # 不抛出异常，允许程序继续
-        elif flush_success[0]:
-            print(f"[MilvusVectorDB] [Chunk级] ✅ 数据已flush到存储")
+            # 确保集合被加载到内存（带重试机制），不抛出异常，允许程序继续
+            self._load_chunk_collection_with_retry()
         
         print(f"[MilvusVectorDB] [Chunk级] ✅ 插入完成，共 {total_inserted} 个chunks")
     
+    def _bulk_insert_chunks(self, entities: List[list]) -> bool:
+        """
+        通过Milvus bulk_insert导入chunk数据
+        
+        用RemoteBulkWriter把各字段写成Parquet并上传到Milvus使用的MinIO，
+        再调用utility.do_bulk_insert由服务端直接读取文件构建segment，
+        避免逐行经gRPC序列化。
+        
+        Args:
+            entities: 与_add_chunk_level中顺序一致的按字段列表
+            
+        Returns:
+            是否导入成功。未安装bulk_writer、Parquet写入/上传失败、或所有导入任务都失败
+            （没有任何数据入库）时返回False，由调用方回退到insert
+            
+        Raises:
+            RuntimeError: 部分任务已完成后其余任务失败，或等待超时仍有任务在服务端导入。
+                此时已有数据入库，回退到insert会产生重复chunk，因此直接报错
+        """
+        if RemoteBulkWriter is None:
+            print(f"[MilvusVectorDB] [Chunk级] ⚠️ 当前pymilvus不支持bulk_writer，使用逐批insert")
+            return False
+        
+        cfg = MILVUS_BULK_INSERT_CONFIG
+        field_names = ['chunk_id', 'doc_id', 'embedding', 'content', 'chunk_index', 'chunk_type',
+                       'title', 'timestamp', 'industries', 'investment_relevance', 'report_series',
+                       'industry_policy_segments']
+        print(f"[MilvusVectorDB] [Chunk级] 🚀 使用bulk_insert导入 {len(entities[0])} 个chunks...")
+        try:
+            writer = RemoteBulkWriter(
+                schema=self.chunk_collection.schema,
+                remote_path=cfg["remote_path"],
+                connect_param=RemoteBulkWriter.S3ConnectParam(
+                    endpoint=cfg["minio_endpoint"],
+                    access_key=cfg["access_key"],
+                    secret_key=cfg["secret_key"],
+                    bucket_name=cfg["bucket_name"],
+                    secure=False
+                ),
+                file_type=BulkFileType.PARQUET
+            )
+            segments_idx = field_names.index('industry_policy_segments')
+            for row_values in zip(*entities):
+                row = dict(zip(field_names, row_values))
+                if self._segments_json:
+                    row['industry_policy_segments'] = _parse_segments_json(row_values[segments_idx])
+                writer.append_row(row)
+            writer.commit()
+        except Exception as e:
+            print(f"[MilvusVectorDB] [Chunk级] ⚠️ bulk_insert写入Parquet失败: {e}，回退到逐批insert")
+            return False
+        
+        # 提交导入任务：第一个任务提交前失败可以安全回退；之后失败说明已有任务在导入，不能回退
+        task_ids = []
+        try:
+            for files in writer.batch_files:
+                task_ids.append(utility.do_bulk_insert(collection_name=self.chunk_collection_name, files=files))
+        except Exception as e:
+            if not task_ids:
+                print(f"[MilvusVectorDB] [Chunk级] ⚠️ bulk_insert任务提交失败: {e}，回退到逐批insert")
+                return False
+            raise RuntimeError(
+                f"bulk_insert已提交 {len(task_ids)} 个任务后提交失败，不能回退到insert（会产生重复chunk）: {e}"
+            ) from e
+        
+        # 等待所有任务结束（失败的任务也要等其余任务结束，才能判断是否有数据已入库）
+        deadline = time.monotonic() + cfg["timeout"]
+        pending = set(task_ids)
+        completed = 0
+        failed = 0
+        while pending:
+            for task_id in list(pending):
+                state = utility.get_bulk_insert_state(task_id)
+                if state.state == BulkInsertState.ImportCompleted:
+                    pending.discard(task_id)
+                    completed += 1
+                elif state.state in (BulkInsertState.ImportFailed, BulkInsertState.ImportFailedAndCleaned):
+                    print(f"[MilvusVectorDB] [Chunk级] ❌ bulk_insert任务 {task_id} 失败: {state.failed_reason}")
+                    pending.discard(task_id)
+                    failed += 1
+            if pending:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(
+                        f"bulk_insert超时（{cfg['timeout']}秒），仍有 {len(pending)} 个任务在服务端导入，"
+                        f"不能回退到insert（会产生重复chunk），请稍后检查任务状态: {sorted(pending)}"
+                    )
+                time.sleep(2)
+        
+        if failed:
+            if completed == 0:
+                print(f"[MilvusVectorDB] [Chunk级] ⚠️ bulk_insert任务全部失败，回退到逐批insert")
+                return False
+            raise RuntimeError(
+                f"bulk_insert部分失败：{completed} 个任务已完成，{failed} 个任务失败，"
+                f"不能回退到insert（会产生重复chunk）"
+            )
+        
+        print(f"[MilvusVectorDB] [Chunk级] ✅ bulk_insert完成（{len(task_ids)} 个任务）")
+        return True
+    
     def search_similar(self, query_text: str = None, query_segment: PolicySegment = None,
                       top_k: int = 20, where_filter: Dict = None) -> List[Dict[str, Any]]:
         """
@@ -1362,14 +1623,8 @@ class MilvusVectorDatabase:
         if not query_text:
             return []
         
-        # 生成查询向量
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        query_embedding = self.model.encode(
-            [query_text],
-            device=device,
-            convert_to_numpy=True,
-            normalize_embeddings=True  # ⭐ 归一化
-        )[0]
+        # 生成查询向量（归一化）
+        query_embedding = self._encode([query_text])[0]
         
         # 搜索参数（ef必须>=top_k，设置为512保证足够大）
         search_params = {"metric_type": "L2", "params": {"ef": 512}}
@@ -1540,14 +1795,8 @@ class MilvusVectorDatabase:
         if query_timestamp:
             print(f"[MilvusVectorDB]   - 时间: {query_timestamp}")
         
-        # 生成查询向量
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        query_embedding = self.model.encode(
-            [query_text],
-            device=device,
-            convert_to_numpy=True,
-            normalize_embeddings=True  # ⭐ 归一化
-        )[0]
+        # 生成查询向量（归一化）
+        query_embedding = self._encode([query_text])[0]
         
         # === 步骤1: 文档级检索（粗排） ===
         print(f"[MilvusVectorDB] [步骤1] 文档级检索（粗排）...")
@@ -1644,28 +1893,29 @@ class MilvusVectorDatabase:
         
         # 执行Chunk级检索
         chunk_results = self.chunk_collection.search(
-            data=[query_embedding.tolist()],
+            data=self._to_chunk_vectors(query_embedding),
             anns_field="embedding",
-            param=search_params,
+            param=self._chunk_search_params(top_k_chunks),
             limit=top_k_chunks,
-            expr=chunk_expr,
-            output_fields=["chunk_id", "doc_id", "content", "chunk_index", "chunk_type", "timestamp", "industries", "investment_relevance", "report_series", "industry_policy_segments"]
+            expr=chunk_expr
         )
+        payloads = self._fetch_chunk_payloads(chunk_results)
         
         # 格式化Chunk级结果
         chunks = []
         for hit in chunk_results[0]:
+            entity = payloads.get(hit.id, {})
             chunks.append({
-                'chunk_id': hit.entity.get('chunk_id'),
-                'doc_id': hit.entity.get('doc_id'),
-                'content': hit.entity.get('content'),
-                'chunk_index': hit.entity.get('chunk_index'),
-                'chunk_type': hit.entity.get('chunk_type'),
-                'timestamp': hit.entity.get('timestamp'),         # ⭐ 核心
-                'industries': hit.entity.get('industries'),       # ⭐ 核心
-                'investment_relevance': hit.entity.get('investment_relevance'),
-                'report_series': hit.entity.get('report_series'),  # ⭐ 报告系列
-                'industry_policy_segments': hit.entity.get('industry_policy_segments'),
+                'chunk_id': entity.get('chunk_id'),
+                'doc_id': entity.get('doc_id'),
+                'content': self._content_codec.decode(entity.get('content')),
+                'chunk_index': entity.get('chunk_index'),
+                'chunk_type': entity.get('chunk_type'),
+                'timestamp': entity.get('timestamp'),         # ⭐ 核心
+                'industries': self._label_value(entity, 'industries'),       # ⭐ 核心
+                'investment_relevance': self._label_value(entity, 'investment_relevance'),
+                'report_series': self._label_value(entity, 'report_series'),  # ⭐ 报告系列
+                'industry_policy_segments': entity.get('industry_policy_segments'),
                 'distance': hit.distance,
                 'similarity': 1 / (1 + hit.distance),
             })
@@ -1696,6 +1946,7 @@ class MilvusVectorDatabase:
             # 清空Chunk级集合
             if self.enable_chunking and utility.has_collection(self.chunk_collection_name):
                 utility.drop_collection(self.chunk_collection_name)
+                self._chunk_payload_store.clear()
                 print(f"[MilvusVectorDB] ✅ Chunk级集合 {self.chunk_collection_name} 已删除")
             
             # 重新创建
@@ -1720,12 +1971,102 @@ class MilvusVectorDatabase:
         }
         
         if self.enable_chunking:
-            stats['total_chunks'] = self.chunk_collection.num_entities
+            stats['total_chunks'] = self._get_entity_count()
             stats['chunk_collection_name'] = self.chunk_collection_name
             stats['avg_chunks_per_doc'] = 0  # 简化版：无法计算平均值
         
         return stats
     
+    def _encode(self, texts: List[str], show_progress: bool = False, use_cache: bool = False) -> np.ndarray:
+        """
+        批量生成归一化向量（embedding磁盘缓存 + 按token预算分桶）
+        
+        use_cache=True时先按文本哈希查缓存，只对未命中的文本调用模型，新向量写回缓存。
+        缓存不做淘汰，只用于入库路径的chunk（重复入库/重建集合时复用）；
+        检索query、打分用的句子等一次性文本不写缓存，避免缓存文件无限增长。
+        未命中的文本按长度排序后装桶，每桶的 条数×桶内最长token数 不超过_ENCODE_TOKEN_BUDGET：
+        短chunk一次编码更多条，长文本的桶更小，padding浪费也更少。
+        
+        Returns:
+            shape=(len(texts), dim) 的float32矩阵（数值为FP16精度，与缓存/入库一致）
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        
+        keys = [self._embedding_cache.make_key(text) for text in texts]
+        vectors = self._embedding_cache.get_many(keys) if use_cache else {}
+        pending = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        num_hits = len(vectors)
+        
+        if pending:
+            # 中文约1字符≈1 token，超过max_seq_length的部分会被模型截断
+            max_seq_length = getattr(self.model, 'max_seq_length', None) or 512
+            items = sorted(pending.items(), key=lambda item: len(item[1]))
+            buckets = []
+            bucket = []
+            for item in items:
+                num_tokens = min(len(item[1]), max_seq_length) + 2
+                if bucket and (len(bucket) + 1) * num_tokens > _ENCODE_TOKEN_BUDGET:
+                    buckets.append(bucket)
+                    bucket = []
+                bucket.append(item)
+            if bucket:
+                buckets.append(bucket)
+            
+            # 流水线：后台线程对下一桶做tokenize（fast tokenizer在Rust中执行，不占GIL），
+            # 主线程同时对当前桶做前向计算；整个流水线持有模型锁，多线程调用_encode时串行执行
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            new_vectors = {}
+            with self._model_lock, torch.inference_mode(), ThreadPoolExecutor(max_workers=1) as tokenize_pool:
+                next_features = tokenize_pool.submit(self._tokenize_bucket, buckets[0])
+                for bucket_idx, bucket in enumerate(buckets, 1):
+                    features = next_features.result()
+                    if bucket_idx < len(buckets):
+                        next_features = tokenize_pool.submit(self._tokenize_bucket, buckets[bucket_idx])
+                    
+                    features = {
+                        name: tensor.to(device, non_blocking=True) if isinstance(tensor, torch.Tensor) else tensor
+                        for name, tensor in features.items()
+                    }
+                    embeddings = self.model(features)['sentence_embedding']
+                    # ⭐ 归一化：方便计算相似度
+                    embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+                    embeddings = embeddings.to(torch.float16).cpu().numpy()
+                    for (key, _), embedding in zip(bucket, embeddings):
+                        new_vectors[key] = embedding
+                    if show_progress and (bucket_idx % 20 == 0 or bucket_idx == len(buckets)):
+                        print(f"[MilvusVectorDB]   向量编码进度: {bucket_idx}/{len(buckets)} 批")
+            
+            if use_cache:
+                self._embedding_cache.set_many(new_vectors)
+            vectors.update(new_vectors)
+        
+        if show_progress:
+            print(f"[MilvusVectorDB] 向量编码: {len(texts)} 条，缓存命中 {num_hits} 条，新编码 {len(pending)} 条")
+        return np.stack([vectors[key] for key in keys]).astype(np.float32)
+    
+    def _tokenize_bucket(self, bucket: List[tuple]) -> Dict[str, Any]:
+        """对一个桶的文本做tokenize；GPU可用时放入锁页内存，以便异步拷贝到显存"""
+        features = self.model.tokenize([text for _, text in bucket])
+        if torch.cuda.is_available():
+            features = {
+                name: tensor.pin_memory() if isinstance(tensor, torch.Tensor) else tensor
+                for name, tensor in features.items()
+            }
+        return features
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        批量生成查询向量（与search_chunks使用同一embedding模型）
+        
+        Args:
+            texts: 查询文本列表
+            
+        Returns:
+            归一化后的向量矩阵，shape=(len(texts), dim)，行向量点积即余弦相似度
+        """
+        return self._encode(texts)
+    
     def search_chunks(self, query_text: str, top_k: int = 500, rerank_top_k: int = None, exclude_doc_id: str = None, exclude_title: str = None, exclude_timestamp = None, before_timestamp = None, after_timestamp = None, allow_same_day: bool = False, use_reranker: bool = True) -> List[Dict[str, Any]]:
         """
         搜索chunk级别向量（简化版RAG）+ 可选Reranking精排
@@ -1762,13 +2103,7 @@ class MilvusVectorDatabase:
             print(f"[MilvusVectorDB]   - 精排: Reranker筛选top-{final_top_k}")
         
         # 生成查询向量
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        query_embedding = self.model.encode(
-            [query_text],
-            device=device,
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )[0]
+        query_embedding = self._encode([query_text])[0]
         
         # 确保集合已加载（搜索前必须加载）
         try:
@@ -1777,47 +2112,20 @@ class MilvusVectorDatabase:
         except:
             # 未加载，执行加载
             print(f"[MilvusVectorDB] [搜索] 🔄 集合未加载，正在加载...")
-            try:
-                import threading
-                
-                load_success = [False]
-                load_error = [None]
-                
-                def load_in_thread():
-                    try:
-                        self.chunk_collection.load()
-                        load_success[0] = True
-                    except Exception as e:
-                        load_error[0] = e
-                
-                load_thread = threading.Thread(target=load_in_thread, daemon=True)
-                load_thread.start()
-                load_thread.join(timeout=30)  # 30秒超时
-                
-                if load_thread.is_alive():
-                    print(f"[MilvusVectorDB] [搜索] ⚠️ 加载超时（30秒），尝试继续搜索（新插入的数据可能在内存中）")
-                    print(f"[MilvusVectorDB] [搜索] 💡 如果搜索失败，可能是Milvus服务异常")
-                    # 不抛出异常，尝试继续搜索（新插入的数据可能在内存中）
-                elif load_error[0]:
-                    error_msg = str(load_error[0])
-                    if "not loaded" in error_msg.lower() or "collection not loaded" in error_msg.lower():
-                        print(f"[MilvusVectorDB] [搜索] ⚠️ 集合加载失败，尝试继续搜索（新插入的数据可能在内存中）")
-                        # 不抛出异常，尝试继续搜索
-                    else:
-                        print(f"[MilvusVectorDB] [搜索] ⚠️ 集合加载失败: {load_error[0]}，尝试继续搜索")
-                        # 不抛出异常，尝试继续搜索
-                elif load_success[0]:
-                    print(f"[MilvusVectorDB] [搜索] ✅ 集合已加载")
-            except Exception as load_error:
-                print(f"[MilvusVectorDB] [搜索] ⚠️ 集合加载过程出错: {load_error}")
-                print(f"[MilvusVectorDB] [搜索] 💡 尝试继续搜索（新插入的数据可能在内存中）")
+            load_error = self._load_chunk_collection(timeout=30)
+            
+            if isinstance(load_error, TimeoutError):
+                print(f"[MilvusVectorDB] [搜索] ⚠️ 加载超时（30秒），尝试继续搜索（新插入的数据可能在内存中）")
+                print(f"[MilvusVectorDB] [搜索] 💡 如果搜索失败，可能是Milvus服务异常")
+                # 不抛出异常，尝试继续搜索（新插入的数据可能在内存中）
+            elif load_error:
+                print(f"[MilvusVectorDB] [搜索] ⚠️ 集合加载失败: {load_error}，尝试继续搜索")
                 # 不抛出异常，尝试继续搜索
+            else:
+                print(f"[MilvusVectorDB] [搜索] ✅ 集合已加载")
         
-        # 搜索参数 - 优化：增加nprobe提高搜索精度
-        search_params = {
-            "metric_type": "L2",
-            "params": {"nprobe": 20}  # 从10增加到20，提高搜索精度
-        }
+        # 搜索参数：HNSW的ef需≥召回数量（nprobe只对IVF索引生效）
+        search_params = self._chunk_search_params(retrieval_top_k)
         
         # ⭐ 构建Milvus过滤表达式（时间过滤在最前面！）
         # 这样Milvus只返回符合时间条件的结果，避免浪费计算
@@ -1868,13 +2176,13 @@ class MilvusVectorDatabase:
         
         # 执行搜索（带时间过滤）
         results = self.chunk_collection.search(
-            data=[query_embedding.tolist()],
+            data=self._to_chunk_vectors(query_embedding),
             anns_field="embedding",
             param=search_params,
             limit=retrieval_top_k,  # ⭐ 使用调整后的召回数量
-            expr=filter_expr,  # ⭐ 时间过滤在Milvus层面进行！
-            output_fields=["chunk_id", "doc_id", "content", "chunk_index", "chunk_type", "title", "timestamp", "industries", "investment_relevance", "report_series", "industry_policy_segments"]
+            expr=filter_expr  # ⭐ 时间过滤在Milvus层面进行！
         )
+        payloads = self._fetch_chunk_payloads(results)
         
         # ⭐ 预处理排除条件：标题+时间（用于排除新政策自身）
         exclude_timestamp_date = None
@@ -1897,8 +2205,9 @@ class MilvusVectorDatabase:
         excluded_by_title_time = 0
         for hits in results:
             for hit in hits:
-                doc_id = hit.entity.get('doc_id')
-                hit_timestamp = hit.entity.get('timestamp', '')
+                entity = payloads.get(hit.id, {})
+                doc_id = entity.get('doc_id')
+                hit_timestamp = entity.get('timestamp', '')
                 
                 # 过滤掉exclude_doc_id
                 if exclude_doc_id and doc_id == exclude_doc_id:
@@ -1906,7 +2215,7 @@ class MilvusVectorDatabase:
                 
                 # ⭐ 过滤掉标题+发文时间都相同的文档（排除新政策自身）
                 if exclude_title and exclude_timestamp_date:
-                    hit_title = hit.entity.get('title', '')
+                    hit_title = entity.get('title', '')
                     if hit_title == exclude_title:
                         try:
                             from datetime import datetime
@@ -1927,15 +2236,15 @@ class MilvusVectorDatabase:
                 similarity = max(0.0, min(1.0, cosine_similarity))  # 确保在[0, 1]范围内
                 
                 formatted_results.append({
-                    'chunk_id': hit.entity.get('chunk_id'),
+                    'chunk_id': entity.get('chunk_id'),
                     'doc_id': doc_id,
-                    'content': hit.entity.get('content'),
+                    'content': self._content_codec.decode(entity.get('content')),
                     'similarity': similarity,  # 余弦相似度（0-1，越大越相似）
-                    'chunk_index': hit.entity.get('chunk_index'),
-                    'chunk_type': hit.entity.get('chunk_type'),
-                    'title': hit.entity.get('title'),
+                    'chunk_index': entity.get('chunk_index'),
+                    'chunk_type': entity.get('chunk_type'),
+                    'title': entity.get('title'),
                     'timestamp': hit_timestamp,
-                    'industries': hit.entity.get('industries')
+                    'industries': self._label_value(entity, 'industries')
                 })
         
         exclude_msg = f"（已排除doc_id={exclude_doc_id}）" if exclude_doc_id else ""
@@ -1988,74 +2297,64 @@ class MilvusVectorDatabase:
         print(f"[MilvusVectorDB] 精细化搜索: {len(query_chunks)} 个query chunks，每个返回top_{top_k_per_query}")
         
         # 批量生成查询向量（GPU加速）
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        query_embeddings = self.model.encode(
-            query_chunks,
-            device=device,
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-            batch_size=32,
-            show_progress_bar=False
-        )
+        query_embeddings = self._encode(query_chunks)
         
         # 搜索参数
-        search_params = {
-            "metric_type": "L2",
-            "params": {"nprobe": 20}
-        }
+        search_params = self._chunk_search_params(top_k_per_query)
         
-        # 对每个query chunk执行搜索
+        # 所有query chunk合并为一次批量搜索（GPU索引下批量查询可并行遍历图）
         all_results = []
         chunk_id_set = set()  # 用于去重
         
-        for i, query_embedding in enumerate(query_embeddings):
-            results = self.chunk_collection.search(
-                data=[query_embedding.tolist()],
-                anns_field="embedding",
-                param=search_params,
-                limit=top_k_per_query,
-                output_fields=["chunk_id", "doc_id", "content", "chunk_index", "chunk_type", "title", "timestamp", "industries", "investment_relevance", "report_series", "industry_policy_segments"]
-            )
-            
-            for hits in results:
-                for hit in hits:
-                    chunk_id = hit.entity.get('chunk_id')
-                    doc_id = hit.entity.get('doc_id')
-                    
-                    # 过滤掉exclude_doc_id
-                    if exclude_doc_id and doc_id == exclude_doc_id:
-                        continue
-                    
-                    # 去重：如果同一个chunk被多个query chunk匹配到，保留相似度更高的
-                    # ⭐ 对于归一化向量：L2距离范围[0, 2]，转换为余弦相似度[0, 1]
-                    l2_distance = hit.distance
-                    cosine_similarity = 1.0 - (l2_distance ** 2) / 2.0
-                    similarity = max(0.0, min(1.0, cosine_similarity))  # 确保在[0, 1]范围内
-                    
-                    if chunk_id not in chunk_id_set:
-                        chunk_id_set.add(chunk_id)
-                        all_results.append({
-                            'chunk_id': chunk_id,
-                            'doc_id': doc_id,
-                            'content': hit.entity.get('content'),
-                            'similarity': similarity,
-                            'chunk_index': hit.entity.get('chunk_index'),
-                            'chunk_type': hit.entity.get('chunk_type'),
-                            'title': hit.entity.get('title'),
-                            'timestamp': hit.entity.get('timestamp'),
-                            'industries': hit.entity.get('industries'),
-                            'investment_relevance': hit.entity.get('investment_relevance'),
-                            'report_series': hit.entity.get('report_series'),  # ⭐ 报告系列
-                            'industry_policy_segments': hit.entity.get('industry_policy_segments'),
-                            'matched_by_query_chunk': i  # 记录是哪个query chunk匹配到的
-                        })
-                    else:
-                        # 如果已存在，检查是否需要更新相似度（保留更高的）
-                        for existing in all_results:
-                            if existing['chunk_id'] == chunk_id and similarity > existing['similarity']:
-                                existing['similarity'] = similarity
-                                existing['matched_by_query_chunk'] = i
-                                break
+        batch_results = self.chunk_collection.search(
+            data=self._to_chunk_vectors(query_embeddings),
+            anns_field="embedding",
+            param=search_params,
+            limit=top_k_per_query
+        )
+        payloads = self._fetch_chunk_payloads(batch_results)
+        
+        # 第i组hits对应第i个query chunk
+        for i, hits in enumerate(batch_results):
+            for hit in hits:
+                entity = payloads.get(hit.id, {})
+                chunk_id = entity.get('chunk_id')
+                doc_id = entity.get('doc_id')
+                
+                # 过滤掉exclude_doc_id
+                if exclude_doc_id and doc_id == exclude_doc_id:
+                    continue
+                
+                # 去重：如果同一个chunk被多个query chunk匹配到，保留相似度更高的
+                # ⭐ 对于归一化向量：L2距离范围[0, 2]，转换为余弦相似度[0, 1]
+                l2_distance = hit.distance
+                cosine_similarity = 1.0 - (l2_distance ** 2) / 2.0
+                similarity = max(0.0, min(1.0, cosine_similarity))  # 确保在[0, 1]范围内
+                
+                if chunk_id not in chunk_id_set:
+                    chunk_id_set.add(chunk_id)
+                    all_results.append({
+                        'chunk_id': chunk_id,
+                        'doc_id': doc_id,
+                        'content': self._content_codec.decode(entity.get('content')),
+                        'similarity': similarity,
+                        'chunk_index': entity.get('chunk_index'),
+                        'chunk_type': entity.get('chunk_type'),
+                        'title': entity.get('title'),
+                        'timestamp': entity.get('timestamp'),
+                        'industries': self._label_value(entity, 'industries'),
+                        'investment_relevance': self._label_value(entity, 'investment_relevance'),
+                        'report_series': self._label_value(entity, 'report_series'),  # ⭐ 报告系列
+                        'industry_policy_segments': entity.get('industry_policy_segments'),
+                        'matched_by_query_chunk': i  # 记录是哪个query chunk匹配到的
+                    })
+                else:
+                    # 如果已存在，检查是否需要更新相似度（保留更高的）
+                    for existing in all_results:
+                        if existing['chunk_id'] == chunk_id and similarity > existing['similarity']:
+                            existing['similarity'] = similarity
+                            existing['matched_by_query_chunk'] = i
+                            break
         
         # 按相似度排序
         all_results.sort(key=lambda x: x['similarity'], reverse=True)
@@ -2100,7 +2399,14 @@ class MilvusVectorDatabase:
         print(f"[MilvusVectorDB] 🔍 按报告系列查询: {report_series}")
         
         # 构建查询表达式
-        expr = f'report_series == "{report_series}"'
+        if self._labels_encoded:
+            series_id = self._label_vocab.lookup('report_series', report_series)
+            if series_id is None:
+                print(f"[MilvusVectorDB] ⚠️ 未找到报告系列为'{report_series}'的历史政策")
+                return []
+            expr = f'report_series == {series_id}'
+        else:
+            expr = f'report_series == "{report_series}"'
         if exclude_doc_id:
             expr += f' && doc_id != "{exclude_doc_id}"'
         
@@ -2137,15 +2443,15 @@ class MilvusVectorDatabase:
                         'doc_id': doc_id,
                         'title': chunk.get('title', ''),
                         'timestamp': chunk.get('timestamp', ''),
-                        'industries': chunk.get('industries', ''),
-                        'investment_relevance': chunk.get('investment_relevance', ''),
-                        'report_series': chunk.get('report_series', report_series),
+                        'industries': self._label_value(chunk, 'industries') or '',
+                        'investment_relevance': self._label_value(chunk, 'investment_relevance') or '',
+                        'report_series': self._label_value(chunk, 'report_series') or report_series,
                         'chunks': [],
                         'content': ''
                     }
                 
                 # 添加chunk内容
-                content = chunk.get('content', '')
+                content = self._content_codec.decode(chunk.get('content', ''))
                 if content:
                     docs_by_id[doc_id]['chunks'].append({
                         'chunk_id': chunk.get('chunk_id'),
@@ -2230,7 +2536,7 @@ class MilvusVectorDatabase:
             results.sort(key=lambda x: x.get('chunk_index', 0))
             
             # 合并所有chunks的内容
-            contents = [r.get('content', '') for r in results if r.get('content')]
+            contents = [self._content_codec.decode(r.get('content')) for r in results if r.get('content')]
             full_content = '\n\n'.join(contents)
             
             return full_content